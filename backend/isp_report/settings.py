@@ -1,3 +1,4 @@
+import json
 import os
 from pathlib import Path
 from dotenv import load_dotenv
@@ -109,6 +110,33 @@ else:
 
 DATABASE_ROUTERS = ['isp_report.db_routers.MariaCacheRouter']
 
+# Report query results (reports.report_cache) live in the `reports` cache so
+# every gunicorn worker, the job worker and the sync commands share them. The
+# default file cache covers processes on one host: it evicts least recently
+# used entries once it holds REPORT_CACHE_MAX_ENTRIES entries or
+# REPORT_CACHE_MAX_TOTAL_BYTES bytes on disk (see
+# reports.cache_backends.BoundedFileCache). Set REPORT_CACHE_BACKEND and
+# REPORT_CACHE_LOCATION to a networked backend (e.g. Django's RedisCache) when
+# they run on separate hosts; its server then owns eviction, so give Redis a
+# `maxmemory` with `maxmemory-policy allkeys-lru`.
+_report_cache_backend = os.getenv('REPORT_CACHE_BACKEND', '').strip()
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'reports': {
+        'BACKEND': _report_cache_backend,
+        'LOCATION': os.getenv('REPORT_CACHE_LOCATION', ''),
+    } if _report_cache_backend else {
+        'BACKEND': 'reports.cache_backends.BoundedFileCache',
+        'LOCATION': os.getenv('REPORT_CACHE_LOCATION', '') or str(BASE_DIR / 'report_cache'),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('REPORT_CACHE_MAX_ENTRIES', '200')),
+            'MAX_BYTES': int(os.getenv('REPORT_CACHE_MAX_TOTAL_BYTES', str(1024 * 1024 * 1024))),
+        },
+    },
+}
+
 AUTH_PASSWORD_VALIDATORS = []
 
 LANGUAGE_CODE = 'en-us'
@@ -129,10 +157,27 @@ SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
 CSRF_COOKIE_SECURE = os.getenv('CSRF_COOKIE_SECURE', '0') == '1'
 SESSION_COOKIE_SECURE = os.getenv('SESSION_COOKIE_SECURE', '0') == '1'
 
+# Background report job files (reports.jobs) are written by the job worker and
+# served by the web processes, so both must see the same `report_jobs` storage.
+# The default keeps them under MEDIA_ROOT, which only works when the worker runs
+# on the web host (deploy/report-jobs.service); on separate hosts (e.g. the
+# Procfile's web/worker dynos) point REPORT_JOB_STORAGE_LOCATION at a shared
+# mount or set REPORT_JOB_STORAGE_BACKEND (and REPORT_JOB_STORAGE_OPTIONS as
+# JSON) to an object storage backend.
+_report_job_storage_backend = os.getenv('REPORT_JOB_STORAGE_BACKEND', '').strip()
 STORAGES = {
     'default': {
         'BACKEND': 'django.core.files.storage.FileSystemStorage',
     },
+    'report_jobs': {
+        'BACKEND': _report_job_storage_backend,
+        'OPTIONS': json.loads(os.getenv('REPORT_JOB_STORAGE_OPTIONS') or '{}'),
+    } if _report_job_storage_backend else {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+        'OPTIONS': {
+            'location': os.getenv('REPORT_JOB_STORAGE_LOCATION', '') or str(MEDIA_ROOT),
+        },
+    },
     'staticfiles': {
         'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
     }
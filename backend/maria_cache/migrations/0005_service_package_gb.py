@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maria_cache', '0004_reseller_name_norm'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='service',
+            name='package_gb',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -77,6 +77,7 @@ class Service(models.Model):
     source_name = models.CharField(max_length=64)
     source_id = models.IntegerField()
     name = models.CharField(max_length=132)
+    package_gb = models.FloatField(null=True, blank=True)
     is_enabled = models.BooleanField(default=True)
     is_deleted = models.BooleanField(default=False)
     reseller_access = models.CharField(max_length=16, default='All')
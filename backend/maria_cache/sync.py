@@ -1,5 +1,6 @@
 import logging
 import os
+from decimal import ROUND_HALF_UP, Decimal
 
 from django.db import transaction
 
@@ -25,6 +26,19 @@ def _bool_yes(value):
     return str(value).strip().lower() == 'yes'
 
 
+# Same traffic precedence as the Package column of the report sync query.
+SERVICE_TRAFFIC_FIELDS = ('STrA', 'MTrA', 'DTrA', 'YTrA', 'ExtraTraffic')
+
+
+def _package_gb(row):
+    for field in SERVICE_TRAFFIC_FIELDS:
+        value = row.get(field)
+        if value:
+            gb = Decimal(value) / Decimal(1073741824)
+            return float(gb.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP))
+    return None
+
+
 def _fetch_rows(conn, query):
     with conn.cursor() as cur:
         cur.execute(query)
@@ -44,6 +58,7 @@ def _replace_for_source(model, source_name, rows, builder, db_alias='cache', dry
 
 def sync_reference_tables(source_name=None, dry_run=False, limit=None, verbose=False):
     from reports.db import get_conn, get_sources
+    from reports.report_cache import report_cache
     sources = get_sources()
     if source_name:
         sources = [s for s in sources if s.get('name') == source_name]
@@ -61,7 +76,8 @@ def sync_reference_tables(source_name=None, dry_run=False, limit=None, verbose=F
             centers = _fetch_rows(conn, "SELECT Center_Id, CenterName, ISEnable, VispAccess FROM Hcenter")
             supporters = _fetch_rows(conn, "SELECT Supporter_Id, SupporterName, ISEnable FROM Hsupporter")
             statuses = _fetch_rows(conn, "SELECT Status_Id, StatusName, ISEnable, ResellerAccess, VispAccess FROM Hstatus")
-            services = _fetch_rows(conn, "SELECT Service_Id, ServiceName, ISEnable, IsDel, ResellerAccess, VispAccess FROM Hservice")
+            services = _fetch_rows(conn, "SELECT Service_Id, ServiceName, ISEnable, IsDel, ResellerAccess, VispAccess, "
+                                         "STrA, MTrA, DTrA, YTrA, ExtraTraffic FROM Hservice")
             reseller_permits = _fetch_rows(conn, "SELECT Reseller_Permit_Id, Reseller_Id, Visp_Id, ISPermit, PermitItem_Id FROM Hreseller_permit")
 
             service_reseller = _fetch_rows(conn, "SELECT Service_ResellerAccess_Id, Service_Id, Reseller_Id, Checked FROM Hservice_reselleraccess")
@@ -153,6 +169,7 @@ def sync_reference_tables(source_name=None, dry_run=False, limit=None, verbose=F
                     source_name=name,
                     source_id=r.get('Service_Id'),
                     name=r.get('ServiceName') or '',
+                    package_gb=_package_gb(r),
                     is_enabled=_bool_yes(r.get('ISEnable')),
                     is_deleted=_bool_yes(r.get('IsDel')),
                     reseller_access=r.get('ResellerAccess') or 'All',
@@ -206,4 +223,7 @@ def sync_reference_tables(source_name=None, dry_run=False, limit=None, verbose=F
         finally:
             conn.close()
 
+    if not dry_run:
+        # Creator names resolve through these tables; cached MariaDB reports may be stale.
+        report_cache.invalidate('mariadb')
     return summaries
@@ -17,7 +17,7 @@ class ReportsConfig(AppConfig):
             return
 
         from apscheduler.schedulers.background import BackgroundScheduler
-        from .sync import sync_maria_to_bigquery, log_sync_event
+        from .sync import sync_incremental_to_bigquery, sync_maria_to_bigquery, log_sync_event
         from maria_cache.sync import sync_reference_tables
 
         scheduler = BackgroundScheduler()
@@ -25,6 +25,7 @@ class ReportsConfig(AppConfig):
         if os.getenv('AUTO_SYNC_ENABLED', '0') == '1':
             interval = int(os.getenv('AUTO_SYNC_INTERVAL_MINUTES', '30'))
             days = int(os.getenv('AUTO_SYNC_DAYS', '90'))
+            mode = os.getenv('AUTO_SYNC_MODE', 'full')
 
             def _auto_sync_job():
                 log_sync_event(
@@ -32,8 +33,11 @@ class ReportsConfig(AppConfig):
                     'Auto sync triggered',
                     interval_minutes=interval,
                     days=days,
+                    mode=mode,
                     auto=True,
                 )
+                if mode == 'incremental':
+                    return sync_incremental_to_bigquery(bootstrap_days=days, retention_days=days, auto=True)
                 return sync_maria_to_bigquery(days=days, auto=True)
 
             scheduler.add_job(
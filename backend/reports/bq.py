@@ -1,7 +1,60 @@
+import logging
 import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from google.api_core.exceptions import NotFound
 from google.cloud import bigquery
 
+from .filters import bq_filter_clauses, resolve_report_filters
+from .rollup import pattern_params, rollup_enabled, rollup_supports, rollup_table_id, rollup_usable
+from .summary import SUMMARY_COLUMNS, bq_unlimited_sql
+
+logger = logging.getLogger(__name__)
+
+# Bump REPORT_SCHEMA_VERSION whenever REPORT_USER_SERVICE_SCHEMA changes so loaded
+# tables record which layout they were written with.
+REPORT_SCHEMA_VERSION = 2
+REPORT_USER_SERVICE_SCHEMA = [
+    bigquery.SchemaField('id', 'INT64'),
+    bigquery.SchemaField('CreateDate', 'DATE'),
+    bigquery.SchemaField('rs_userid', 'INT64'),
+    bigquery.SchemaField('rs_username', 'STRING'),
+    bigquery.SchemaField('rs_name', 'STRING'),
+    bigquery.SchemaField('UserServiceID', 'INT64'),
+    bigquery.SchemaField('username', 'STRING'),
+    bigquery.SchemaField('ServiceName', 'STRING'),
+    bigquery.SchemaField('ServicePrice', 'FLOAT64'),
+    bigquery.SchemaField('Package', 'FLOAT64'),
+    bigquery.SchemaField('ServiceStatus', 'STRING'),
+    bigquery.SchemaField('StartDate', 'DATE'),
+    bigquery.SchemaField('EndDate', 'DATE'),
+    bigquery.SchemaField('rs_username_norm', 'STRING'),
+]
+
+# Report queries filter on a date range and one or a few resellers, so the table
+# is partitioned by day and clustered on the normalized reseller name.
+REPORT_PARTITION_FIELD = 'CreateDate'
+REPORT_CLUSTER_FIELDS = ['rs_username_norm']
+
+LOAD_FORMATS = ('parquet', 'csv')
+
+_ARROW_TYPES = {
+    'INT64': pa.int64(),
+    'INTEGER': pa.int64(),
+    'FLOAT64': pa.float64(),
+    'FLOAT': pa.float64(),
+    'STRING': pa.string(),
+    'DATE': pa.date32(),
+    'BOOL': pa.bool_(),
+    'BOOLEAN': pa.bool_(),
+}
+
 
 def get_bq_client():
     project = os.getenv('BQ_PROJECT') or None
@@ -17,18 +70,42 @@ def get_bq_table_id():
     return f"{project}.{dataset}.{table}"
 
 
-def run_bq_report_query(
-    creators,
-    limit=1000,
-    date_op=None,
-    date_value=None,
-    date_start=None,
-    date_end=None,
-    service_status=None,
-):
-    table_id = get_bq_table_id()
-    client = get_bq_client()
+class LegacyReportTableError(RuntimeError):
+    """The report table predates the partitioned layout; loads into it fail."""
 
+
+# Report tables written before rs_username_norm existed are still readable;
+# creators then match on the expression the column is built from. Tables are
+# looked up once per process, or again after a while for legacy ones, so a
+# repartitioned table is picked up without a restart.
+_CREATOR_NORM_RECHECK_SECONDS = 300
+_creator_norm_tables = {}
+_creator_norm_lock = threading.Lock()
+
+
+def report_creator_sql(client, table_id):
+    """`rs_username_norm`, or `LOWER(TRIM(rs_username))` on a table without that column."""
+    now = time.monotonic()
+    with _creator_norm_lock:
+        checked = _creator_norm_tables.get(table_id)
+    if checked is None or (not checked[0] and now - checked[1] > _CREATOR_NORM_RECHECK_SECONDS):
+        try:
+            has_column = 'rs_username_norm' in {f.name for f in client.get_table(table_id).schema}
+        except NotFound:
+            has_column = True  # The query itself reports the missing table.
+        if not has_column:
+            logger.warning(
+                'BigQuery table %s has no rs_username_norm column; run `manage.py repartition_report_table`.',
+                table_id,
+            )
+        checked = (has_column, now)
+        with _creator_norm_lock:
+            _creator_norm_tables[table_id] = checked
+    return 'rs_username_norm' if checked[0] else 'LOWER(TRIM(rs_username))'
+
+
+def _report_where(creators, filters, date_col='CreateDate', status_col='ServiceStatus',
+                  creator_sql='rs_username_norm'):
     if creators is None:
         creators_list = []
     elif isinstance(creators, (list, tuple, set)):
@@ -39,24 +116,63 @@ def run_bq_report_query(
     where_clauses = []
     params = []
     if creators_list:
-        where_clauses.append("LOWER(TRIM(rs_username)) IN UNNEST(@creator_list)")
+        where_clauses.append(f"{creator_sql} IN UNNEST(@creator_list)")
         params.insert(0, bigquery.ArrayQueryParameter('creator_list', 'STRING', creators_list))
 
-    if service_status and str(service_status).strip().upper() != 'NONE':
-        status_norm = str(service_status).strip().lower()
-        where_clauses.append("LOWER(TRIM(ServiceStatus)) = @service_status")
-        params.append(bigquery.ScalarQueryParameter('service_status', 'STRING', status_norm))
-
-    if date_op in {'EXACT', '='} and date_value:
-        where_clauses.append("CreateDate = @date_value")
-        params.append(bigquery.ScalarQueryParameter('date_value', 'DATE', date_value))
-    elif date_op in {'<', '>', '<=', '>='} and date_value:
-        where_clauses.append(f"CreateDate {date_op} @date_value")
-        params.append(bigquery.ScalarQueryParameter('date_value', 'DATE', date_value))
-    elif date_op == 'BETWEEN' and date_start and date_end:
-        where_clauses.append("CreateDate BETWEEN @date_start AND @date_end")
-        params.append(bigquery.ScalarQueryParameter('date_start', 'DATE', date_start))
-        params.append(bigquery.ScalarQueryParameter('date_end', 'DATE', date_end))
+    filter_clauses, filter_params = bq_filter_clauses(filters, date_col=date_col, status_col=status_col)
+    where_clauses.extend(filter_clauses)
+    params.extend(filter_params)
+    return where_clauses, params
+
+
+# Detail pages are keyed on (creator, source, id); UserServiceID repeats
+# across sources, so rs_name breaks ties between them.
+BQ_PAGE_KEY = ['rs_username', 'rs_name', 'UserServiceID']
+_BQ_PAGE_KEY_SQL = (
+    ("COALESCE(rs_username, '')", 'cursor_creator', 'STRING'),
+    ("COALESCE(rs_name, '')", 'cursor_source', 'STRING'),
+    ('COALESCE(UserServiceID, -1)', 'cursor_id', 'INT64'),
+)
+
+
+def _bq_page_sql(page, where_clauses, params):
+    """Add the keyset predicate for one detail page; returns `(order_clause, limit)`.
+
+    Keys match `reports.pagination`: missing strings compare as '' and
+    missing ids as -1.
+    """
+    page_size, cursor = page
+    order = 'ASC'
+    if cursor is not None:
+        direction, key = cursor
+        op = '>' if direction == 'next' else '<'
+        order = 'ASC' if direction == 'next' else 'DESC'
+        # (a, b, c) > (x, y, z) spelled out, as BigQuery has no row comparison.
+        terms = []
+        for position, (column, name, _type) in enumerate(_BQ_PAGE_KEY_SQL):
+            equal_prefix = [f"{c} = @{n}" for c, n, _t in _BQ_PAGE_KEY_SQL[:position]]
+            terms.append('(' + ' AND '.join(equal_prefix + [f"{column} {op} @{name}"]) + ')')
+        where_clauses.append('(' + ' OR '.join(terms) + ')')
+        for (_column, name, type_), value in zip(_BQ_PAGE_KEY_SQL, key):
+            params.append(bigquery.ScalarQueryParameter(name, type_, int(value) if type_ == 'INT64' else value))
+    order_clause = 'ORDER BY ' + ', '.join(f"{column} {order}" for column, _n, _t in _BQ_PAGE_KEY_SQL)
+    return order_clause, page_size + 1
+
+
+# The CSV export splits rows on the rounded Package, like `pipeline.unlimited_mask`
+# does on prepared BigQuery rows.
+_BQ_EXPORT_UNLIMITED_SQL = bq_unlimited_sql('ROUND(Package, 2)', 'ServiceName')
+
+
+def _bq_report_sql(table_id, creators, filters, limit=0, page=None, unlimited=None, creator_sql='rs_username_norm'):
+    where_clauses, params = _report_where(creators, filters, creator_sql=creator_sql)
+    if unlimited is not None:
+        where_clauses.append(f"{'' if unlimited else 'NOT '}({_BQ_EXPORT_UNLIMITED_SQL})")
+        params.extend(pattern_params())
+
+    order_clause = "ORDER BY rs_username ASC, UserServiceID ASC"
+    if page is not None:
+        order_clause, limit = _bq_page_sql(page, where_clauses, params)
 
     if limit and int(limit) > 0:
         params.append(bigquery.ScalarQueryParameter('limit', 'INT64', int(limit)))
@@ -83,9 +199,431 @@ SELECT
     EndDate
 FROM `{table_id}`
 {where_clause}
-ORDER BY rs_username ASC, UserServiceID ASC
+{order_clause}
 {limit_clause}
 """
+    return query, params
+
+
+def run_bq_report_query(
+    creators,
+    limit=1000,
+    date_op=None,
+    date_value=None,
+    date_start=None,
+    date_end=None,
+    service_status=None,
+    filters=None,
+    page=None,
+):
+    """Fetch report rows for `creators`.
+
+    `filters` is the output of `resolve_report_filters`; when omitted the legacy
+    date/status keyword arguments are resolved the same way. `page`
+    (`(page_size, cursor)`) fetches one keyset page instead of `limit` rows.
+    """
+    table_id = get_bq_table_id()
+    client = get_bq_client()
+
+    if filters is None:
+        filters = resolve_report_filters({
+            'date_op': date_op,
+            'date_value': date_value,
+            'date_start': date_start,
+            'date_end': date_end,
+            'service_status': service_status,
+        })
+
+    query, params = _bq_report_sql(
+        table_id, creators, filters, limit, page=page, creator_sql=report_creator_sql(client, table_id)
+    )
     job = client.query(query, job_config=bigquery.QueryJobConfig(query_parameters=params))
     rows = [dict(r) for r in job.result()]
     return pd.DataFrame(rows), table_id
+
+
+def iter_bq_report_rows(creators, filters, unlimited, page_size=5000):
+    """Stream the limited (or `unlimited`) detail rows in (rs_username, UserServiceID) order.
+
+    Yields one DataFrame per result page of `page_size` rows, so only one
+    page is held in memory.
+    """
+    table_id = get_bq_table_id()
+    client = get_bq_client()
+    query, params = _bq_report_sql(
+        table_id, creators, filters, unlimited=unlimited, creator_sql=report_creator_sql(client, table_id)
+    )
+    job = client.query(query, job_config=bigquery.QueryJobConfig(query_parameters=params))
+    for page in job.result(page_size=page_size).pages:
+        yield pd.DataFrame([dict(r) for r in page])
+
+
+def run_bq_creator_totals_query(creators, filters=None):
+    """Row count and package GB per (creator, unlimited class) as `(DataFrame, table_id)`.
+
+    Columns are Creator, IsUnlimited, Count and SumGB; unlike
+    `run_bq_summary_query` rows without a creator or service are kept, so the
+    counts add up to the whole detail report (see `iter_bq_report_rows`).
+    """
+    table_id = get_bq_table_id()
+    client = get_bq_client()
+    filters = resolve_report_filters(None) if filters is None else filters
+    where_clauses, params = _report_where(creators, filters, creator_sql=report_creator_sql(client, table_id))
+    params.extend(pattern_params())
+    query = f"""
+SELECT
+    rs_username AS Creator,
+    {_BQ_EXPORT_UNLIMITED_SQL} AS IsUnlimited,
+    COUNT(1) AS Count,
+    SUM(ROUND(Package, 2)) AS SumGB
+FROM `{table_id}`
+WHERE {' AND '.join(where_clauses or ['TRUE'])}
+GROUP BY Creator, IsUnlimited
+"""
+    job = client.query(query, job_config=bigquery.QueryJobConfig(query_parameters=params))
+    return pd.DataFrame([dict(r) for r in job.result()], columns=['Creator', 'IsUnlimited', 'Count', 'SumGB']), table_id
+
+
+def estimate_bq_report(creators, filters):
+    """Size up the detail query for `creators` without running it.
+
+    Returns `{'rows', 'bytes', 'table'}`: `bytes` is the dry-run scan estimate
+    of the detail query and `rows` its row count from the daily rollup (None
+    when the rollup is off, missing, stale or can't answer the filters).
+    """
+    table_id = get_bq_table_id()
+    client = get_bq_client()
+    query, params = _bq_report_sql(table_id, creators, filters, creator_sql=report_creator_sql(client, table_id))
+    job_config = bigquery.QueryJobConfig(query_parameters=params, dry_run=True, use_query_cache=False)
+    job = client.query(query, job_config=job_config)
+    estimate = {'rows': None, 'bytes': int(job.total_bytes_processed or 0), 'table': table_id}
+    rollup_id = rollup_table_id(table_id)
+    if rollup_enabled() and rollup_supports(filters) and rollup_usable(client, rollup_id):
+        where_clauses, params = _report_where(creators, filters, date_col='Day', status_col='Status')
+        count_query = f"""
+SELECT SUM(Count) AS row_count
+FROM `{rollup_id}`
+WHERE {' AND '.join(where_clauses or ['TRUE'])}
+"""
+        try:
+            job = client.query(count_query, job_config=bigquery.QueryJobConfig(query_parameters=params))
+            row_count = next(iter(job.result()), {}).get('row_count')
+            estimate['rows'] = int(row_count or 0)
+        except NotFound:
+            pass
+    return estimate
+
+
+def run_bq_totals_query(creators, filters=None):
+    """Row count and package GB of the detail report as a one-row `(DataFrame, table_id)`.
+
+    Columns are TotalCount and TotalGB; read from the daily rollup when it can
+    answer the filters, like `run_bq_summary_query`.
+    """
+    table_id = get_bq_table_id()
+    client = get_bq_client()
+    filters = resolve_report_filters(None) if filters is None else filters
+    rollup_id = rollup_table_id(table_id)
+    if rollup_enabled() and rollup_supports(filters) and rollup_usable(client, rollup_id):
+        where_clauses, params = _report_where(creators, filters, date_col='Day', status_col='Status')
+        query = f"""
+SELECT SUM(Count) AS TotalCount, SUM(SumGB) AS TotalGB
+FROM `{rollup_id}`
+WHERE {' AND '.join(where_clauses or ['TRUE'])}
+"""
+        try:
+            job = client.query(query, job_config=bigquery.QueryJobConfig(query_parameters=params))
+            return pd.DataFrame([dict(r) for r in job.result()], columns=['TotalCount', 'TotalGB']), rollup_id
+        except NotFound:
+            pass
+
+    where_clauses, params = _report_where(creators, filters, creator_sql=report_creator_sql(client, table_id))
+    query = f"""
+SELECT COUNT(1) AS TotalCount, SUM(ROUND(Package, 2)) AS TotalGB
+FROM `{table_id}`
+WHERE {' AND '.join(where_clauses or ['TRUE'])}
+"""
+    job = client.query(query, job_config=bigquery.QueryJobConfig(query_parameters=params))
+    return pd.DataFrame([dict(r) for r in job.result()], columns=['TotalCount', 'TotalGB']), table_id
+
+
+def _run_rollup_summary_query(client, rollup_id, creators, filters):
+    where_clauses, params = _report_where(creators, filters, date_col='Day', status_col='Status')
+    where_clauses.extend(['rs_username IS NOT NULL', 'ServiceName IS NOT NULL'])
+    query = f"""
+SELECT
+    rs_username AS Creator,
+    ServiceName,
+    IsUnlimited,
+    SUM(Count) AS Count,
+    SUM(SumGB) AS SumGB
+FROM `{rollup_id}`
+WHERE {' AND '.join(where_clauses)}
+GROUP BY Creator, ServiceName, IsUnlimited
+"""
+    job = client.query(query, job_config=bigquery.QueryJobConfig(query_parameters=params))
+    return [dict(r) for r in job.result()]
+
+
+def run_bq_summary_query(creators, filters=None):
+    """Aggregate report rows per (creator, service, unlimited class) in BigQuery.
+
+    Returns `(DataFrame, table_id)` with Creator, ServiceName, IsUnlimited,
+    Count and SumGB columns; see `reports.summary.summaries_from_aggregates`.
+    Reads the daily rollup (see `reports.rollup`) when the filters allow it and
+    the rollup is usable, otherwise aggregates the report rows.
+    """
+    table_id = get_bq_table_id()
+    client = get_bq_client()
+    filters = resolve_report_filters(None) if filters is None else filters
+    rollup_id = rollup_table_id(table_id)
+    if rollup_enabled() and rollup_supports(filters) and rollup_usable(client, rollup_id):
+        try:
+            rows = _run_rollup_summary_query(client, rollup_id, creators, filters)
+            return pd.DataFrame(rows, columns=SUMMARY_COLUMNS), rollup_id
+        except NotFound:
+            pass
+
+    where_clauses, params = _report_where(creators, filters, creator_sql=report_creator_sql(client, table_id))
+    where_clauses.extend(['rs_username IS NOT NULL', 'ServiceName IS NOT NULL'])
+    params.extend(pattern_params())
+
+    query = f"""
+SELECT
+    rs_username AS Creator,
+    ServiceName,
+    {bq_unlimited_sql('Package', 'ServiceName')} AS IsUnlimited,
+    COUNT(1) AS Count,
+    SUM(ROUND(Package, 2)) AS SumGB
+FROM `{table_id}`
+WHERE {' AND '.join(where_clauses)}
+GROUP BY Creator, ServiceName, IsUnlimited
+"""
+    job = client.query(query, job_config=bigquery.QueryJobConfig(query_parameters=params))
+    rows = [dict(r) for r in job.result()]
+    return pd.DataFrame(rows, columns=SUMMARY_COLUMNS), table_id
+
+
+def resolve_load_format(load_format=None):
+    value = (load_format or os.getenv('BQ_LOAD_FORMAT', 'parquet')).strip().lower()
+    if value not in LOAD_FORMATS:
+        raise ValueError(f"Unsupported BigQuery load format: {value}")
+    return value
+
+
+def arrow_schema(schema):
+    return pa.schema([(field.name, _ARROW_TYPES[field.field_type]) for field in schema])
+
+
+def frame_to_arrow(df, schema):
+    """Convert `df` to an Arrow table that matches the BigQuery `schema` exactly."""
+    arrays = []
+    for field in schema:
+        series = df[field.name] if field.name in df.columns else pd.Series([None] * len(df), dtype=object)
+        if field.field_type == 'DATE':
+            series = pd.to_datetime(series, errors='coerce').dt.date
+            series = series.astype(object).where(series.notna(), None)
+        elif field.field_type in {'INT64', 'INTEGER'}:
+            series = pd.to_numeric(series, errors='coerce').astype('Int64')
+        elif field.field_type in {'FLOAT64', 'FLOAT'}:
+            series = pd.to_numeric(series, errors='coerce').astype('float64')
+        elif field.field_type == 'STRING':
+            series = series.astype('string')
+        arrays.append(pa.array(series, type=_ARROW_TYPES[field.field_type], from_pandas=True))
+    return pa.Table.from_arrays(arrays, schema=arrow_schema(schema))
+
+
+class FrameFileWriter:
+    """Append DataFrames to one Parquet or CSV file laid out by a BigQuery schema."""
+
+    def __init__(self, path, schema=None, load_format=None, header=True):
+        self.path = path
+        self.schema = schema or REPORT_USER_SERVICE_SCHEMA
+        self.load_format = resolve_load_format(load_format)
+        self.header = header
+        self._writer = None
+        self._handle = None
+        self._wrote_header = False
+
+    def write(self, df):
+        if df is None or df.empty:
+            return
+        if self.load_format == 'parquet':
+            table = frame_to_arrow(df, self.schema)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema, compression='snappy')
+            self._writer.write_table(table)
+            return
+        if self._handle is None:
+            self._handle = open(self.path, 'w', encoding='utf-8', newline='')
+        cols = [field.name for field in self.schema]
+        frame = df.reindex(columns=cols)
+        frame.to_csv(self._handle, index=False, header=self.header and not self._wrote_header)
+        self._wrote_header = True
+
+    def append_file(self, path):
+        """Copy the rows of a headerless part written with the same schema and format."""
+        if self.load_format == 'parquet':
+            if not os.path.exists(path) or os.path.getsize(path) == 0:
+                return
+            part = pq.ParquetFile(path)
+            for batch in part.iter_batches():
+                table = pa.Table.from_batches([batch], schema=part.schema_arrow)
+                if self._writer is None:
+                    self._writer = pq.ParquetWriter(self.path, table.schema, compression='snappy')
+                self._writer.write_table(table)
+            return
+        if self._handle is None:
+            self._handle = open(self.path, 'w', encoding='utf-8', newline='')
+        if self.header and not self._wrote_header:
+            self._handle.write(','.join(field.name for field in self.schema) + '\n')
+            self._wrote_header = True
+        self._handle.flush()
+        with open(path, 'r', encoding='utf-8', newline='') as src:
+            shutil.copyfileobj(src, self._handle)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+
+def _load_job_config(write_disposition, schema, load_format):
+    job_config = bigquery.LoadJobConfig(
+        write_disposition=write_disposition,
+        schema=schema,
+        autodetect=False,
+    )
+    if load_format == 'parquet':
+        job_config.source_format = bigquery.SourceFormat.PARQUET
+    else:
+        job_config.source_format = bigquery.SourceFormat.CSV
+        job_config.skip_leading_rows = 1
+    if schema is REPORT_USER_SERVICE_SCHEMA:
+        job_config.destination_table_description = f"report_user_service schema v{REPORT_SCHEMA_VERSION}"
+        job_config.time_partitioning = bigquery.TimePartitioning(
+            type_=bigquery.TimePartitioningType.DAY,
+            field=REPORT_PARTITION_FIELD,
+        )
+        job_config.clustering_fields = REPORT_CLUSTER_FIELDS
+    return job_config
+
+
+def load_file_to_bq(client, path, table_id, location, write_disposition, schema=None, load_format=None):
+    """Load a file written by `FrameFileWriter` into `table_id` with an explicit schema."""
+    schema = schema or REPORT_USER_SERVICE_SCHEMA
+    load_format = resolve_load_format(load_format)
+    job_config = _load_job_config(write_disposition, schema, load_format)
+    with open(path, 'rb') as handle:
+        load_job = client.load_table_from_file(
+            handle,
+            table_id,
+            job_config=job_config,
+            location=location,
+        )
+        return load_job.result()
+
+
+def load_df_to_bq(client, df, table_id, location, write_disposition, schema=None, load_format=None):
+    schema = schema or REPORT_USER_SERVICE_SCHEMA
+    load_format = resolve_load_format(load_format)
+    suffix = '.parquet' if load_format == 'parquet' else '.csv'
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
+        tmp_path = tmp.name
+    try:
+        writer = FrameFileWriter(tmp_path, schema=schema, load_format=load_format)
+        try:
+            writer.write(df)
+        finally:
+            writer.close()
+        return load_file_to_bq(client, tmp_path, table_id, location, write_disposition, schema, load_format)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def report_layout_ok(table):
+    """Whether an existing report table has the partitioned/clustered layout and all columns."""
+    partitioning = table.time_partitioning
+    return (
+        partitioning is not None
+        and partitioning.field == REPORT_PARTITION_FIELD
+        and list(table.clustering_fields or []) == REPORT_CLUSTER_FIELDS
+        and {f.name for f in REPORT_USER_SERVICE_SCHEMA} <= {f.name for f in table.schema}
+    )
+
+
+def repartition_report_table(client, table_id, location=None):
+    """Move an existing report table onto the partitioned/clustered layout.
+
+    BigQuery cannot change the partitioning of a table in place, so the rows are
+    rewritten into a new table next to it, which then replaces the live table
+    with a single copy job; readers see either the old or the new table. Missing
+    columns are filled in (`rs_username_norm` from `rs_username`). Fails without
+    touching the live table if it is written to while the copy is built.
+    """
+    table = client.get_table(table_id)
+    tmp_id = f"{table_id}_relayout_{uuid.uuid4().hex}"
+    existing = {f.name for f in table.schema}
+    select = []
+    for field in REPORT_USER_SERVICE_SCHEMA:
+        if field.name == 'rs_username_norm' and field.name not in existing:
+            select.append('LOWER(TRIM(rs_username)) AS rs_username_norm')
+        elif field.name in existing:
+            select.append(f'SAFE_CAST({field.name} AS {field.field_type}) AS {field.name}')
+        else:
+            select.append(f'CAST(NULL AS {field.field_type}) AS {field.name}')
+    select_csv = ',\n    '.join(select)
+    query = f"""
+CREATE TABLE `{tmp_id}`
+PARTITION BY {REPORT_PARTITION_FIELD}
+CLUSTER BY {', '.join(REPORT_CLUSTER_FIELDS)}
+OPTIONS (description = 'report_user_service schema v{REPORT_SCHEMA_VERSION}')
+AS
+SELECT
+    {select_csv}
+FROM `{table_id}`
+"""
+    try:
+        client.query(query, location=location).result()
+        if client.get_table(table_id).modified != table.modified:
+            raise RuntimeError(
+                f'{table_id} changed while it was being rewritten; run again when no sync is running.'
+            )
+        copy_config = bigquery.CopyJobConfig(write_disposition='WRITE_TRUNCATE')
+        client.copy_table(tmp_id, table_id, job_config=copy_config, location=location).result()
+    finally:
+        client.delete_table(tmp_id, not_found_ok=True)
+    return client.get_table(table_id)
+
+
+def ensure_report_table(client, table_id, schema=None, location=None):
+    """Create `table_id` if missing; report tables get the partitioned/clustered layout.
+
+    Existing tables are returned as they are, except that a report table
+    written by an older sync raises `LegacyReportTableError`: loads into it
+    would fail, and it is moved onto the current layout with the
+    `repartition_report_table` management command, never as a side effect of
+    a sync.
+    """
+    schema = schema or REPORT_USER_SERVICE_SCHEMA
+    try:
+        table = client.get_table(table_id)
+    except NotFound:
+        table = bigquery.Table(table_id, schema=schema)
+        if schema is REPORT_USER_SERVICE_SCHEMA:
+            table.description = f'report_user_service schema v{REPORT_SCHEMA_VERSION}'
+            table.time_partitioning = bigquery.TimePartitioning(
+                type_=bigquery.TimePartitioningType.DAY,
+                field=REPORT_PARTITION_FIELD,
+            )
+            table.clustering_fields = REPORT_CLUSTER_FIELDS
+        return client.create_table(table, exists_ok=True)
+    if schema is REPORT_USER_SERVICE_SCHEMA and not report_layout_ok(table):
+        raise LegacyReportTableError(
+            f'{table_id} predates the partitioned layout; run `manage.py repartition_report_table` first.'
+        )
+    return table
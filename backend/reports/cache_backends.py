@@ -0,0 +1,61 @@
+import os
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.filebased import FileBasedCache
+
+_MISSING = object()
+
+
+class BoundedFileCache(FileBasedCache):
+    """File cache evicting least recently used entries to stay under a byte budget.
+
+    Django's FileBasedCache culls a random share of entries once MAX_ENTRIES
+    is reached and never looks at sizes. Here every hit bumps the entry file's
+    mtime, and after each write the oldest files go until the cache holds at
+    most MAX_ENTRIES entries and MAX_BYTES bytes on disk (OPTIONS; 0 turns the
+    byte budget off). The file mtimes are the shared access order, so the
+    budget holds across every process using the directory.
+    """
+
+    def __init__(self, dir, params):
+        super().__init__(dir, params)
+        options = params.get('OPTIONS') or {}
+        self._max_bytes = int(options.get('MAX_BYTES', 0) or 0)
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        if value is _MISSING:
+            return default
+        try:
+            os.utime(self._key_to_file(key, version))
+        except OSError:
+            pass  # Evicted by another process meanwhile.
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        super().set(key, value, timeout, version)
+        self._evict()
+
+    def _cull(self):
+        # FileBasedCache culls at random before each write; `set` evicts by age instead.
+        return None
+
+    def _evict(self):
+        entries = []
+        for fname in self._list_cache_files():
+            try:
+                stat = os.stat(fname)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, fname, stat.st_size))
+        total_bytes = sum(size for _mtime, _fname, size in entries)
+        entries.sort()
+        excess = len(entries) - self._max_entries
+        for _mtime, fname, size in entries:
+            over_bytes = self._max_bytes and total_bytes > self._max_bytes
+            if excess <= 0 and not over_bytes:
+                break
+            # Gone either way, whether this process or another removed it.
+            self._delete(fname)
+            total_bytes -= size
+            excess -= 1
@@ -0,0 +1,85 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from .summary import package_column, totals_frame, totals_frame_from_aggregates
+
+SECTIONS = (
+    ('Limited Packages Report', False),
+    ('Unlimited Packages Report', True),
+)
+
+
+def resolve_chunk_rows(chunk_rows=None):
+    if chunk_rows is None:
+        try:
+            chunk_rows = int(os.getenv('REPORT_CSV_CHUNK_ROWS', '5000'))
+        except ValueError:
+            chunk_rows = 5000
+    return max(1, chunk_rows)
+
+
+def _iter_section(df, positions, creator_col, chunk_rows):
+    pkg_col = package_column(df)
+    with_totals = len(positions) > 0 and creator_col and pkg_col
+    add_count = with_totals and 'Count' not in df.columns
+    columns = list(df.columns) + (['Count'] if add_count else [])
+
+    yield pd.DataFrame(columns=columns).to_csv(index=False)
+    for start in range(0, len(positions), chunk_rows):
+        chunk = df.iloc[positions[start:start + chunk_rows]]
+        if add_count:
+            chunk = chunk.assign(Count=None)
+        yield chunk.to_csv(index=False, header=False)
+    if with_totals:
+        # Only the two columns the totals need are copied for the section.
+        section = df[[creator_col, pkg_col]].iloc[positions]
+        yield totals_frame(section, creator_col, pkg_col, columns=columns).to_csv(index=False, header=False)
+
+
+def iter_report_csv(df, creator_col, unlimited_mask, chunk_rows=None):
+    """Yield the limited/unlimited report CSV in chunks of `chunk_rows` rows.
+
+    Produces the same layout as the buffered export: each section has a title
+    line, a header, its rows, then one total row per creator and a grand total.
+    Only one chunk of rows is materialized as text at a time.
+    """
+    chunk_rows = resolve_chunk_rows(chunk_rows)
+    mask = np.asarray(unlimited_mask, dtype=bool) if len(df) else np.zeros(0, dtype=bool)
+    for index, (title, unlimited) in enumerate(SECTIONS):
+        if index:
+            yield '\n'
+        yield f'{title}\n'
+        positions = np.flatnonzero(mask if unlimited else ~mask)
+        yield from _iter_section(df, positions, creator_col, chunk_rows)
+
+
+def iter_streamed_report_csv(columns, creator_col, sections):
+    """Yield the report CSV for `pipeline.export_report_sections` output.
+
+    Same layout as `iter_report_csv`, but rows arrive as already split,
+    ordered chunks and the per-creator and grand totals come from each
+    section's aggregate rows, so memory doesn't grow with the report.
+    """
+    columns = list(columns)
+    pkg_col = package_column(pd.DataFrame(columns=columns))
+    for index, ((title, _unlimited), (chunks, totals)) in enumerate(zip(SECTIONS, sections)):
+        if index:
+            yield '\n'
+        yield f'{title}\n'
+        row_count = int(pd.to_numeric(totals['Count'], errors='coerce').fillna(0).sum()) if len(totals) else 0
+        with_totals = row_count > 0 and creator_col and pkg_col
+        add_count = with_totals and 'Count' not in columns
+        section_columns = columns + (['Count'] if add_count else [])
+
+        yield pd.DataFrame(columns=section_columns).to_csv(index=False)
+        for chunk in chunks:
+            chunk = chunk.reindex(columns=columns)
+            if add_count:
+                chunk = chunk.assign(Count=None)
+            yield chunk.to_csv(index=False, header=False)
+        if with_totals:
+            yield totals_frame_from_aggregates(totals, creator_col, pkg_col, section_columns).to_csv(
+                index=False, header=False
+            )
@@ -1,8 +1,14 @@
+import logging
 import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+
 import pandas as pd
 import pymysql
 
-from pymysql.cursors import DictCursor
+from pymysql.cursors import DictCursor, SSDictCursor
 from maria_cache.models import (
     Center,
     CenterVispAccess,
@@ -18,6 +24,8 @@ from maria_cache.models import (
     Visp,
 )
 
+logger = logging.getLogger(__name__)
+
 
 def _parse_sources():
     sources_raw = os.getenv('MARIA_SOURCES', '').strip()
@@ -52,27 +60,185 @@ def _parse_sources():
     }]
 
 
+_SOURCE_ENV_KEYS = ('MARIA_SOURCES', 'MARIA_DB', 'MARIA_HOST', 'MARIA_PORT', 'MARIA_USER', 'MARIA_PASSWORD')
+_sources_cache = (None, None)
+
+
 def get_sources():
-    return _parse_sources()
+    # MARIA_SOURCES rarely changes; re-parse only when the relevant env does.
+    global _sources_cache
+    key = tuple(os.getenv(name) for name in _SOURCE_ENV_KEYS)
+    cached_key, sources = _sources_cache
+    if cached_key != key:
+        sources = _parse_sources()
+        _sources_cache = (key, sources)
+    return sources
+
+
+def _env_int(name, default):
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return int(default)
+
+
+def _close_quietly(conn):
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+def _connect(source):
+    return pymysql.connect(
+        host=source['host'],
+        port=source['port'],
+        user=source['user'],
+        password=source['password'],
+        db=source['db'],
+        charset='utf8mb4',
+        cursorclass=DictCursor,
+        connect_timeout=_env_int('MARIA_CONNECT_TIMEOUT', '10'),
+        # Unset (0) by default: long all-reseller and long-range scans must not be cut off.
+        read_timeout=_env_int('MARIA_READ_TIMEOUT', '0') or None,
+        write_timeout=_env_int('MARIA_WRITE_TIMEOUT', '0') or None,
+    )
 
 
-def get_conn(source_name=None):
-    sources = _parse_sources()
+class MariaPoolTimeout(RuntimeError):
+    pass
+
+
+class _ConnectionPool:
+    """Bounded pool of pymysql connections to one source.
+
+    At most `max_size` connections are checked out at once; callers wait up to
+    `checkout_timeout` seconds for one. Idle connections are reused newest
+    first, pinged on checkout and dropped once idle longer than
+    `idle_seconds` or older than `recycle_seconds`.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.max_size = max(1, _env_int('MARIA_POOL_SIZE', '5'))
+        self.max_idle = max(0, _env_int('MARIA_POOL_MAX_IDLE', str(self.max_size)))
+        self.idle_seconds = _env_int('MARIA_POOL_IDLE_SECONDS', '300')
+        self.recycle_seconds = _env_int('MARIA_POOL_RECYCLE_SECONDS', '1800')
+        self.checkout_timeout = _env_int('MARIA_POOL_CHECKOUT_TIMEOUT', '30')
+        self._idle = deque()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_size)
+
+    def _connect(self):
+        return _connect(self.source)
+
+    def acquire(self):
+        if not self._slots.acquire(timeout=self.checkout_timeout):
+            raise MariaPoolTimeout(
+                f"No MariaDB connection to {self.source.get('name')} available within {self.checkout_timeout}s"
+            )
+        try:
+            while True:
+                with self._lock:
+                    item = self._idle.pop() if self._idle else None
+                if item is None:
+                    return self._connect(), time.monotonic()
+                conn, created_at, released_at = item
+                now = time.monotonic()
+                if now - released_at > self.idle_seconds or now - created_at > self.recycle_seconds:
+                    _close_quietly(conn)
+                    continue
+                try:
+                    conn.ping(reconnect=False)
+                except Exception:
+                    _close_quietly(conn)
+                    continue
+                return conn, created_at
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, conn, created_at):
+        try:
+            if not conn.open:
+                return
+            try:
+                # End whatever transaction the caller left open so the next
+                # user starts from a fresh snapshot.
+                conn.rollback()
+            except Exception:
+                _close_quietly(conn)
+                return
+            with self._lock:
+                if len(self._idle) < self.max_idle:
+                    self._idle.append((conn, created_at, time.monotonic()))
+                    return
+            _close_quietly(conn)
+        finally:
+            self._slots.release()
+
+
+class PooledConnection:
+    """A checked-out pool connection; `close()` (or leaving `with`) returns it to the pool."""
+
+    def __init__(self, pool, conn, created_at):
+        self._pool = pool
+        self._conn = conn
+        self._created_at = created_at
+
+    def __getattr__(self, name):
+        if self._conn is None:
+            raise pymysql.err.InterfaceError('Connection returned to pool')
+        return getattr(self._conn, name)
+
+    def close(self):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool.release(conn, self._created_at)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _resolve_source(source_name=None):
+    sources = get_sources()
     source = sources[0]
     if source_name:
         match = next((s for s in sources if s.get('name') == source_name), None)
         if match:
             source = match
-    cfg = {
-        'host': source['host'],
-        'port': source['port'],
-        'user': source['user'],
-        'password': source['password'],
-        'db': source['db'],
-        'charset': 'utf8mb4',
-        'cursorclass': DictCursor,
-    }
-    return pymysql.connect(**cfg)
+    return source
+
+
+def _get_pool(source):
+    key = (source['name'], source['host'], source['port'], source['db'], source['user'])
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _ConnectionPool(source)
+            _pools[key] = pool
+        return pool
+
+
+def get_conn(source_name=None):
+    """Check out a connection to `source_name` (default: first source).
+
+    Returns a pooled connection unless MARIA_POOL_SIZE is 0; either way
+    `close()` or a `with` block releases it.
+    """
+    source = _resolve_source(source_name)
+    if _env_int('MARIA_POOL_SIZE', '5') <= 0:
+        return _connect(source)
+    pool = _get_pool(source)
+    conn, created_at = pool.acquire()
+    return PooledConnection(pool, conn, created_at)
 
 
 def run_query(query, params=None, tables_priority=None, source_name=None):
@@ -85,23 +251,128 @@ def run_query(query, params=None, tables_priority=None, source_name=None):
     """
     tables_priority = tables_priority or [None]
     last_error = None
-    for table in tables_priority:
-        q = query.format(table_path=table) if table else query
-        try:
-            with get_conn(source_name=source_name) as conn:
+    with get_conn(source_name=source_name) as conn:
+        for table in tables_priority:
+            q = query.format(table_path=table) if table else query
+            try:
                 with conn.cursor() as cur:
                     cur.execute(q, params or [])
                     rows = cur.fetchall()
                     if rows:
                         return pd.DataFrame(rows), table
-        except Exception as exc:
-            last_error = exc
-            continue
+            except Exception as exc:
+                last_error = exc
+                if not conn.open:
+                    # Lost the connection itself; the pool drops it on release.
+                    break
+                continue
     if last_error:
         raise last_error
     return pd.DataFrame(), None
 
 
+def iter_query_chunks(query, params=None, tables_priority=None, source_name=None, chunk_rows=5000):
+    """Stream a query's rows as DataFrames of up to `chunk_rows` rows.
+
+    Tries the `tables_priority` tables like `run_query`. Rows come through an
+    unbuffered cursor on a connection of its own, so only one chunk is held
+    in memory; the connection is closed rather than pooled once the stream
+    ends or is abandoned, which also drops any unread rows.
+    """
+    tables_priority = tables_priority or [None]
+    conn = _connect(_resolve_source(source_name))
+    try:
+        last_error = None
+        for table in tables_priority:
+            q = query.format(table_path=table) if table else query
+            try:
+                cur = conn.cursor(SSDictCursor)
+                cur.execute(q, params or [])
+                rows = cur.fetchmany(chunk_rows)
+            except Exception as exc:
+                last_error = exc
+                if not conn.open:
+                    break
+                continue
+            if not rows:
+                cur.close()
+                continue
+            while rows:
+                yield pd.DataFrame(rows)
+                rows = cur.fetchmany(chunk_rows)
+            return
+        if last_error:
+            raise last_error
+    finally:
+        _close_quietly(conn)
+
+
+def _run_source_plan(source_name, queries, tables_priority):
+    frames = []
+    used_tables = []
+    for query, params in queries:
+        df, table = run_query(query, params=params, tables_priority=tables_priority, source_name=source_name)
+        used_tables.append(table)
+        if not df.empty:
+            frames.append(df)
+    return frames, used_tables
+
+
+def run_query_all_sources(query=None, params=None, tables_priority=None, source_names=None,
+                          timeout=None, plan=None, source_column='Source'):
+    """Run report queries on every MariaDB source concurrently and merge the rows.
+
+    Either pass one `query`/`params` pair to run on each source (all configured
+    sources unless `source_names` is given), or a `plan` mapping source name to a
+    list of `(query, params)` pairs. Each source runs on its own thread; one that
+    fails or exceeds `timeout` seconds (REPORT_SOURCE_TIMEOUT, default 60) is
+    reported in `errors` instead of failing the whole call.
+
+    Returns `(DataFrame, used_tables, errors)`: rows tagged with `source_column`,
+    `{source_name: [table per query]}` and `{source_name: error message}`.
+    """
+    if plan is None:
+        names = source_names or [s['name'] for s in get_sources()]
+        plan = {name: [(query, params)] for name in names}
+    plan = {name: queries for name, queries in plan.items() if queries}
+    if timeout is None:
+        timeout = _env_int('REPORT_SOURCE_TIMEOUT', '60')
+
+    used_tables = {}
+    errors = {}
+    if not plan:
+        return pd.DataFrame(), used_tables, errors
+
+    executor = ThreadPoolExecutor(max_workers=len(plan), thread_name_prefix='report-source')
+    futures = {
+        name: executor.submit(_run_source_plan, name, queries, tables_priority)
+        for name, queries in plan.items()
+    }
+    wait(futures.values(), timeout=timeout or None)
+    # A timed-out source keeps its worker until its query returns (or
+    # MARIA_READ_TIMEOUT fires, when set); don't hold the request for it.
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    frames = []
+    for name, future in futures.items():
+        if not future.done():
+            errors[name] = f"Timed out after {timeout}s"
+            continue
+        try:
+            source_frames, tables = future.result()
+        except Exception as exc:
+            errors[name] = str(exc)
+            continue
+        used_tables[name] = tables
+        for df in source_frames:
+            df[source_column] = name
+            frames.append(df)
+
+    if not frames:
+        return pd.DataFrame(), used_tables, errors
+    return pd.concat(frames, ignore_index=True), used_tables, errors
+
+
 def _run_df(query, params=None, source_name=None):
     df, _ = run_query(query, params=params, source_name=source_name)
     return df
@@ -125,6 +396,63 @@ def _df_to_choices(df, id_col, name_col):
     return choices
 
 
+def resolve_creator_ids(creators, source_name=None):
+    """Resolve creator names to Hreseller ids on a source.
+
+    The maria_cache copy is tried first; names it doesn't know (resellers
+    created since its last sync) are looked up in `Hreseller` on the source
+    with a single query. Returns `(ids_by_creator, unresolved)`: requested
+    names mapped to their Reseller_Id values, and the names that matched no
+    reseller.
+    """
+    source = _resolve_source(source_name)
+    wanted = {}
+    for creator in creators:
+        norm = (creator or '').strip().lower()
+        if norm:
+            wanted.setdefault(norm, creator)
+    if not wanted:
+        return {}, []
+
+    rows = list(Reseller.objects.filter(
+        source_name=source['name'],
+        name_norm__in=list(wanted),
+    ).values_list('name_norm', 'source_id'))
+    missing = [norm for norm in wanted if norm not in {n for n, _ in rows}]
+    if missing:
+        rows.extend(_lookup_reseller_ids(missing, [wanted[n] for n in missing], source['name']))
+
+    ids_by_creator = {}
+    for norm, reseller_id in rows:
+        ids = ids_by_creator.setdefault(wanted[norm], [])
+        if reseller_id not in ids:
+            ids.append(reseller_id)
+    unresolved = [name for name in wanted.values() if name not in ids_by_creator]
+    return ids_by_creator, unresolved
+
+
+def _lookup_reseller_ids(norms, names, source_name):
+    """`(name_norm, Reseller_Id)` pairs from `Hreseller` for names missing from maria_cache."""
+    # Both spellings go in, so the lookup stays on the ResellerName index
+    # whether or not the column's collation ignores case.
+    values = list(dict.fromkeys([name.strip() for name in names] + list(norms)))
+    query = f"SELECT Reseller_Id, ResellerName FROM Hreseller WHERE ResellerName IN ({_in_clause(values)})"
+    try:
+        df = _run_df(query, values, source_name=source_name)
+    except Exception as exc:
+        logger.warning('Reseller lookup on %s failed: %s', source_name, exc)
+        return []
+    if df.empty:
+        return []
+    wanted = set(norms)
+    pairs = []
+    for reseller_id, name in zip(df['Reseller_Id'], df['ResellerName']):
+        norm = (name or '').strip().lower()
+        if norm in wanted:
+            pairs.append((norm, int(reseller_id)))
+    return pairs
+
+
 def fetch_reseller_by_username(reseller_username, source_name=None):
     if not reseller_username:
         return None
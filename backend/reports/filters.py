@@ -0,0 +1,337 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from google.cloud import bigquery
+
+COMPARE_OPS = {'=', '>', '<', '>=', '<='}
+
+
+def _normalize_range(op, value, range_min, range_max, enabled):
+    """Mirror the report form rules: default to '=', fall back between '=' and BETWEEN."""
+    if not enabled or op == 'NONE':
+        return None
+    if op in (None, '', 'EXACT'):
+        op = '='
+    if op == '=' and value is None and range_min is not None and range_max is not None:
+        op = 'BETWEEN'
+    elif op == 'BETWEEN' and (range_min is None or range_max is None) and value is not None:
+        op = '='
+    if op == 'BETWEEN' and range_min is not None and range_max is not None:
+        return ('BETWEEN', range_min, range_max)
+    if op in COMPARE_OPS and value is not None:
+        return (op, value, None)
+    return None
+
+
+def resolve_report_filters(filters):
+    """Turn FilterForm-style values into the normalized filters used by every report path.
+
+    Returns a dict with `serial`, `sib_serial` and `date` as `(op, a, b)` tuples
+    (or None when inactive) and `service_status` as a string or None. Serial and
+    SIB-serial both apply to User_ServiceBase_Id / UserServiceID.
+    """
+    filters = filters or {}
+    serial_value = filters.get('serial_value')
+    serial_min = filters.get('serial_min')
+    serial_max = filters.get('serial_max')
+    serial = _normalize_range(
+        filters.get('serial_op'),
+        serial_value,
+        serial_min,
+        serial_max,
+        bool(filters.get('filter_serial')) or any(v is not None for v in [serial_value, serial_min, serial_max]),
+    )
+
+    sib_value = filters.get('sib_serial_value')
+    sib_min = filters.get('sib_serial_min')
+    sib_max = filters.get('sib_serial_max')
+    sib_serial = _normalize_range(
+        filters.get('sib_serial_op'),
+        sib_value,
+        sib_min,
+        sib_max,
+        any(v is not None for v in [sib_value, sib_min, sib_max]),
+    )
+
+    date_value = filters.get('date_value') or None
+    date_start = filters.get('date_start') or None
+    date_end = filters.get('date_end') or None
+    date = _normalize_range(
+        filters.get('date_op'),
+        date_value,
+        date_start,
+        date_end,
+        bool(filters.get('filter_date')) or any(v is not None for v in [date_value, date_start, date_end]),
+    )
+
+    service_status = filters.get('service_status')
+    if not service_status or service_status == 'NONE':
+        service_status = None
+
+    return {
+        'serial': serial,
+        'sib_serial': sib_serial,
+        'date': date,
+        'service_status': service_status,
+    }
+
+
+def date_bounds(date_filter):
+    """Half-open `[lower, upper)` day bounds for a date filter, so columns stay sargable."""
+    if not date_filter:
+        return None, None
+    op, a, b = date_filter
+    one_day = datetime.timedelta(days=1)
+    if op == '=':
+        return a, a + one_day
+    if op == 'BETWEEN':
+        return a, b + one_day
+    if op == '>':
+        return a + one_day, None
+    if op == '>=':
+        return a, None
+    if op == '<':
+        return None, a
+    if op == '<=':
+        return None, a + one_day
+    return None, None
+
+
+def date_span_days(date_filter, today=None):
+    """Number of days a date filter covers, or None when it has no lower bound."""
+    lower, upper = date_bounds(date_filter)
+    if lower is None:
+        return None
+    if upper is None:
+        upper = (today or datetime.date.today()) + datetime.timedelta(days=1)
+    return max(0, (upper - lower).days)
+
+
+def dump_report_filters(filters):
+    """JSON-safe copy of resolved report filters (dates as ISO strings)."""
+    dumped = dict(filters)
+    if filters.get('date'):
+        op, a, b = filters['date']
+        dumped['date'] = [op, a.isoformat() if a else None, b.isoformat() if b else None]
+    for key in ('serial', 'sib_serial'):
+        if filters.get(key):
+            dumped[key] = list(filters[key])
+    return dumped
+
+
+def load_report_filters(dumped):
+    """Inverse of `dump_report_filters`."""
+    filters = {'serial': None, 'sib_serial': None, 'date': None, 'service_status': None, **(dumped or {})}
+    for key in ('serial', 'sib_serial'):
+        if filters[key]:
+            filters[key] = tuple(filters[key])
+    if filters['date']:
+        op, a, b = filters['date']
+        filters['date'] = (
+            op,
+            datetime.date.fromisoformat(a) if a else None,
+            datetime.date.fromisoformat(b) if b else None,
+        )
+    return filters
+
+
+def _range_clause(column, range_filter, placeholder):
+    op, a, b = range_filter
+    if op == 'BETWEEN':
+        return f"{column} BETWEEN {placeholder(a)} AND {placeholder(b)}"
+    return f"{column} {op} {placeholder(a)}"
+
+
+def is_pending(filters):
+    return str((filters or {}).get('service_status') or '').strip().lower() == 'pending'
+
+
+def id_filter_keys(filters):
+    """Id-range filters that can run before the other filters (and in SQL).
+
+    The SIB-serial filter applies to what's left after the Pending "latest row
+    per Username" dedup, so with Pending it runs in memory after the dedup.
+    """
+    keys = ['serial', 'sib_serial'] if not is_pending(filters) else ['serial']
+    return [key for key in keys if (filters or {}).get(key)]
+
+
+def maria_filter_clauses(filters, id_col='TName.User_ServiceBase_Id', date_col='TName.CDT',
+                         status_col='TName.ServiceStatus'):
+    """WHERE clauses and `%s` params for resolved report filters on MariaDB."""
+    clauses = []
+    params = []
+
+    def _param(value):
+        params.append(value)
+        return '%s'
+
+    for key in id_filter_keys(filters):
+        clauses.append(_range_clause(id_col, filters[key], _param))
+
+    lower, upper = date_bounds(filters.get('date'))
+    if lower is not None:
+        clauses.append(f"{date_col} >= {_param(lower)}")
+    if upper is not None:
+        clauses.append(f"{date_col} < {_param(upper)}")
+
+    if filters.get('service_status'):
+        clauses.append(f"{status_col} = {_param(filters['service_status'])}")
+    return clauses, params
+
+
+def bq_filter_clauses(filters, id_col='UserServiceID', date_col='CreateDate', status_col='ServiceStatus'):
+    """WHERE clauses and query parameters for resolved report filters on BigQuery."""
+    clauses = []
+    params = []
+
+    def _param(value, name, field_type):
+        params.append(bigquery.ScalarQueryParameter(name, field_type, value))
+        return f'@{name}'
+
+    for key in id_filter_keys(filters):
+        op, a, b = filters[key]
+        if op == 'BETWEEN':
+            clauses.append(
+                f"{id_col} BETWEEN {_param(int(a), f'{key}_min', 'INT64')} "
+                f"AND {_param(int(b), f'{key}_max', 'INT64')}"
+            )
+        else:
+            clauses.append(f"{id_col} {op} {_param(int(a), f'{key}_value', 'INT64')}")
+
+    lower, upper = date_bounds(filters.get('date'))
+    if lower is not None:
+        clauses.append(f"{date_col} >= {_param(lower, 'date_lower', 'DATE')}")
+    if upper is not None:
+        clauses.append(f"{date_col} < {_param(upper, 'date_upper', 'DATE')}")
+
+    if filters.get('service_status'):
+        status_norm = str(filters['service_status']).strip().lower()
+        clauses.append(f"LOWER(TRIM({status_col})) = {_param(status_norm, 'service_status', 'STRING')}")
+    return clauses, params
+
+
+_PASSWORD_COLUMNS = ('password', 'Password', 'passwd', 'Passwd')
+
+
+def _first_column(df, names):
+    return next((name for name in names if name in df.columns), None)
+
+
+def _compare(values, op, a, b):
+    if op == 'BETWEEN':
+        return (values >= a) & (values <= b)
+    if op == '=':
+        return values == a
+    if op == '>':
+        return values > a
+    if op == '<':
+        return values < a
+    if op == '>=':
+        return values >= a
+    return values <= a
+
+
+class CompiledReportFilter:
+    """Resolved report filters compiled into a single-pass mask over a report frame.
+
+    Each column a predicate needs is parsed to a typed numpy array once, all
+    predicates are combined into one boolean mask, and the Pending status
+    "latest row per Username" dedup is a groupby-argmax over the surviving rows;
+    with Pending the SIB-serial filter runs after the dedup (see `id_filter_keys`).
+    Works for both MariaDB (RowID/CreateDT) and BigQuery (UserServiceID/CreateDate)
+    frames.
+    """
+
+    def __init__(self, filters):
+        self.filters = filters or {}
+        status = self.filters.get('service_status')
+        self.status_norm = str(status).strip().lower() if status else None
+
+    @property
+    def active(self):
+        return any(self.filters.get(key) for key in ('serial', 'sib_serial', 'date', 'service_status'))
+
+    def _timestamps(self, df, cache):
+        if 'ts' not in cache:
+            date_col = _first_column(df, ('CreateDT', 'CreateDate'))
+            cache['ts'] = (
+                pd.to_datetime(df[date_col], errors='coerce').to_numpy(dtype='datetime64[ns]')
+                if date_col else None
+            )
+        return cache['ts']
+
+    def _id_mask(self, df, keys):
+        mask = np.ones(len(df), dtype=bool)
+        id_col = _first_column(df, ('UserServiceID', 'RowID'))
+        if id_col and keys:
+            ids = pd.to_numeric(df[id_col], errors='coerce').to_numpy(dtype='float64')
+            for key in keys:
+                op, a, b = self.filters[key]
+                mask &= _compare(ids, op, a, b)
+        return mask
+
+    def mask(self, df, _cache=None):
+        cache = {} if _cache is None else _cache
+        mask = np.ones(len(df), dtype=bool)
+
+        mask &= self._id_mask(df, id_filter_keys(self.filters))
+
+        if self.filters.get('date'):
+            ts = self._timestamps(df, cache)
+            if ts is not None:
+                lower, upper = date_bounds(self.filters['date'])
+                if lower is not None:
+                    mask &= ts >= np.datetime64(lower, 'ns')
+                if upper is not None:
+                    mask &= ts < np.datetime64(upper, 'ns')
+
+        if self.status_norm and 'ServiceStatus' in df.columns:
+            statuses = df['ServiceStatus'].astype(str).str.strip().str.lower().to_numpy()
+            mask &= statuses == self.status_norm
+        return mask
+
+    def _latest_per_username(self, df, mask, cache):
+        ts = self._timestamps(df, cache)
+        positions = np.flatnonzero(mask)
+        if ts is None or not len(positions):
+            return mask
+        # NaT sorts last in the old sort-based dedup, so treat it as the oldest value.
+        stamps = ts[positions].view('int64')
+        usernames = df['Username'].to_numpy()[positions]
+        codes, _ = pd.factorize(usernames, use_na_sentinel=False)
+        latest = pd.Series(stamps).groupby(codes, sort=False).idxmax().to_numpy()
+        deduped = np.zeros(len(df), dtype=bool)
+        deduped[positions[latest]] = True
+        return deduped
+
+    def apply(self, df):
+        """Return the rows of `df` matching the filters (and the Pending dedup)."""
+        if df.empty or not self.active:
+            return df
+        cache = {}
+        mask = self.mask(df, cache)
+        pending = self.status_norm == 'pending' and 'ServiceStatus' in df.columns and 'Username' in df.columns
+        if pending:
+            mask = self._latest_per_username(df, mask, cache)
+        if is_pending(self.filters) and self.filters.get('sib_serial'):
+            mask &= self._id_mask(df, ['sib_serial'])
+        if not mask.all():
+            df = df[mask]
+        if pending:
+            df = df.drop(columns=[c for c in _PASSWORD_COLUMNS if c in df.columns])
+        return df
+
+    __call__ = apply
+
+
+def compile_report_filters(filters):
+    """Compile resolved filters (see `resolve_report_filters`) for repeated use on frames."""
+    return CompiledReportFilter(filters)
+
+
+def apply_report_filters(df, filters):
+    """Filter a report frame in memory by resolved report filters."""
+    return CompiledReportFilter(filters).apply(df)
@@ -0,0 +1,274 @@
+import datetime
+import logging
+import os
+import tempfile
+import threading
+
+import pandas as pd
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from .csv_export import iter_report_csv, iter_streamed_report_csv
+from .filters import date_span_days, dump_report_filters, load_report_filters
+from .models import ReportJob
+from .preflight import INLINE
+from .pipeline import (
+    creator_column,
+    detail_summaries,
+    export_report_sections,
+    fetch_report,
+    pages_in_sql,
+    prepare_detail_frame,
+    report_source,
+    report_tables_priority,
+    unlimited_mask,
+)
+from .summary import append_totals, summaries_from_aggregates
+
+logger = logging.getLogger(__name__)
+
+JOB_ACTIONS = {'download_report', 'download_csv', 'download_summary_pdf', 'download_unlimited_pdf'}
+SUMMARY_ACTIONS = {'download_summary_pdf', 'download_unlimited_pdf'}
+
+
+def _env_int(name, default):
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return int(default)
+
+
+def jobs_enabled():
+    return os.getenv('REPORT_JOBS', '1').strip().lower() in {'1', 'true', 'yes', 'on'}
+
+
+def should_run_in_background(action, creators, report_filters, decision=None):
+    """Whether a download goes to the job worker.
+
+    With a preflight `decision` (see `reports.preflight`) downloads over the
+    inline budget do; without one, downloads for all resellers or over
+    long/open date ranges do.
+    """
+    if action not in JOB_ACTIONS or not jobs_enabled():
+        return False
+    if decision is not None:
+        return decision != INLINE
+    if creators == [None]:
+        return True
+    span = date_span_days(report_filters.get('date'))
+    return span is None or span > _env_int('REPORT_JOB_INLINE_DAYS', '92')
+
+
+def enqueue_report_job(user, action, creators, report_filters, user_scope, filename):
+    return ReportJob.objects.create(
+        user=user if user.is_authenticated else None,
+        action=action,
+        creators=list(creators),
+        filters=dump_report_filters(report_filters),
+        user_scope=user_scope,
+        filename=filename,
+    )
+
+
+def heartbeat_interval():
+    """Seconds between heartbeats of a running job (REPORT_JOB_HEARTBEAT_SECONDS, default 30)."""
+    return max(1, _env_int('REPORT_JOB_HEARTBEAT_SECONDS', '30'))
+
+
+def claim_next_job():
+    """Mark the oldest queued job as running and return it; None when the queue is empty.
+
+    The conditional update makes the claim safe with several workers.
+    """
+    queued = ReportJob.objects.filter(status=ReportJob.STATUS_QUEUED).order_by('created_at', 'id')
+    for job_id in queued.values_list('id', flat=True)[:10]:
+        now = timezone.now()
+        claimed = ReportJob.objects.filter(id=job_id, status=ReportJob.STATUS_QUEUED).update(
+            status=ReportJob.STATUS_RUNNING,
+            started_at=now,
+            heartbeat_at=now,
+            progress=0,
+        )
+        if claimed:
+            return ReportJob.objects.get(id=job_id)
+    return None
+
+
+def requeue_stale_jobs(max_age_seconds):
+    """Put back running jobs without a heartbeat for `max_age_seconds`, returning how many were requeued.
+
+    Workers beat every `heartbeat_interval()` seconds however long a job
+    runs, so only jobs whose worker died go back to the queue.
+    """
+    cutoff = timezone.now() - datetime.timedelta(seconds=max_age_seconds)
+    stale = Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff)
+    return ReportJob.objects.filter(stale, status=ReportJob.STATUS_RUNNING).update(
+        status=ReportJob.STATUS_QUEUED,
+        progress=0,
+        message='Requeued after the worker stopped responding.',
+    )
+
+
+def purge_report_jobs(max_age_days):
+    """Delete finished jobs older than `max_age_days` along with their files; returns how many."""
+    cutoff = timezone.now() - datetime.timedelta(days=max_age_days)
+    finished = ReportJob.objects.filter(
+        status__in=[ReportJob.STATUS_DONE, ReportJob.STATUS_FAILED],
+        finished_at__lt=cutoff,
+    )
+    purged = 0
+    for job in finished.iterator():
+        if job.file:
+            try:
+                job.file.delete(save=False)
+            except OSError as exc:
+                logger.warning('Could not delete file of report job %s: %s', job.id, exc)
+                continue
+        job.delete()
+        purged += 1
+    return purged
+
+
+def _beat(job_id, stop, interval):
+    try:
+        while not stop.wait(interval):
+            ReportJob.objects.filter(id=job_id, status=ReportJob.STATUS_RUNNING).update(heartbeat_at=timezone.now())
+    except Exception:
+        logger.exception('Heartbeat of report job %s failed', job_id)
+    finally:
+        connection.close()
+
+
+def _set_progress(job, progress, message):
+    job.progress = progress
+    job.message = message
+    job.save(update_fields=['progress', 'message'])
+
+
+def _write_csv(job, chunks):
+    with tempfile.NamedTemporaryFile('w+b', suffix='.csv') as handle:
+        for chunk in chunks:
+            handle.write(chunk.encode('utf-8'))
+        handle.flush()
+        handle.seek(0)
+        job.file.save(job.filename or f'report-{job.id}.csv', File(handle), save=False)
+
+
+def _stream_csv(job, report_filters, use_bq):
+    """Write a CSV job straight from the source (see `export_report_sections`).
+
+    Returns False, having written nothing, when the aggregate query fails or
+    finds no rows; the buffered path then reports it.
+    """
+    columns, creator_col, sections, export_error = export_report_sections(
+        job.creators, report_filters, use_bq=use_bq, tables_priority=report_tables_priority()
+    )
+    if export_error or not any(len(totals) for _chunks, totals in sections):
+        return False
+    job.row_count = int(sum(
+        pd.to_numeric(totals['Count'], errors='coerce').fillna(0).sum() for _chunks, totals in sections
+    ))
+    _set_progress(job, 30, 'Writing file')
+    _write_csv(job, iter_streamed_report_csv(columns, creator_col, sections))
+    return True
+
+
+def _build_pdf(job, final_df, summaries):
+    # The PDF layouts live with the report views.
+    from .views import _summary_rows_to_df, export_detail_tables_to_pdf, export_summary_tables_to_pdf
+
+    if job.action in SUMMARY_ACTIONS:
+        (rows, grand_total, grand_count), (u_rows, u_grand_total, u_grand_count) = summaries
+        return export_summary_tables_to_pdf(
+            _summary_rows_to_df(rows, grand_total, grand_count),
+            _summary_rows_to_df(u_rows, u_grand_total, u_grand_count),
+        )
+    creator_col = creator_column(final_df)
+    unlimited_rows = unlimited_mask(final_df)
+    return export_detail_tables_to_pdf(
+        append_totals(final_df[~unlimited_rows], creator_col),
+        append_totals(final_df[unlimited_rows], creator_col),
+    )
+
+
+def run_report_job(job):
+    """Build the job's CSV/PDF with the report pipeline and attach it to the job."""
+    report_filters = load_report_filters(job.filters)
+    use_bq, source_warning = report_source()
+    server_summary = (
+        job.action in SUMMARY_ACTIONS
+        and str(report_filters['service_status'] or '').strip().lower() != 'pending'
+    )
+
+    if job.action == 'download_csv' and pages_in_sql(report_filters):
+        _set_progress(job, 10, 'Streaming report rows')
+        if _stream_csv(job, report_filters, use_bq):
+            _finish_job(job, [source_warning])
+            return
+
+    _set_progress(job, 10, 'Fetching report rows')
+    df, _meta, fetch_error = fetch_report(
+        job.creators,
+        report_filters,
+        use_bq=use_bq,
+        tables_priority=report_tables_priority(),
+        summary=server_summary,
+    )
+    if fetch_error and df.empty:
+        raise RuntimeError(fetch_error)
+
+    _set_progress(job, 50, 'Preparing rows')
+    if server_summary:
+        final_df = df
+        summaries = summaries_from_aggregates(df)
+    else:
+        final_df = prepare_detail_frame(df, report_filters, use_bq=use_bq) if not df.empty else df
+        summaries = detail_summaries(final_df) if job.action in SUMMARY_ACTIONS else None
+    job.row_count = int(len(final_df))
+
+    _set_progress(job, 70, 'Writing file')
+    if job.action == 'download_csv':
+        _write_csv(job, iter_report_csv(final_df, creator_column(final_df), unlimited_mask(final_df)))
+    else:
+        pdf_data = _build_pdf(job, final_df, summaries)
+        if not pdf_data:
+            raise RuntimeError('Failed to generate PDF.')
+        job.file.save(job.filename or f'report-{job.id}.pdf', ContentFile(pdf_data), save=False)
+
+    _finish_job(job, [fetch_error, source_warning])
+
+
+def _finish_job(job, messages):
+    job.status = ReportJob.STATUS_DONE
+    job.progress = 100
+    job.message = '; '.join(m for m in messages if m)
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'progress', 'message', 'row_count', 'file', 'finished_at'])
+
+
+def process_job(job):
+    """Run a claimed job, recording a failure instead of raising.
+
+    A heartbeat thread keeps `heartbeat_at` fresh while it runs, so
+    `requeue_stale_jobs` leaves it alone.
+    """
+    stop = threading.Event()
+    heartbeat = threading.Thread(
+        target=_beat, args=(job.id, stop, heartbeat_interval()), name=f'report-job-{job.id}-heartbeat', daemon=True
+    )
+    heartbeat.start()
+    try:
+        run_report_job(job)
+    except Exception as exc:
+        logger.exception('Report job %s failed', job.id)
+        job.status = ReportJob.STATUS_FAILED
+        job.message = str(exc)
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'message', 'finished_at'])
+    finally:
+        stop.set()
+        heartbeat.join()
+    return job
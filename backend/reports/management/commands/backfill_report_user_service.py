@@ -1,6 +1,5 @@
 import os
 import uuid
-import tempfile
 import logging
 from datetime import date
 
@@ -8,10 +7,36 @@ import pandas as pd
 from django.core.management.base import BaseCommand
 from google.cloud import bigquery
 
-from reports.sync import _parse_sources, _fetch_maria_rows, _fetch_reseller_map, log_sync_event
+from reports.bq import (
+    REPORT_CLUSTER_FIELDS,
+    REPORT_PARTITION_FIELD,
+    REPORT_SCHEMA_VERSION,
+    ensure_report_table,
+    load_df_to_bq,
+    load_file_to_bq,
+    resolve_load_format,
+)
+from reports.report_cache import report_cache
+from reports.sync import (
+    _ReportSpool,
+    _fetch_maria_rows,
+    _fetch_reseller_map,
+    _parse_sources,
+    _refresh_rollup,
+    _resolve_chunk_size,
+    _spool_source,
+    _stream_enabled,
+    log_sync_event,
+)
 
 logger = logging.getLogger(__name__)
 
+RESELLER_MAP_SCHEMA = [
+    bigquery.SchemaField('creator_norm', 'STRING'),
+    bigquery.SchemaField('rs_userid', 'INTEGER'),
+    bigquery.SchemaField('rs_name', 'STRING'),
+]
+
 
 def _get_bq_config():
     project = os.getenv('BQ_PROJECT')
@@ -23,30 +48,6 @@ def _get_bq_config():
     return project, dataset, table, location
 
 
-def _load_df_to_bq(df, table_id, client, location, write_disposition):
-    job_config = bigquery.LoadJobConfig(
-        write_disposition=write_disposition,
-        autodetect=True,
-        source_format=bigquery.SourceFormat.CSV,
-    )
-    tmp_path = None
-    try:
-        with tempfile.NamedTemporaryFile(mode='w+', suffix='.csv', delete=False, encoding='utf-8') as tmp:
-            df.to_csv(tmp.name, index=False)
-            tmp_path = tmp.name
-        with open(tmp_path, 'rb') as handle:
-            load_job = client.load_table_from_file(
-                handle,
-                table_id,
-                job_config=job_config,
-                location=location,
-            )
-            load_job.result()
-    finally:
-        if tmp_path and os.path.exists(tmp_path):
-            os.remove(tmp_path)
-
-
 class Command(BaseCommand):
     help = 'Backfill report_user_service from hspdata (< cutoff) plus MariaDB (>= cutoff).'
 
@@ -57,6 +58,12 @@ class Command(BaseCommand):
                             help='Full BigQuery table ID for hspdata (project.dataset.table).')
         parser.add_argument('--target-table', type=str, default='',
                             help='Full BigQuery target table ID (project.dataset.table).')
+        parser.add_argument('--stream', action='store_true',
+                            help='Stream MariaDB rows in chunks through a server-side cursor (default: SYNC_STREAM env).')
+        parser.add_argument('--chunk-size', type=int, default=0,
+                            help='Rows per streamed chunk (0 = SYNC_CHUNK_SIZE env or 50000).')
+        parser.add_argument('--load-format', type=str, default='', choices=['', 'parquet', 'csv'],
+                            help='File format for BigQuery loads (default: BQ_LOAD_FORMAT env or parquet).')
 
     def handle(self, *args, **options):
         project, dataset, default_table, location = _get_bq_config()
@@ -71,6 +78,10 @@ class Command(BaseCommand):
         if not hsp_table:
             hsp_table = f"{project}.{dataset}.hspdata"
 
+        stream = _stream_enabled(True if options['stream'] else None)
+        chunk_size = _resolve_chunk_size(options['chunk_size'] or None)
+        load_format = resolve_load_format(options['load_format'] or None)
+
         sources = _parse_sources()
         if not sources:
             raise RuntimeError('No MariaDB sources configured.')
@@ -84,19 +95,29 @@ class Command(BaseCommand):
         maria_stage = f"{project}.{dataset}.report_user_service_maria_stage_{stage_suffix}"
         map_stage = f"{project}.{dataset}.report_user_service_reseller_map_{stage_suffix}"
 
+        spool = _ReportSpool(load_format=load_format) if stream else None
         try:
             maria_loaded = False
             all_map = []
             for source in sources:
-                df = _fetch_maria_rows(source, start_date=cutoff_date)
-                if not df.empty:
-                    write_disp = 'WRITE_TRUNCATE' if not maria_loaded else 'WRITE_APPEND'
-                    _load_df_to_bq(df, maria_stage, client, location, write_disp)
-                    maria_loaded = True
+                if spool is not None:
+                    _spool_source(spool, source, chunk_size=chunk_size, start_date=cutoff_date)
+                else:
+                    df = _fetch_maria_rows(source, start_date=cutoff_date)
+                    if not df.empty:
+                        write_disp = 'WRITE_TRUNCATE' if not maria_loaded else 'WRITE_APPEND'
+                        load_df_to_bq(client, df, maria_stage, location, write_disp, load_format=load_format)
+                        maria_loaded = True
                 map_df = _fetch_reseller_map(source)
                 if not map_df.empty:
                     all_map.append(map_df)
 
+            if spool is not None and spool.rows:
+                load_file_to_bq(
+                    client, spool.finish(), maria_stage, location, 'WRITE_TRUNCATE', load_format=load_format,
+                )
+                maria_loaded = True
+
             if not maria_loaded:
                 raise RuntimeError('No MariaDB rows returned for cutoff date.')
 
@@ -105,20 +126,27 @@ class Command(BaseCommand):
                 map_df = map_df[map_df['creator_norm'].notna()]
                 map_df = map_df[map_df['creator_norm'].astype(str).str.strip() != '']
                 map_df = map_df.drop_duplicates(subset=['creator_norm'], keep='first')
-                _load_df_to_bq(map_df, map_stage, client, location, 'WRITE_TRUNCATE')
+                load_df_to_bq(
+                    client, map_df, map_stage, location, 'WRITE_TRUNCATE',
+                    schema=RESELLER_MAP_SCHEMA, load_format=load_format,
+                )
             else:
-                schema = [
-                    bigquery.SchemaField('creator_norm', 'STRING'),
-                    bigquery.SchemaField('rs_userid', 'INTEGER'),
-                    bigquery.SchemaField('rs_name', 'STRING'),
-                ]
-                table = bigquery.Table(map_stage, schema=schema)
+                table = bigquery.Table(map_stage, schema=RESELLER_MAP_SCHEMA)
                 client.create_table(table)
 
+            # CREATE OR REPLACE cannot change partitioning, so an older
+            # unpartitioned target has to be moved onto the current layout
+            # first; ensure_report_table raises for one.
+            ensure_report_table(client, target_table, location=location)
             query = f"""
-CREATE OR REPLACE TABLE `{target_table}` AS
+CREATE OR REPLACE TABLE `{target_table}`
+PARTITION BY {REPORT_PARTITION_FIELD}
+CLUSTER BY {', '.join(REPORT_CLUSTER_FIELDS)}
+OPTIONS (description = 'report_user_service schema v{REPORT_SCHEMA_VERSION}')
+AS
 WITH maria AS (
   SELECT
+    SAFE_CAST(id AS INT64) AS id,
     SAFE_CAST(CreateDate AS DATE) AS CreateDate,
     SAFE_CAST(rs_userid AS INT64) AS rs_userid,
     rs_username,
@@ -136,6 +164,7 @@ WITH maria AS (
 ),
 base_hsp AS (
   SELECT
+    -SAFE_CAST(h.UserServiceId AS INT64) AS id,
     SAFE_CAST(h.CreatDate AS DATE) AS CreateDate,
     m.rs_userid AS rs_userid,
     h.Creator AS rs_username,
@@ -157,7 +186,7 @@ base_hsp AS (
     AND ms.UserServiceID IS NULL
 )
 SELECT
-  ROW_NUMBER() OVER (ORDER BY rs_username, UserServiceID, CreateDate DESC) AS id,
+  id,
   CreateDate,
   rs_userid,
   rs_username,
@@ -169,7 +198,8 @@ SELECT
   Package,
   ServiceStatus,
   StartDate,
-  EndDate
+  EndDate,
+  LOWER(TRIM(rs_username)) AS rs_username_norm
 FROM (
   SELECT * FROM maria
   UNION ALL
@@ -183,8 +213,12 @@ FROM (
             )
             query_job = client.query(query, job_config=job_config, location=location)
             query_job.result()
+            _refresh_rollup(client, target_table, location)
+            report_cache.invalidate('bigquery')
             log_sync_event('backfill_success', 'Backfill completed', target_table=target_table)
             self.stdout.write(self.style.SUCCESS('Backfill completed.'))
         finally:
+            if spool is not None:
+                spool.cleanup()
             client.delete_table(maria_stage, not_found_ok=True)
             client.delete_table(map_stage, not_found_ok=True)
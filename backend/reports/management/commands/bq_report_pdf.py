@@ -1,7 +1,8 @@
 import datetime
 from django.core.management.base import BaseCommand, CommandError
-from reports.bq import get_bq_client, get_bq_table_id
-from reports.views import export_df_to_pdf
+from reports.bq import get_bq_client, get_bq_table_id, report_creator_sql, run_bq_summary_query
+from reports.summary import summaries_from_aggregates
+from reports.views import _summary_rows_to_df, export_df_to_pdf, export_summary_tables_to_pdf
 import pandas as pd
 from google.cloud import bigquery
 
@@ -15,6 +16,8 @@ class Command(BaseCommand):
         parser.add_argument("date_end", type=str, help="End date (YYYY-MM-DD)")
         parser.add_argument("--output", type=str, default="", help="Output PDF path")
         parser.add_argument("--limit", type=int, default=0, help="Limit rows (optional)")
+        parser.add_argument("--summary", action="store_true",
+                            help="Per-service summary PDF, read from the daily rollup when available")
 
     def handle(self, *args, **options):
         rs_username = options["rs_username"].strip()
@@ -26,6 +29,10 @@ class Command(BaseCommand):
         output_path = options.get("output") or f"report_{rs_username}_{date_start}_to_{date_end}.pdf"
         limit = options.get("limit") or 0
 
+        if options.get("summary"):
+            self._write_summary_pdf(rs_username, date_start, date_end, output_path)
+            return
+
         client = get_bq_client()
         table_id = get_bq_table_id()
 
@@ -48,7 +55,7 @@ SELECT
     StartDate,
     EndDate
 FROM `{table_id}`
-WHERE LOWER(TRIM(rs_username)) = LOWER(TRIM(@creator))
+WHERE {report_creator_sql(client, table_id)} = LOWER(TRIM(@creator))
   AND CreateDate BETWEEN @start_date AND @end_date
 ORDER BY rs_username ASC, UserServiceID ASC
 {limit_clause}
@@ -80,6 +87,32 @@ ORDER BY rs_username ASC, UserServiceID ASC
 
         self.stdout.write(f"PDF generated: {output_path}")
 
+    def _write_summary_pdf(self, rs_username, date_start, date_end, output_path):
+        filters = {
+            "serial": None,
+            "sib_serial": None,
+            "date": ("BETWEEN", date_start, date_end),
+            "service_status": None,
+        }
+        agg_df, table_id = run_bq_summary_query([rs_username], filters=filters)
+        if agg_df.empty:
+            self.stdout.write("No rows returned for this filter.")
+            return
+
+        (rows, grand_total, grand_count), (u_rows, u_grand_total, u_grand_count) = summaries_from_aggregates(agg_df)
+        pdf_data = export_summary_tables_to_pdf(
+            _summary_rows_to_df(rows, grand_total, grand_count),
+            _summary_rows_to_df(u_rows, u_grand_total, u_grand_count),
+        )
+        if not pdf_data:
+            self.stdout.write("Failed to generate PDF.")
+            return
+
+        with open(output_path, "wb") as f:
+            f.write(pdf_data)
+
+        self.stdout.write(f"Summary PDF generated from {table_id}: {output_path}")
+
     def _parse_date(self, value: str) -> datetime.date:
         try:
             return datetime.date.fromisoformat(value.strip())
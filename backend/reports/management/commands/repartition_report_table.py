@@ -0,0 +1,43 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from google.api_core.exceptions import NotFound
+
+from reports.bq import get_bq_client, get_bq_table_id, report_layout_ok, repartition_report_table
+from reports.report_cache import report_cache
+
+
+class Command(BaseCommand):
+    help = (
+        'Move an existing report_user_service table onto the partitioned/clustered layout. '
+        'Run it while no sync is running.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--table', type=str, default='',
+                            help='Full BigQuery table ID (project.dataset.table; default: BQ_* env).')
+        parser.add_argument('--location', type=str, default='',
+                            help='BigQuery location (default: BQ_LOCATION env or US).')
+
+    def handle(self, *args, **options):
+        table_id = options['table'].strip() or get_bq_table_id()
+        location = options['location'].strip() or os.getenv('BQ_LOCATION', 'US')
+        client = get_bq_client()
+        try:
+            table = client.get_table(table_id)
+        except NotFound as exc:
+            raise CommandError(f'{table_id} does not exist; the next sync creates it with the current layout.') from exc
+        if report_layout_ok(table):
+            self.stdout.write(f'{table_id} already has the current layout.')
+            return
+
+        self.stdout.write(f'Rewriting {table_id} ({table.num_rows} rows)...')
+        try:
+            table = repartition_report_table(client, table_id, location=location)
+        except RuntimeError as exc:
+            raise CommandError(str(exc)) from exc
+        # Cached BigQuery reports may predate the rewrite.
+        report_cache.invalidate('bigquery')
+        if not report_layout_ok(table):
+            raise CommandError(f'{table_id} was rewritten but still lacks the partitioned layout.')
+        self.stdout.write(self.style.SUCCESS(f'{table_id} now has the partitioned/clustered layout.'))
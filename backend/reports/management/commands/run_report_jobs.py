@@ -0,0 +1,62 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from reports.jobs import claim_next_job, heartbeat_interval, process_job, purge_report_jobs, requeue_stale_jobs
+
+PURGE_EVERY_SECONDS = 3600
+
+
+class Command(BaseCommand):
+    help = 'Run queued background report jobs (CSV/PDF downloads too large to build in a web request)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Process the queue once and exit instead of polling')
+        parser.add_argument('--poll-interval', type=float, default=3.0,
+                            help='Seconds to wait between polls when the queue is empty')
+        parser.add_argument('--stale-after', type=int, default=300,
+                            help='Seconds without a heartbeat after which a running job is assumed dead '
+                                 'and requeued (0 = never)')
+        parser.add_argument('--keep-days', type=int, default=int(os.getenv('REPORT_JOB_KEEP_DAYS', '7')),
+                            help='Days to keep finished jobs and their files (0 = forever; '
+                                 'default: REPORT_JOB_KEEP_DAYS or 7)')
+
+    def handle(self, *args, **options):
+        poll_interval = max(0.5, options['poll_interval'])
+        stale_after = options['stale_after']
+        if 0 < stale_after <= 2 * heartbeat_interval():
+            self.stdout.write(self.style.WARNING(
+                f'--stale-after {stale_after}s is close to the {heartbeat_interval()}s heartbeat; '
+                'live jobs may be requeued.'
+            ))
+        keep_days = options['keep_days']
+        last_purge = None
+        self.stdout.write('Report job worker started.')
+        while True:
+            if keep_days > 0 and (last_purge is None or time.monotonic() - last_purge >= PURGE_EVERY_SECONDS):
+                last_purge = time.monotonic()
+                purged = purge_report_jobs(keep_days)
+                if purged:
+                    self.stdout.write(f'Purged {purged} job(s) older than {keep_days} day(s).')
+            if stale_after > 0:
+                requeued = requeue_stale_jobs(stale_after)
+                if requeued:
+                    self.stdout.write(self.style.WARNING(f'Requeued {requeued} stale job(s).'))
+
+            job = claim_next_job()
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(poll_interval)
+                continue
+
+            started = time.monotonic()
+            scope = 'all creators' if job.creators == [None] else f'{len(job.creators)} creator(s)'
+            self.stdout.write(f'Job #{job.id}: {job.action} for {scope}')
+            job = process_job(job)
+            elapsed = time.monotonic() - started
+            if job.status == job.STATUS_DONE:
+                self.stdout.write(self.style.SUCCESS(f'Job #{job.id} done in {elapsed:.1f}s ({job.row_count} rows)'))
+            else:
+                self.stdout.write(self.style.ERROR(f'Job #{job.id} failed after {elapsed:.1f}s: {job.message}'))
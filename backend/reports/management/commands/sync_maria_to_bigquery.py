@@ -1,5 +1,5 @@
 from django.core.management.base import BaseCommand
-from reports.sync import sync_maria_to_bigquery
+from reports.sync import sync_incremental_to_bigquery, sync_maria_to_bigquery
 
 
 class Command(BaseCommand):
@@ -10,13 +10,58 @@ class Command(BaseCommand):
         parser.add_argument('--days', type=int, default=0, help='Sync rows from the last N days (0 = all)')
         parser.add_argument('--write-disposition', type=str, default='WRITE_TRUNCATE',
                             help='BigQuery write disposition (WRITE_TRUNCATE or WRITE_APPEND)')
+        parser.add_argument('--stream', action='store_true',
+                            help='Stream rows in chunks through a server-side cursor (default: SYNC_STREAM env)')
+        parser.add_argument('--pipeline', action='store_true',
+                            help='Overlap fetch, file writing and chunked uploads via a stage table (default: SYNC_PIPELINE env)')
+        parser.add_argument('--swap', action='store_true',
+                            help='Load a shadow table, validate per-source row counts, then swap it in (default: SYNC_SWAP env)')
+        parser.add_argument('--chunk-size', type=int, default=0,
+                            help='Rows per streamed chunk (0 = SYNC_CHUNK_SIZE env or 50000)')
+        parser.add_argument('--workers', type=int, default=0,
+                            help='Sources fetched concurrently (0 = SYNC_FETCH_WORKERS env or 1)')
+        parser.add_argument('--source-timeout', type=float, default=0,
+                            help='Seconds before a single source is abandoned (0 = SYNC_SOURCE_TIMEOUT env or none)')
+        parser.add_argument('--load-format', type=str, default='', choices=['', 'parquet', 'csv'],
+                            help='File format for the BigQuery load (default: BQ_LOAD_FORMAT env or parquet)')
+        parser.add_argument('--incremental', action='store_true',
+                            help='MERGE only rows past each source watermark instead of a full refresh')
+        parser.add_argument('--lookback-days', type=int, default=-1,
+                            help='Incremental: days of recent rows re-read for changes (-1 = SYNC_INCREMENTAL_LOOKBACK_DAYS env or 3)')
 
     def handle(self, *args, **options):
         limit = options['limit']
         days = options['days']
         write_disposition = options['write_disposition']
         days_value = days if days and days > 0 else None
-        rows = sync_maria_to_bigquery(limit=limit, write_disposition=write_disposition, days=days_value)
+        if options['incremental']:
+            rows = sync_incremental_to_bigquery(
+                lookback_days=options['lookback_days'] if options['lookback_days'] >= 0 else None,
+                bootstrap_days=days_value,
+                retention_days=days_value,
+                chunk_size=options['chunk_size'] or None,
+                workers=options['workers'] or None,
+                source_timeout=options['source_timeout'] or None,
+                load_format=options['load_format'] or None,
+            )
+            if rows == 0:
+                self.stdout.write(self.style.WARNING('No new rows since the last sync.'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'Merged {rows} rows into BigQuery'))
+            return
+
+        rows = sync_maria_to_bigquery(
+            limit=limit,
+            write_disposition=write_disposition,
+            days=days_value,
+            stream=True if options['stream'] else None,
+            pipeline=True if options['pipeline'] else None,
+            swap=True if options['swap'] else None,
+            chunk_size=options['chunk_size'] or None,
+            workers=options['workers'] or None,
+            source_timeout=options['source_timeout'] or None,
+            load_format=options['load_format'] or None,
+        )
         if rows == 0:
             self.stdout.write(self.style.WARNING('No rows returned from MariaDB.'))
         else:
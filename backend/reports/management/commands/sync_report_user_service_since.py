@@ -1,15 +1,35 @@
 import os
 import time
 import uuid
-import tempfile
 import logging
-from datetime import date
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime
 
 import pandas as pd
 from django.core.management.base import BaseCommand
 from google.cloud import bigquery
 
-from reports.sync import _parse_sources, _fetch_maria_rows, log_sync_event
+from reports.bq import (
+    REPORT_CLUSTER_FIELDS,
+    REPORT_PARTITION_FIELD,
+    ensure_report_table,
+    load_df_to_bq,
+    load_file_to_bq,
+    resolve_load_format,
+)
+from reports.report_cache import report_cache
+from reports.sync import (
+    REPORT_COLUMNS,
+    _ReportSpool,
+    _fetch_maria_rows,
+    _parse_sources,
+    _refresh_rollup,
+    _resolve_chunk_size,
+    _spool_source,
+    _stream_enabled,
+    check_report_table,
+    log_sync_event,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -24,30 +44,6 @@ def _get_bq_config():
     return project, dataset, table, location
 
 
-def _load_df_to_bq(df, table_id, client, location):
-    job_config = bigquery.LoadJobConfig(
-        write_disposition='WRITE_TRUNCATE',
-        autodetect=True,
-        source_format=bigquery.SourceFormat.CSV,
-    )
-    tmp_path = None
-    try:
-        with tempfile.NamedTemporaryFile(mode='w+', suffix='.csv', delete=False, encoding='utf-8') as tmp:
-            df.to_csv(tmp.name, index=False)
-            tmp_path = tmp.name
-        with open(tmp_path, 'rb') as handle:
-            load_job = client.load_table_from_file(
-                handle,
-                table_id,
-                job_config=job_config,
-                location=location,
-            )
-            load_job.result()
-    finally:
-        if tmp_path and os.path.exists(tmp_path):
-            os.remove(tmp_path)
-
-
 class Command(BaseCommand):
     help = (
         'Sync report_user_service from MariaDB since a cutoff date (inclusive), '
@@ -62,6 +58,16 @@ class Command(BaseCommand):
         parser.add_argument('--limit', type=int, default=0, help='Optional row limit per source (0 = no limit).')
         parser.add_argument('--target-table', type=str, default='',
                             help='Full BigQuery target table ID (project.dataset.table).')
+        parser.add_argument('--stream', action='store_true',
+                            help='Stream rows in chunks through a server-side cursor (default: SYNC_STREAM env).')
+        parser.add_argument('--chunk-size', type=int, default=0,
+                            help='Rows per streamed chunk (0 = SYNC_CHUNK_SIZE env or 50000).')
+        parser.add_argument('--load-format', type=str, default='', choices=['', 'parquet', 'csv'],
+                            help='File format for BigQuery loads (default: BQ_LOAD_FORMAT env or parquet).')
+        parser.add_argument('--partition-overwrite', action='store_true',
+                            help='Overwrite affected day partitions from the stage instead of DELETE/INSERT DML.')
+        parser.add_argument('--partition-workers', type=int, default=4,
+                            help='Day partitions written concurrently in --partition-overwrite mode.')
 
     def handle(self, *args, **options):
         started_at = time.time()
@@ -69,10 +75,19 @@ class Command(BaseCommand):
         start_date = options['start_date']
         end_date = options['end_date'].strip() or None
         limit = options['limit']
+        stream = _stream_enabled(True if options['stream'] else None)
+        chunk_size = _resolve_chunk_size(options['chunk_size'] or None)
+        load_format = resolve_load_format(options['load_format'] or None)
+        partition_overwrite = options['partition_overwrite']
+        partition_workers = max(1, options['partition_workers'])
 
         self.stdout.write('Window sync: starting')
         self.stdout.write(f'Window sync: project={project} dataset={dataset} location={location}')
         self.stdout.write(f'Window sync: start_date={start_date} end_date={end_date or "(none)"} limit={limit}')
+        if stream:
+            self.stdout.write(f'Window sync: streaming chunk_size={chunk_size}')
+        if partition_overwrite:
+            self.stdout.write(f'Window sync: partition overwrite workers={partition_workers}')
 
         try:
             date.fromisoformat(start_date)
@@ -87,6 +102,7 @@ class Command(BaseCommand):
 
         target_table = options['target_table'].strip() or f"{project}.{dataset}.{default_table}"
         self.stdout.write(f'Window sync: target_table={target_table}')
+        check_report_table(project, target_table, location)
 
         sources = _parse_sources()
         if not sources:
@@ -106,47 +122,94 @@ class Command(BaseCommand):
             start_date=start_date,
             end_date=end_date,
             limit=limit,
+            partition_overwrite=partition_overwrite,
         )
 
+        spool = _ReportSpool(load_format=load_format) if stream else None
+        try:
+            if stream:
+                rows = self._fetch_streamed(sources, spool, chunk_size, limit, start_date, end_date)
+                ordered_cols = list(REPORT_COLUMNS)
+                df = None
+            else:
+                df = self._fetch_buffered(sources, limit, start_date, end_date)
+                rows = 0 if df is None else len(df)
+                ordered_cols = list(df.columns) if df is not None else []
+
+            if not rows:
+                self.stdout.write(self.style.WARNING('No rows returned from MariaDB.'))
+                log_sync_event('window_sync_no_data', 'No data fetched from any source')
+                return
+
+            self.stdout.write(f"Window sync: columns={', '.join(ordered_cols)}")
+            self._apply_window(
+                project, dataset, location, target_table, start_date, end_date,
+                ordered_cols, rows, started_at, df=df, spool=spool, load_format=load_format,
+                partition_overwrite=partition_overwrite, partition_workers=partition_workers,
+            )
+        finally:
+            if spool is not None:
+                spool.cleanup()
+
+    def _fetch_source_logged(self, source, fetch):
+        try:
+            source_start = time.time()
+            self.stdout.write(f"Window sync: fetching rows from {source.get('name')}")
+            rows = fetch(source)
+            elapsed = time.time() - source_start
+            self.stdout.write(
+                f"Window sync: source={source.get('name')} rows={rows} elapsed={elapsed:.2f}s"
+            )
+            log_sync_event(
+                'window_source_success',
+                'Fetched rows from source',
+                source=source.get('name'),
+                rows=rows,
+            )
+        except Exception as exc:
+            logger.exception('Window sync: source failed: %s', source.get('name'))
+            self.stdout.write(self.style.ERROR(
+                f"Window sync: source={source.get('name')} error={exc}"
+            ))
+            log_sync_event(
+                'window_source_error',
+                'Source fetch failed',
+                source=source.get('name'),
+                error=str(exc),
+            )
+
+    def _fetch_streamed(self, sources, spool, chunk_size, limit, start_date, end_date):
+        for source in sources:
+            self._fetch_source_logged(source, lambda src: _spool_source(
+                spool,
+                src,
+                chunk_size=chunk_size,
+                limit=limit,
+                start_date=start_date,
+                end_date=end_date,
+            ))
+        self.stdout.write(f'Window sync: total rows fetched={spool.rows}')
+        return spool.rows
+
+    def _fetch_buffered(self, sources, limit, start_date, end_date):
         all_dfs = []
+
+        def _fetch(source):
+            df = _fetch_maria_rows(
+                source,
+                limit=limit,
+                start_date=start_date,
+                end_date=end_date,
+            )
+            if not df.empty:
+                all_dfs.append(df)
+            return len(df)
+
         for source in sources:
-            try:
-                source_start = time.time()
-                self.stdout.write(f"Window sync: fetching rows from {source.get('name')}")
-                df = _fetch_maria_rows(
-                    source,
-                    limit=limit,
-                    start_date=start_date,
-                    end_date=end_date,
-                )
-                if not df.empty:
-                    all_dfs.append(df)
-                elapsed = time.time() - source_start
-                self.stdout.write(
-                    f"Window sync: source={source.get('name')} rows={len(df)} elapsed={elapsed:.2f}s"
-                )
-                log_sync_event(
-                    'window_source_success',
-                    'Fetched rows from source',
-                    source=source.get('name'),
-                    rows=len(df),
-                )
-            except Exception as exc:
-                logger.exception('Window sync: source failed: %s', source.get('name'))
-                self.stdout.write(self.style.ERROR(
-                    f"Window sync: source={source.get('name')} error={exc}"
-                ))
-                log_sync_event(
-                    'window_source_error',
-                    'Source fetch failed',
-                    source=source.get('name'),
-                    error=str(exc),
-                )
+            self._fetch_source_logged(source, _fetch)
 
         if not all_dfs:
-            self.stdout.write(self.style.WARNING('No rows returned from MariaDB.'))
-            log_sync_event('window_sync_no_data', 'No data fetched from any source')
-            return
+            return None
 
         df = pd.concat(all_dfs, ignore_index=True)
         self.stdout.write(f'Window sync: total rows fetched={len(df)}')
@@ -160,27 +223,13 @@ class Command(BaseCommand):
             self.stdout.write(f"Window sync: sorted by {', '.join(sort_cols)}")
 
         df = df.reset_index(drop=True)
-        df['id'] = range(1, len(df) + 1)
-
-        ordered_cols = [
-            'id',
-            'CreateDate',
-            'rs_userid',
-            'rs_username',
-            'rs_name',
-            'UserServiceID',
-            'username',
-            'ServiceName',
-            'ServicePrice',
-            'Package',
-            'ServiceStatus',
-            'StartDate',
-            'EndDate',
-        ]
-        ordered_cols = [c for c in ordered_cols if c in df.columns]
-        df = df[ordered_cols]
-        self.stdout.write(f"Window sync: columns={', '.join(ordered_cols)}")
 
+        ordered_cols = [c for c in REPORT_COLUMNS if c in df.columns]
+        return df[ordered_cols]
+
+    def _apply_window(self, project, dataset, location, target_table, start_date, end_date,
+                      ordered_cols, rows, started_at, df=None, spool=None, load_format=None,
+                      partition_overwrite=False, partition_workers=4):
         client = bigquery.Client(project=project)
         stage_table = f"{project}.{dataset}.report_user_service_stage_{uuid.uuid4().hex}"
         self.stdout.write(f'Window sync: stage_table={stage_table}')
@@ -189,15 +238,28 @@ class Command(BaseCommand):
         try:
             self.stdout.write('Window sync: loading stage table')
             stage_start = time.time()
-            _load_df_to_bq(df, stage_table, client, location)
+            if spool is not None:
+                load_file_to_bq(
+                    client, spool.finish(), stage_table, location, 'WRITE_TRUNCATE', load_format=load_format,
+                )
+            else:
+                load_df_to_bq(client, df, stage_table, location, 'WRITE_TRUNCATE', load_format=load_format)
             self.stdout.write(f'Window sync: stage load complete elapsed={time.time() - stage_start:.2f}s')
 
-            delete_where = 'CreateDate >= DATE(@start_date)'
-            if end_date:
-                delete_where += ' AND CreateDate <= DATE(@end_date)'
+            ensure_report_table(client, target_table, location=location)
 
-            cols_csv = ', '.join(ordered_cols)
-            query = f"""
+            if partition_overwrite:
+                self._overwrite_partitions(
+                    client, location, stage_table, target_table, ordered_cols, start_date, end_date,
+                    partition_workers,
+                )
+            else:
+                delete_where = 'CreateDate >= DATE(@start_date)'
+                if end_date:
+                    delete_where += ' AND CreateDate <= DATE(@end_date)'
+
+                cols_csv = ', '.join(ordered_cols)
+                query = f"""
 BEGIN
   DELETE FROM `{target_table}`
   WHERE {delete_where};
@@ -207,21 +269,96 @@ BEGIN
   FROM `{stage_table}`;
 END;
 """
-            params = [bigquery.ScalarQueryParameter('start_date', 'DATE', start_date)]
-            if end_date:
-                params.append(bigquery.ScalarQueryParameter('end_date', 'DATE', end_date))
-            job_config = bigquery.QueryJobConfig(query_parameters=params)
+                params = [bigquery.ScalarQueryParameter('start_date', 'DATE', start_date)]
+                if end_date:
+                    params.append(bigquery.ScalarQueryParameter('end_date', 'DATE', end_date))
+                job_config = bigquery.QueryJobConfig(query_parameters=params)
 
-            self.stdout.write('Window sync: executing delete/insert on target')
-            query_job = client.query(query, job_config=job_config, location=location)
-            query_job.result()
-            self.stdout.write('Window sync: target update complete')
+                self.stdout.write('Window sync: executing delete/insert on target')
+                query_job = client.query(query, job_config=job_config, location=location)
+                query_job.result()
+                self.stdout.write('Window sync: target update complete')
 
-            log_sync_event('window_sync_success', 'Windowed sync completed', rows=len(df))
+            _refresh_rollup(client, target_table, location, start_date=start_date, end_date=end_date)
+            report_cache.invalidate('bigquery')
+            log_sync_event('window_sync_success', 'Windowed sync completed', rows=rows)
             elapsed = time.time() - started_at
             self.stdout.write(self.style.SUCCESS(
-                f'Synced {len(df)} rows into {target_table} in {elapsed:.2f}s'
+                f'Synced {rows} rows into {target_table} in {elapsed:.2f}s'
             ))
         finally:
             self.stdout.write('Window sync: cleaning up stage table')
             client.delete_table(stage_table, not_found_ok=True)
+
+    def _overwrite_partitions(self, client, location, stage_table, target_table, ordered_cols,
+                              start_date, end_date, workers):
+        """Replace each affected day partition of the target from the stage, concurrently.
+
+        Days present in the stage are rewritten through `table$YYYYMMDD`
+        decorators with WRITE_TRUNCATE; days in the window that exist in the
+        target but not in the stage are dropped, matching the DELETE range of
+        the DML mode. No DML statements run against the target.
+        """
+        stage_days = {}
+        null_rows = 0
+        count_query = f"SELECT CreateDate, COUNT(1) AS row_count FROM `{stage_table}` GROUP BY CreateDate"
+        for row in client.query(count_query, location=location).result():
+            if row['CreateDate'] is None:
+                null_rows = row['row_count']
+            else:
+                stage_days[row['CreateDate']] = row['row_count']
+
+        window_start = date.fromisoformat(start_date)
+        window_end = date.fromisoformat(end_date) if end_date else None
+        existing_days = set()
+        for partition_id in client.list_partitions(target_table):
+            if not partition_id.isdigit():
+                continue
+            day = datetime.strptime(partition_id, '%Y%m%d').date()
+            if day >= window_start and (window_end is None or day <= window_end):
+                existing_days.add(day)
+        stale_days = sorted(existing_days - set(stage_days))
+
+        self.stdout.write(
+            f'Window sync: overwriting {len(stage_days)} partitions, dropping {len(stale_days)} empty partitions'
+        )
+        cols_csv = ', '.join(ordered_cols)
+
+        def _overwrite(day):
+            job_config = bigquery.QueryJobConfig(
+                destination=f"{target_table}${day:%Y%m%d}",
+                write_disposition='WRITE_TRUNCATE',
+                time_partitioning=bigquery.TimePartitioning(
+                    type_=bigquery.TimePartitioningType.DAY,
+                    field=REPORT_PARTITION_FIELD,
+                ),
+                clustering_fields=REPORT_CLUSTER_FIELDS,
+                query_parameters=[bigquery.ScalarQueryParameter('day', 'DATE', day)],
+            )
+            query = f"SELECT {cols_csv} FROM `{stage_table}` WHERE CreateDate = @day"
+            client.query(query, job_config=job_config, location=location).result()
+
+        def _drop(day):
+            client.delete_table(f"{target_table}${day:%Y%m%d}", not_found_ok=True)
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='window-partition') as pool:
+            futures = [pool.submit(_overwrite, day) for day in sorted(stage_days)]
+            futures += [pool.submit(_drop, day) for day in stale_days]
+            for future in as_completed(futures):
+                future.result()
+
+        if null_rows:
+            # Rows without a CreateDate were never covered by the DELETE range
+            # either; append them like the DML mode did.
+            job_config = bigquery.QueryJobConfig(destination=target_table, write_disposition='WRITE_APPEND')
+            query = f"SELECT {cols_csv} FROM `{stage_table}` WHERE CreateDate IS NULL"
+            client.query(query, job_config=job_config, location=location).result()
+
+        log_sync_event(
+            'window_partitions_overwritten',
+            'Overwrote day partitions from stage',
+            target_table=target_table,
+            days=len(stage_days),
+            dropped_days=[day.isoformat() for day in stale_days],
+            null_date_rows=null_rows,
+        )
@@ -0,0 +1,26 @@
+# Generated by Django 4.x on 2026-02-12
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0002_pdf_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_name', models.CharField(max_length=64)),
+                ('table_id', models.CharField(max_length=255)),
+                ('last_user_service_id', models.BigIntegerField(default=0)),
+                ('last_create_date', models.DateField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'unique_together': {('source_name', 'table_id')},
+            },
+        ),
+    ]
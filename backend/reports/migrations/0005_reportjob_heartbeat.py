@@ -0,0 +1,24 @@
+# Generated by Django 4.x on 2026-10-17
+from django.db import migrations, models
+
+import reports.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0004_reportjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='reportjob',
+            name='file',
+            field=models.FileField(blank=True, storage=reports.models.report_job_storage, upload_to='report_jobs/'),
+        ),
+    ]
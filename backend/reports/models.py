@@ -1,3 +1,4 @@
+from django.core.files.storage import storages
 from django.db import models
 from django.contrib.auth.models import User
 
@@ -30,3 +31,61 @@ class PdfArchive(models.Model):
 
     def __str__(self):
         return f"{self.pdf_type} #{self.id}"
+
+
+class SyncWatermark(models.Model):
+    source_name = models.CharField(max_length=64)
+    table_id = models.CharField(max_length=255)
+    last_user_service_id = models.BigIntegerField(default=0)
+    last_create_date = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('source_name', 'table_id')
+
+    def __str__(self):
+        return f"{self.source_name} -> {self.table_id} @ {self.last_user_service_id}"
+
+
+def report_job_storage():
+    """Storage for job files; the worker writes them and the web processes serve them."""
+    return storages['report_jobs']
+
+
+class ReportJob(models.Model):
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
+    action = models.CharField(max_length=32)
+    creators = models.JSONField(default=list)
+    filters = models.JSONField(default=dict)
+    user_scope = models.JSONField(null=True, blank=True)
+    filename = models.CharField(max_length=255, blank=True)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_QUEUED, db_index=True)
+    progress = models.PositiveSmallIntegerField(default=0)
+    message = models.TextField(blank=True)
+    row_count = models.IntegerField(null=True, blank=True)
+    file = models.FileField(upload_to='report_jobs/', blank=True, storage=report_job_storage)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    @property
+    def is_finished(self):
+        return self.status in {self.STATUS_DONE, self.STATUS_FAILED}
+
+    def __str__(self):
+        return f"{self.action} #{self.id} ({self.status})"
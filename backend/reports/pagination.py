@@ -0,0 +1,239 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+PAGE_SIZES = (25, 50, 100, 200)
+DEFAULT_PAGE_SIZE = 50
+
+# Key columns compared as numbers (missing ids sort as -1); the rest compare
+# as strings (missing values sort as '').
+NUMERIC_KEY_COLUMNS = frozenset({'RowID', 'UserServiceID', 'CreatorID', 'id'})
+
+
+def detail_key_columns(df):
+    """The columns in-memory detail pages are keyed on, or None when missing.
+
+    Creator, then the source (row ids and creator names repeat across
+    sources), then the row id.
+    """
+    creator_col = 'Creator' if 'Creator' in df.columns else ('rs_username' if 'rs_username' in df.columns else None)
+    source_col = 'Source' if 'Source' in df.columns else ('rs_name' if 'rs_name' in df.columns else None)
+    id_col = 'UserServiceID' if 'UserServiceID' in df.columns else ('RowID' if 'RowID' in df.columns else None)
+    if not (creator_col and id_col):
+        return None
+    return [creator_col] + ([source_col] if source_col else []) + [id_col]
+
+
+def parse_page_size(value):
+    try:
+        page_size = int(value)
+    except (TypeError, ValueError):
+        return DEFAULT_PAGE_SIZE
+    return page_size if page_size in PAGE_SIZES else DEFAULT_PAGE_SIZE
+
+
+def _json_key_value(value):
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return int(value) if float(value).is_integer() else float(value)
+    return str(value)
+
+
+def encode_cursor(direction, key):
+    """`next:<json key>` / `prev:<json key>` for the key values of a boundary row."""
+    values = [_json_key_value(v) for v in key]
+    return f"{direction}:{json.dumps(values, ensure_ascii=False, separators=(',', ':'))}"
+
+
+def decode_cursor(raw):
+    """Parse an `encode_cursor` value into `(direction, key)`, or None when malformed."""
+    direction, _, payload = (raw or '').partition(':')
+    if direction not in {'next', 'prev'}:
+        return None
+    try:
+        values = json.loads(payload)
+    except ValueError:
+        return None
+    if not isinstance(values, list) or not values:
+        return None
+    if any(isinstance(v, bool) or not isinstance(v, (str, int, float)) for v in values):
+        return None
+    return direction, tuple(values)
+
+
+def _cursor_key(cursor, key_cols):
+    """The cursor key coerced to `key_cols`, or None when it belongs to another key."""
+    _direction, key = cursor
+    if len(key) != len(key_cols):
+        return None
+    coerced = []
+    for col, value in zip(key_cols, key):
+        if col in NUMERIC_KEY_COLUMNS:
+            if isinstance(value, str):
+                return None
+            coerced.append(float(value))
+        else:
+            if not isinstance(value, str):
+                return None
+            coerced.append(value)
+    return tuple(coerced)
+
+
+def cursor_matches(cursor, key_cols):
+    """Whether a decoded cursor carries a key of the `key_cols` shape."""
+    return _cursor_key(cursor, key_cols) is not None
+
+
+def _key_arrays(df, key_cols):
+    arrays = []
+    for col in key_cols:
+        if col in NUMERIC_KEY_COLUMNS:
+            arrays.append(pd.to_numeric(df[col], errors='coerce').fillna(-1).to_numpy(dtype='float64'))
+        else:
+            arrays.append(df[col].fillna('').astype(str).to_numpy(dtype=object))
+    return arrays
+
+
+def _compare(left, right):
+    """Row-wise lexicographic comparison of key arrays `left` with `right`
+    (arrays of the same length, or one key tuple); returns `(greater, equal)` masks."""
+    greater = np.zeros(len(left[0]), dtype=bool)
+    equal = np.ones(len(left[0]), dtype=bool)
+    for left_values, right_values in zip(left, right):
+        greater |= equal & (left_values > right_values)
+        equal &= left_values == right_values
+    return greater, equal
+
+
+def _sort_order(arrays):
+    if len(arrays[0]) > 1:
+        greater, _ = _compare([a[:-1] for a in arrays], [a[1:] for a in arrays])
+        if not greater.any():
+            return np.arange(len(arrays[0]))
+    # np.lexsort sorts on its last key first.
+    lex_keys = [pd.factorize(a, sort=True)[0] if a.dtype == object else a for a in reversed(arrays)]
+    return np.lexsort(lex_keys)
+
+
+def _row_key(arrays, position):
+    return tuple(a[position] for a in arrays)
+
+
+def keyset_page(df, key_cols, page_size, cursor=None):
+    """Return `(page_df, next_cursor, prev_cursor)` for one page of `df` ordered by `key_cols`.
+
+    `cursor` is a value from `decode_cursor`; the page starts right after (or
+    ends right before) that key, so pages stay stable however many rows are
+    added ahead of it. Cursors for another key start over at the first page.
+    Only the rows of the page are taken from `df`; frames already in key
+    order skip the sort.
+    """
+    total = len(df)
+    if not total:
+        return df, None, None
+    arrays = _key_arrays(df, key_cols)
+    order = _sort_order(arrays)
+    keys = [a[order] for a in arrays]
+
+    start, end = 0, min(page_size, total)
+    cursor_key = _cursor_key(cursor, key_cols) if cursor is not None else None
+    if cursor_key is not None:
+        greater, equal = _compare(keys, cursor_key)
+        if cursor[0] == 'next':
+            # Rows at or before the cursor form a prefix of the sorted keys.
+            start = int(np.count_nonzero(~greater))
+            end = min(start + page_size, total)
+        else:
+            end = int(np.count_nonzero(~greater & ~equal))
+            start = max(0, end - page_size)
+
+    page = df.iloc[order[start:end]]
+    next_cursor = encode_cursor('next', _row_key(keys, end - 1)) if 0 < end < total else None
+    prev_cursor = encode_cursor('prev', _row_key(keys, start)) if 0 < start < total else None
+    return page, next_cursor, prev_cursor
+
+
+def keyset_window(df, page_size, cursor=None, key_cols=None):
+    """Cut one page out of rows fetched past `cursor` by the keyset SQL (see `pipeline.fetch_report`).
+
+    The queries return up to `page_size + 1` rows per source in cursor
+    direction, ordered by `key_cols` (`detail_key_columns` by default); the
+    extra row only tells whether another page follows. Returns `(page_df,
+    next_cursor, prev_cursor)` like `keyset_page`.
+    """
+    key_cols = key_cols or detail_key_columns(df)
+    if df.empty or not key_cols:
+        return df.head(page_size), None, None
+    arrays = _key_arrays(df, key_cols)
+    order = _sort_order(arrays)
+    keys = [a[order] for a in arrays]
+    total = len(order)
+    if cursor is None or cursor[0] == 'next':
+        end = min(page_size, total)
+        next_cursor = encode_cursor('next', _row_key(keys, end - 1)) if total > page_size else None
+        prev_cursor = encode_cursor('prev', _row_key(keys, 0)) if cursor is not None else None
+        return df.iloc[order[:end]], next_cursor, prev_cursor
+    start = max(0, total - page_size)
+    prev_cursor = encode_cursor('prev', _row_key(keys, start)) if total > page_size else None
+    next_cursor = encode_cursor('next', _row_key(keys, total - 1))
+    return df.iloc[order[start:]], next_cursor, prev_cursor
+
+
+def merge_sorted_chunks(chunk_iters, key_cols):
+    """Merge streams of frames, each sorted on `key_cols`, into frames in overall key order.
+
+    Holds at most one pending frame per stream: each round emits every
+    buffered row up to the smallest last key among the buffers, so at least
+    one buffer drains per round.
+    """
+    streams = [iter(chunks) for chunks in chunk_iters]
+
+    def _next_chunk(stream):
+        for chunk in stream:
+            if len(chunk):
+                return chunk
+        return None
+
+    buffers = [_next_chunk(stream) for stream in streams]
+    while True:
+        live = [i for i, chunk in enumerate(buffers) if chunk is not None]
+        if len(live) <= 1:
+            break
+        bound = min(_row_key(_key_arrays(buffers[i], key_cols), -1) for i in live)
+        parts = []
+        for i in live:
+            greater, _equal = _compare(_key_arrays(buffers[i], key_cols), bound)
+            taken = int(np.count_nonzero(~greater))
+            parts.append(buffers[i].iloc[:taken])
+            buffers[i] = buffers[i].iloc[taken:] if taken < len(buffers[i]) else _next_chunk(streams[i])
+        merged = pd.concat(parts, ignore_index=True)
+        yield merged.iloc[_sort_order(_key_arrays(merged, key_cols))]
+    for i in live:
+        yield buffers[i]
+        yield from (chunk for chunk in streams[i] if len(chunk))
+
+
+def detail_page(df, page_size, cursor=None):
+    """One detail page of `df` plus whole-result totals.
+
+    Returns `(page_df, next_cursor, prev_cursor, total_count, total_gb)`;
+    frames without `detail_key_columns` fall back to their first `page_size` rows.
+    """
+    key_cols = detail_key_columns(df)
+    if key_cols:
+        page_df, next_cursor, prev_cursor = keyset_page(df, key_cols, page_size, cursor=cursor)
+    else:
+        page_df, next_cursor, prev_cursor = df.head(page_size), None, None
+    total_gb = None
+    if 'Package' in df.columns:
+        total_gb = round(float(pd.to_numeric(df['Package'], errors='coerce').sum()), 2)
+    return page_df, next_cursor, prev_cursor, int(len(df)), total_gb
+
+
+def columnar(df):
+    """`{'columns': [...], 'data': [[...], ...]}` with one value list per column and None for missing values."""
+    data = []
+    for column in df.columns:
+        series = df[column]
+        data.append(series.astype(object).where(series.notna(), None).tolist())
+    return {'columns': [str(c) for c in df.columns], 'data': data}
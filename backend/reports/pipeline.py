@@ -0,0 +1,637 @@
+import os
+
+import pandas as pd
+
+from .bq import (
+    BQ_PAGE_KEY,
+    iter_bq_report_rows,
+    run_bq_creator_totals_query,
+    run_bq_report_query,
+    run_bq_summary_query,
+    run_bq_totals_query,
+)
+from .csv_export import resolve_chunk_rows
+from .db import get_sources, iter_query_chunks, resolve_creator_ids, run_query_all_sources
+from .filters import apply_report_filters, is_pending, maria_filter_clauses
+from .pagination import cursor_matches, keyset_window, merge_sorted_chunks
+from .report_cache import fingerprint as report_fingerprint, report_cache
+from .summary import DDC_NAME_PATTERN, GB_NAME_PATTERN, build_summary, maria_unlimited_sql
+
+NO_CREATORS_ERROR = (
+    'No reseller selected or assigned. Enter a creator name or ask admin to assign your reseller profile.'
+)
+
+
+def allowed_report_creators(user):
+    """Resellers a non-admin user is limited to, or None for admins/unassigned users."""
+    if hasattr(user, 'resellerprofile'):
+        return [user.resellerprofile.reseller_name]
+    return None
+
+
+def report_creators(creators_raw, user):
+    """Creators to report on: the typed names, else the user's reseller, else all for superusers."""
+    if creators_raw:
+        creators_raw = creators_raw.replace('،', ',').replace('؛', ',').replace(';', ',')
+    if creators_raw and [c.strip() for c in creators_raw.split(',') if c.strip()]:
+        return [c.strip() for c in creators_raw.split(',') if c.strip()]
+    allowed_creators = allowed_report_creators(user)
+    if allowed_creators:
+        return allowed_creators
+    if user.is_superuser:
+        return [None]  # no filter for superusers
+    return []
+
+
+def report_user_scope(user):
+    allowed_creators = allowed_report_creators(user)
+    if allowed_creators:
+        return sorted(allowed_creators)
+    return 'superuser' if user.is_superuser else 'none'
+
+
+def report_tables_priority():
+    tables_priority = [t.strip() for t in os.getenv('BQ_TABLE_PRIORITY', '').split(',') if t.strip()]
+    return tables_priority or ['Huser_servicebase']
+
+
+def report_source():
+    """Return `(use_bq, warning)`; falls back to MariaDB when BigQuery has no credentials."""
+    use_bq = os.getenv('REPORT_SOURCE', 'mariadb').lower() == 'bigquery'
+    if not use_bq:
+        return False, None
+    bq_creds_path = os.getenv('GOOGLE_APPLICATION_CREDENTIALS', '').strip()
+    if bq_creds_path and os.path.exists(bq_creds_path):
+        return True, None
+    local_keys = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'keys.json'))
+    if os.path.exists(local_keys):
+        os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = local_keys
+        return True, None
+    if bq_creds_path:
+        return False, 'BigQuery credentials not configured. Falling back to MariaDB.'
+    return True, None
+
+
+def unlimited_mask(source_df):
+    """Boolean mask of the rows whose package counts as unlimited."""
+    if source_df.empty:
+        return pd.Series([], dtype=bool)
+
+    if 'PackageBytes' in source_df.columns:
+        series = pd.to_numeric(source_df['PackageBytes'], errors='coerce')
+    elif 'Package' in source_df.columns:
+        series = pd.to_numeric(source_df['Package'], errors='coerce')
+    elif 'PackageValue' in source_df.columns:
+        series = pd.to_numeric(source_df['PackageValue'], errors='coerce')
+    else:
+        return pd.Series([False] * len(source_df), index=source_df.index)
+
+    base_unlimited = series.isna() | (series <= 0)
+
+    if 'ServiceName' not in source_df.columns:
+        return base_unlimited
+
+    name_series = source_df['ServiceName'].fillna('').astype(str)
+    name_has_gb = name_series.str.contains(GB_NAME_PATTERN, regex=True)
+    name_has_ddc = name_series.str.contains(DDC_NAME_PATTERN, regex=True)
+
+    # Unlimited only when GB is missing/zero and name matches unlimited rules.
+    return base_unlimited & ((~name_has_gb) | name_has_ddc)
+
+
+def creator_column(df):
+    if 'Creator' in df.columns:
+        return 'Creator'
+    if 'rs_username' in df.columns:
+        return 'rs_username'
+    return None
+
+
+def detail_summaries(final_df):
+    """`(limited, unlimited)` summaries built from prepared detail rows."""
+    creator_col = creator_column(final_df)
+    unlimited_rows = unlimited_mask(final_df)
+    limited = build_summary(final_df[~unlimited_rows], creator_col)
+    unlimited = build_summary(final_df[unlimited_rows], creator_col)
+    return limited, unlimited
+
+
+_MARIA_PACKAGE_BYTES_SQL = (
+    "COALESCE(NULLIF(Hse.STrA, 0), NULLIF(Hse.MTrA, 0), NULLIF(Hse.DTrA, 0), "
+    "NULLIF(Hse.YTrA, 0), NULLIF(Hse.ExtraTraffic, 0))"
+)
+
+
+def _maria_select(mode):
+    """SELECT ... WHERE 1 = 1 head of the MariaDB report query and its params, for `mode`."""
+    if mode == 'count':
+        # The LEFT JOINs can't change the row count, so only the inner join stays.
+        return """
+SELECT COUNT(*) AS RowCount
+FROM {table_path} TName
+JOIN Huser Hu ON TName.User_Id = Hu.User_Id
+WHERE 1 = 1
+""", []
+    if mode == 'totals':
+        return f"""
+SELECT
+    COUNT(*) AS TotalCount,
+    SUM(ROUND({_MARIA_PACKAGE_BYTES_SQL} / 1073741824, 2)) AS TotalGB
+FROM {{table_path}} TName
+JOIN Huser Hu ON TName.User_Id = Hu.User_Id
+LEFT JOIN Hservice Hse ON TName.Service_Id = Hse.Service_Id
+WHERE 1 = 1
+""", []
+    if mode == 'creator_totals':
+        unlimited_sql, select_params = maria_unlimited_sql(_MARIA_PACKAGE_BYTES_SQL, 'Hse.ServiceName')
+        return f"""
+SELECT
+    IF(TName.Creator_Id = 0, '- User_From_Site -', Hrc.ResellerName) AS Creator,
+    {unlimited_sql} AS IsUnlimited,
+    COUNT(*) AS Count,
+    SUM(ROUND({_MARIA_PACKAGE_BYTES_SQL} / 1073741824, 2)) AS SumGB
+FROM {{table_path}} TName
+JOIN Huser Hu ON TName.User_Id = Hu.User_Id
+LEFT JOIN Hreseller Hrc ON TName.Creator_Id = Hrc.Reseller_Id
+LEFT JOIN Hservice Hse ON TName.Service_Id = Hse.Service_Id
+WHERE 1 = 1
+""", select_params
+    if mode == 'summary':
+        unlimited_sql, select_params = maria_unlimited_sql(_MARIA_PACKAGE_BYTES_SQL, 'Hse.ServiceName')
+        return f"""
+SELECT
+    TName.Creator_Id AS CreatorID,
+    IF(TName.Creator_Id = 0, '- User_From_Site -', Hrc.ResellerName) AS Creator,
+    Hse.ServiceName AS ServiceName,
+    {unlimited_sql} AS IsUnlimited,
+    COUNT(*) AS Count,
+    SUM(ROUND({_MARIA_PACKAGE_BYTES_SQL} / 1073741824, 2)) AS SumGB
+FROM {{table_path}} TName
+JOIN Huser Hu ON TName.User_Id = Hu.User_Id
+LEFT JOIN Hreseller Hrc ON TName.Creator_Id = Hrc.Reseller_Id
+LEFT JOIN Hservice Hse ON TName.Service_Id = Hse.Service_Id
+WHERE 1 = 1
+""", select_params
+    return """
+SELECT
+    TName.User_ServiceBase_Id AS RowID,
+    TName.Creator_Id AS CreatorID,
+    IF(TName.Creator_Id = 0, '- User_From_Site -', Hrc.ResellerName) AS Creator,
+    Hse.ServiceName AS ServiceName,
+    Hu.Username AS Username,
+    DATE_FORMAT(TName.CDT, '%%Y-%%m-%%d %%H:%%i:%%s') AS CreateDT,
+    TName.ServiceStatus AS ServiceStatus,
+    FORMAT(TName.ServicePrice, 0) AS ServicePrice,
+    DATE_FORMAT(NULLIF(TName.StartDate, '0000-00-00'), '%%Y-%%m-%%d') AS StartDate,
+    DATE_FORMAT(NULLIF(TName.EndDate, '0000-00-00'), '%%Y-%%m-%%d') AS EndDate,
+    COALESCE(NULLIF(Hse.STrA, 0), NULLIF(Hse.MTrA, 0), NULLIF(Hse.DTrA, 0), NULLIF(Hse.YTrA, 0), NULLIF(Hse.ExtraTraffic, 0)) AS PackageBytes,
+    CASE
+        WHEN COALESCE(NULLIF(Hse.STrA, 0), NULLIF(Hse.MTrA, 0), NULLIF(Hse.DTrA, 0), NULLIF(Hse.YTrA, 0), NULLIF(Hse.ExtraTraffic, 0)) IS NULL THEN NULL
+        ELSE ROUND(COALESCE(NULLIF(Hse.STrA, 0), NULLIF(Hse.MTrA, 0), NULLIF(Hse.DTrA, 0), NULLIF(Hse.YTrA, 0), NULLIF(Hse.ExtraTraffic, 0)) / 1073741824, 2)
+    END AS PackageValue
+FROM {table_path} TName
+JOIN Huser Hu ON TName.User_Id = Hu.User_Id
+LEFT JOIN Hreseller Hrc ON TName.Creator_Id = Hrc.Reseller_Id
+LEFT JOIN Hservice Hse ON TName.Service_Id = Hse.Service_Id
+WHERE 1 = 1
+""", []
+
+
+# Columns of the 'detail' query, in select order.
+MARIA_DETAIL_COLUMNS = [
+    'RowID', 'CreatorID', 'Creator', 'ServiceName', 'Username', 'CreateDT', 'ServiceStatus',
+    'ServicePrice', 'StartDate', 'EndDate', 'PackageBytes', 'PackageValue',
+]
+
+# CSV exports stream each source sorted on (creator, id), the order
+# `prepare_detail_frame` gives buffered reports; comparing the creator as
+# bytes keeps MariaDB's order identical to Python's. It costs one server-side
+# sort per export query, not one per page.
+MARIA_EXPORT_KEY = ['Creator', 'RowID']
+_MARIA_EXPORT_ORDER_SQL = (
+    "CAST(COALESCE(IF(TName.Creator_Id = 0, '- User_From_Site -', Hrc.ResellerName), '') AS BINARY), "
+    "TName.User_ServiceBase_Id"
+)
+
+# SQL detail pages are keyed on (source, creator id, row id): each source is
+# read in (Creator_Id, User_ServiceBase_Id) order, which the Creator_Id index
+# serves (InnoDB secondary indexes end in the primary key), and the sources
+# are merged in Python by `keyset_window`.
+MARIA_PAGE_KEY = ['Source', 'CreatorID', 'RowID']
+
+
+def _maria_page_sql(page, source_name):
+    """Keyset predicate, ORDER BY and LIMIT for one detail page on `source_name`.
+
+    Returns `(clause, params)`, or None when the whole source lies behind the
+    cursor (see `MARIA_PAGE_KEY`).
+    """
+    page_size, cursor = page
+    order, clause, params = 'ASC', '', []
+    if cursor is not None:
+        direction, (cursor_source, creator_id, row_id) = cursor
+        forward = direction == 'next'
+        op = '>' if forward else '<'
+        order = 'ASC' if forward else 'DESC'
+        if source_name == cursor_source:
+            clause = (
+                f"\n  AND (TName.Creator_Id {op} %s"
+                f" OR (TName.Creator_Id = %s AND TName.User_ServiceBase_Id {op} %s))"
+            )
+            params = [int(creator_id), int(creator_id), int(row_id)]
+        elif (source_name < cursor_source) == forward:
+            return None
+    clause += f"""
+ORDER BY TName.Creator_Id {order}, TName.User_ServiceBase_Id {order}
+LIMIT %s
+"""
+    return clause, params + [page_size + 1]
+
+
+def maria_report_plan(creators, report_filters, mode='detail', limit=0, page=None, unlimited=None):
+    """Per-source `(sql, params)` lists for the MariaDB report query.
+
+    `mode` is 'detail', 'export' (the limited, or `unlimited`, detail rows in
+    `MARIA_EXPORT_KEY` order), 'summary' (aggregated per
+    creator/service/unlimited), 'creator_totals' (per creator/unlimited,
+    keeping rows without a creator or service), 'totals' (row count and
+    package GB) or 'count' (row count only). With `page` (`(page_size,
+    cursor)`, keyed on `MARIA_PAGE_KEY`) detail queries return only the rows
+    of that keyset page and sources wholly behind the cursor get none. Returns
+    `(plan, source_names, creator_ids_by_source, unresolved_creators)`; see
+    `run_query_all_sources`.
+    """
+    filter_clauses, filter_params = maria_filter_clauses(report_filters)
+    filter_sql = ''.join(f"\n  AND {clause}" for clause in filter_clauses)
+    select_sql, select_params = _maria_select('detail' if mode == 'export' else mode)
+    source_names = [source['name'] for source in get_sources()]
+    batch_size = max(1, int(os.getenv('REPORT_CREATOR_BATCH_SIZE', '500') or 500))
+    named_creators = [c for c in creators if c]
+
+    def _report_query(id_batch, source_name):
+        query_base = select_sql
+        params = list(select_params)
+        if id_batch:
+            query_base += f"  AND TName.Creator_Id IN ({','.join(['%s'] * len(id_batch))})"
+            params.extend(id_batch)
+        query_base += filter_sql
+        params.extend(filter_params)
+        if mode in {'count', 'totals'}:
+            return query_base, params
+        if mode == 'creator_totals':
+            return query_base + "\nGROUP BY Creator, IsUnlimited\n", params
+        if mode == 'export':
+            unlimited_sql, unlimited_params = maria_unlimited_sql(_MARIA_PACKAGE_BYTES_SQL, 'Hse.ServiceName')
+            query_base += f"""
+  AND {'' if unlimited else 'NOT '}({unlimited_sql})
+ORDER BY {_MARIA_EXPORT_ORDER_SQL}
+"""
+            return query_base, params + unlimited_params
+        if mode == 'summary':
+            query_base += """
+GROUP BY CreatorID, Creator, ServiceName, IsUnlimited
+HAVING Creator IS NOT NULL AND ServiceName IS NOT NULL
+"""
+            return query_base, params
+        if page is not None:
+            page_sql = _maria_page_sql(page, source_name)
+            if page_sql is None:
+                return None
+            return query_base + page_sql[0], params + page_sql[1]
+        query_base += """
+ORDER BY TName.CDT DESC
+"""
+        if limit > 0:
+            query_base += "LIMIT %s\n"
+            params.append(limit)
+        return query_base, params
+
+    # Reseller ids differ per server, so resolve names and batch ids per source.
+    plan = {}
+    creator_ids_by_source = {}
+    unresolved_creators = []
+    if named_creators:
+        unresolved_sets = []
+        for source_name in source_names:
+            creator_ids, unresolved = resolve_creator_ids(named_creators, source_name=source_name)
+            unresolved_sets.append(set(unresolved))
+            creator_ids_by_source[source_name] = creator_ids
+            reseller_ids = sorted({rid for ids in creator_ids.values() for rid in ids})
+            queries = [
+                _report_query(reseller_ids[i:i + batch_size], source_name)
+                for i in range(0, len(reseller_ids), batch_size)
+            ]
+            plan[source_name] = [query for query in queries if query is not None]
+        unresolved_everywhere = set.intersection(*unresolved_sets) if unresolved_sets else set()
+        unresolved_creators = [c for c in named_creators if c in unresolved_everywhere]
+    else:
+        for source_name in source_names:
+            query = _report_query(None, source_name)
+            plan[source_name] = [query] if query is not None else []
+    return plan, source_names, creator_ids_by_source, unresolved_creators
+
+
+def fetch_report(creators, report_filters, use_bq=False, tables_priority=None, limit=0, summary=False,
+                 page=None, totals=False):
+    """Run the report query for `creators` and return `(frame, meta, error)`.
+
+    Detail rows by default, only one keyset page of them with `page`
+    (`(page_size, cursor)`, see `load_detail_page`); with `summary` the rows
+    are aggregated per (creator, service, unlimited) in SQL and with `totals`
+    into TotalCount/TotalGB rows. `meta` holds the `info_tables` lines and the
+    `unresolved_creators` the page shows.
+    """
+    tables_priority = tables_priority or report_tables_priority()
+    frames = []
+    fetch_info = []
+    fetch_unresolved = []
+    fetch_error = None
+    if use_bq:
+        try:
+            if summary:
+                df, used_table = run_bq_summary_query(creators, filters=report_filters)
+            elif totals:
+                df, used_table = run_bq_totals_query(creators, filters=report_filters)
+            else:
+                df, used_table = run_bq_report_query(creators, limit=limit, filters=report_filters, page=page)
+            if not df.empty:
+                frames.append(df)
+                creators_label = ', '.join([c for c in creators if c]) if creators else 'all'
+                fetch_info.append(f"{creators_label} ← {used_table}")
+        except Exception as exc:
+            fetch_error = str(exc)
+    else:
+        mode = 'summary' if summary else ('totals' if totals else 'detail')
+        plan, source_names, creator_ids_by_source, fetch_unresolved = maria_report_plan(
+            creators, report_filters, mode=mode, limit=limit, page=page
+        )
+        multi_source = len(source_names) > 1
+        named_creators = [c for c in creators if c]
+        df, used_tables, source_errors = run_query_all_sources(plan=plan, tables_priority=tables_priority)
+        if source_errors:
+            fetch_error = '; '.join(
+                f"{source_name}: {message}" for source_name, message in source_errors.items()
+            )
+        if not df.empty and totals:
+            frames.append(df.drop(columns=['CreatorID', 'Source'], errors='ignore'))
+        elif not df.empty:
+            for source_name in source_names:
+                tables = ', '.join(sorted({t for t in used_tables.get(source_name, []) if t}))
+                if not tables:
+                    continue
+                table_label = f"{source_name}:{tables}" if multi_source else tables
+                source_rows = df[df['Source'] == source_name]
+                if source_rows.empty:
+                    continue
+                if not named_creators:
+                    fetch_info.append(f"all ← {table_label}")
+                    continue
+                # Split the merged rows back out per requested creator for the info lines.
+                present_ids = set(pd.to_numeric(source_rows['CreatorID'], errors='coerce').dropna().astype(int))
+                for creator, ids in creator_ids_by_source[source_name].items():
+                    if present_ids.intersection(ids):
+                        fetch_info.append(f"{creator} ← {table_label}")
+            if page is not None:
+                # `load_detail_page` cuts the page on MARIA_PAGE_KEY first.
+                drop_columns = []
+            elif multi_source and not summary:
+                drop_columns = ['CreatorID']
+            else:
+                drop_columns = ['CreatorID', 'Source']
+            frames.append(df.drop(columns=drop_columns, errors='ignore'))
+
+    frame = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    return frame, {'info_tables': fetch_info, 'unresolved_creators': fetch_unresolved}, fetch_error
+
+
+BQ_DETAIL_COLUMNS = [
+    'id',
+    'CreateDate',
+    'UserServiceID',
+    'rs_username',
+    'rs_name',
+    'ServiceName',
+    'username',
+    'ServiceStatus',
+    'ServicePrice',
+    'Package',
+    'StartDate',
+    'EndDate',
+]
+
+
+def prepare_detail_frame(df, report_filters, use_bq=False, sort=True):
+    """Normalize fetched detail rows: column order, rounded Package, filters and,
+    unless `sort` is off, (creator, id) order."""
+    final_df = df.where(pd.notnull(df), None)
+
+    # Reorder columns for BigQuery reports
+    if use_bq:
+        present = [c for c in BQ_DETAIL_COLUMNS if c in final_df.columns]
+        remaining = [c for c in final_df.columns if c not in present]
+        if present:
+            final_df = final_df[present + remaining]
+
+    if 'Package' not in final_df.columns and 'PackageValue' in final_df.columns:
+        final_df['Package'] = final_df['PackageValue']
+
+    if 'Package' in final_df.columns:
+        pkg_numeric = pd.to_numeric(final_df['Package'], errors='coerce')
+        if pkg_numeric.notna().any():
+            final_df['Package'] = pkg_numeric.round(2)
+
+    # Filters are pushed into the queries; re-apply them in one pass so
+    # cached frames and any rows the SQL couldn't narrow stay consistent.
+    final_df = apply_report_filters(final_df, report_filters)
+
+    # sort rows grouped by reseller/creator and UserServiceID for easier review
+    if sort and ('Creator' in final_df.columns or 'rs_username' in final_df.columns):
+        sort_cols = ['Creator'] if 'Creator' in final_df.columns else ['rs_username']
+        ascending = [True]
+        if 'UserServiceID' in final_df.columns:
+            sort_cols.append('UserServiceID')
+            ascending.append(True)
+        elif 'RowID' in final_df.columns:
+            sort_cols.append('RowID')
+            ascending.append(True)
+        else:
+            date_sort_col = 'CreateDT' if 'CreateDT' in final_df.columns else 'CreateDate'
+            if date_sort_col in final_df.columns:
+                sort_cols.append(date_sort_col)
+                ascending.append(False)
+
+        final_df = final_df.sort_values(by=sort_cols, ascending=ascending)
+    return final_df
+
+
+def _report_cache_key(creators, report_filters, user_scope, use_bq, tables_priority, limit=0, summary=False):
+    return report_fingerprint(
+        'bigquery' if use_bq else 'mariadb',
+        creators,
+        report_filters,
+        user_scope,
+        limit=limit,
+        tables_priority=tables_priority,
+        all_creators=creators == [None],
+        summary=summary,
+    )
+
+
+def load_report(creators, report_filters, user_scope, use_bq=False, tables_priority=None, limit=0, summary=False):
+    """`fetch_report` through the shared report cache, keyed on the request fingerprint."""
+    tables_priority = tables_priority or report_tables_priority()
+    report_source_name = 'bigquery' if use_bq else 'mariadb'
+    cache_key = _report_cache_key(creators, report_filters, user_scope, use_bq, tables_priority, limit, summary)
+    return report_cache.get_or_compute(
+        cache_key,
+        report_source_name,
+        lambda: fetch_report(
+            creators,
+            report_filters,
+            use_bq=use_bq,
+            tables_priority=tables_priority,
+            limit=limit,
+            summary=summary,
+        ),
+    )
+
+
+def cached_report(creators, report_filters, user_scope, use_bq=False, tables_priority=None):
+    """The detail report `load_report` has cached for this request, or None; never queries."""
+    tables_priority = tables_priority or report_tables_priority()
+    cache_key = _report_cache_key(creators, report_filters, user_scope, use_bq, tables_priority)
+    return report_cache.get(cache_key, 'bigquery' if use_bq else 'mariadb')
+
+
+def pages_in_sql(report_filters):
+    """Whether detail pages and CSV exports can be cut in SQL; the pending filter
+    keeps each user's latest row only, so it needs the whole result (see `detail_page`)."""
+    return not is_pending(report_filters)
+
+
+def _stable_id_dtypes(df):
+    # Chunks with and without missing ids would print them as 1 and 1.0.
+    for column in ('RowID', 'CreatorID', 'PackageBytes', 'id', 'UserServiceID'):
+        if column in df.columns:
+            df[column] = pd.to_numeric(df[column], errors='coerce').astype('Int64')
+    return df
+
+
+def _tag_source(chunks, source_name):
+    for chunk in chunks:
+        chunk['Source'] = source_name
+        yield chunk
+
+
+def export_report_sections(creators, report_filters, use_bq=False, tables_priority=None, chunk_rows=None):
+    """Detail rows for a CSV export, streamed from the source instead of loaded whole.
+
+    Returns `(columns, creator_col, sections, error)`. `sections` holds
+    `(chunks, totals)` for the limited then the unlimited rows: `chunks`
+    lazily yields prepared frames in (creator, id) order, read through
+    unbuffered cursors (MariaDB, merged across sources) or result pages
+    (BigQuery), and `totals` is the section's (Creator, Count, SumGB)
+    aggregate, which is the only query run up front. Only for
+    `pages_in_sql` filters.
+    """
+    tables_priority = tables_priority or report_tables_priority()
+    chunk_rows = chunk_rows or resolve_chunk_rows()
+
+    def _prepared(chunks):
+        for chunk in chunks:
+            yield prepare_detail_frame(_stable_id_dtypes(chunk), report_filters, use_bq=use_bq, sort=False)
+
+    try:
+        if use_bq:
+            totals_df, _table = run_bq_creator_totals_query(creators, filters=report_filters)
+            columns, creator_col = list(BQ_DETAIL_COLUMNS), 'rs_username'
+
+            def _section_chunks(unlimited):
+                return _prepared(iter_bq_report_rows(creators, report_filters, unlimited, page_size=chunk_rows))
+        else:
+            plan, source_names, _ids, _unresolved = maria_report_plan(creators, report_filters, mode='creator_totals')
+            totals_df, _tables, source_errors = run_query_all_sources(plan=plan, tables_priority=tables_priority)
+            if source_errors:
+                return None, None, [], '; '.join(f"{name}: {message}" for name, message in source_errors.items())
+            multi_source = len(source_names) > 1
+            drop_columns = ['CreatorID'] if multi_source else ['CreatorID', 'Source']
+            columns = [c for c in MARIA_DETAIL_COLUMNS + ['Source'] if c not in drop_columns] + ['Package']
+            creator_col = 'Creator'
+            section_plans = {
+                unlimited: maria_report_plan(creators, report_filters, mode='export', unlimited=unlimited)[0]
+                for unlimited in (False, True)
+            }
+
+            def _section_chunks(unlimited):
+                streams = [
+                    _tag_source(
+                        iter_query_chunks(query, params, tables_priority, source_name, chunk_rows=chunk_rows),
+                        source_name,
+                    )
+                    for source_name, queries in section_plans[unlimited].items()
+                    for query, params in queries
+                ]
+                merged = merge_sorted_chunks(streams, MARIA_EXPORT_KEY)
+                return _prepared(chunk.drop(columns=drop_columns) for chunk in merged)
+    except Exception as exc:
+        return None, None, [], str(exc)
+
+    if totals_df.empty:
+        totals_df = pd.DataFrame(columns=['Creator', 'IsUnlimited', 'Count', 'SumGB'])
+    is_unlimited = totals_df['IsUnlimited'].fillna(False).astype(bool)
+    sections = [
+        (_section_chunks(unlimited), totals_df[is_unlimited == unlimited])
+        for unlimited in (False, True)
+    ]
+    return columns, creator_col, sections, None
+
+
+def load_detail_page(creators, report_filters, user_scope, page_size, cursor=None, use_bq=False,
+                     tables_priority=None):
+    """One keyset page of detail rows plus whole-result totals, fetched and cached per page.
+
+    Returns `(page_df, next_cursor, prev_cursor, total_count, total_gb, meta,
+    error)`; the totals come from a COUNT/SUM query (or the BigQuery rollup)
+    instead of the full rows.
+    """
+    tables_priority = tables_priority or report_tables_priority()
+    report_source_name = 'bigquery' if use_bq else 'mariadb'
+
+    def _cached(compute, **extra):
+        cache_key = report_fingerprint(
+            report_source_name,
+            creators,
+            report_filters,
+            user_scope,
+            tables_priority=tables_priority,
+            all_creators=creators == [None],
+            **extra,
+        )
+        return report_cache.get_or_compute(cache_key, report_source_name, compute)
+
+    key_cols = BQ_PAGE_KEY if use_bq else MARIA_PAGE_KEY
+    if cursor is not None and not cursor_matches(cursor, key_cols):
+        cursor = None
+    fetch_args = {'use_bq': use_bq, 'tables_priority': tables_priority}
+    page = (page_size, cursor)
+    page_rows, meta, error = _cached(
+        lambda: fetch_report(creators, report_filters, page=page, **fetch_args),
+        page_size=page_size,
+        cursor=cursor,
+    )
+    totals_df, _totals_meta, totals_error = _cached(
+        lambda: fetch_report(creators, report_filters, totals=True, **fetch_args),
+        totals=True,
+    )
+
+    if not page_rows.empty:
+        page_rows = prepare_detail_frame(page_rows, report_filters, use_bq=use_bq, sort=False)
+    page_df, next_cursor, prev_cursor = keyset_window(page_rows, page_size, cursor=cursor, key_cols=key_cols)
+    if not use_bq:
+        drop_columns = ['CreatorID'] if len(get_sources()) > 1 else ['CreatorID', 'Source']
+        page_df = page_df.drop(columns=drop_columns, errors='ignore')
+    total_count, total_gb = 0, None
+    if not totals_df.empty:
+        total_count = int(pd.to_numeric(totals_df['TotalCount'], errors='coerce').fillna(0).sum())
+        total_gb = round(float(pd.to_numeric(totals_df['TotalGB'], errors='coerce').fillna(0).sum()), 2)
+    return page_df, next_cursor, prev_cursor, total_count, total_gb, meta, error or totals_error
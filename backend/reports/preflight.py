@@ -0,0 +1,118 @@
+import logging
+import os
+
+import pandas as pd
+
+from .bq import estimate_bq_report
+from .db import run_query_all_sources
+from .pipeline import maria_report_plan, report_tables_priority
+from .report_cache import fingerprint as report_fingerprint, report_cache
+
+logger = logging.getLogger(__name__)
+
+INLINE = 'inline'
+BACKGROUND = 'background'
+NARROW = 'narrow'
+
+NARROW_ERROR = (
+    'This report is too large to build. Narrow the date range, status or creators and try again.'
+)
+PAGE_TOO_LARGE_ERROR = (
+    'This report is too large to show on the page. Narrow the filters, or download it as CSV '
+    'and it will be built in the background.'
+)
+
+
+def _env_int(name, default):
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return int(default)
+
+
+def preflight_enabled():
+    return os.getenv('REPORT_PREFLIGHT', '1').strip().lower() in {'1', 'true', 'yes', 'on'}
+
+
+def report_budgets():
+    """Row/byte budgets: up to `inline_*` runs in the request, past `max_*` is refused (0 = no limit)."""
+    return {
+        'inline_rows': _env_int('REPORT_INLINE_MAX_ROWS', '200000'),
+        'inline_bytes': _env_int('REPORT_INLINE_MAX_BYTES', str(256 * 1024 * 1024)),
+        'max_rows': _env_int('REPORT_MAX_ROWS', '2000000'),
+        'max_bytes': _env_int('REPORT_MAX_BYTES', str(4 * 1024 * 1024 * 1024)),
+    }
+
+
+def _estimate_maria(creators, report_filters, tables_priority):
+    plan, _source_names, _ids, _unresolved = maria_report_plan(creators, report_filters, mode='count')
+    df, _used_tables, errors = run_query_all_sources(plan=plan, tables_priority=tables_priority)
+    rows = int(pd.to_numeric(df['RowCount'], errors='coerce').fillna(0).sum()) if not df.empty else 0
+    # MariaDB has no scan estimate; size the frame the rows would build instead.
+    row_bytes = _env_int('REPORT_ROW_BYTES', '600')
+    estimate = {'rows': rows, 'bytes': rows * row_bytes if row_bytes > 0 else None}
+    error = '; '.join(f"{name}: {message}" for name, message in errors.items()) or None
+    return estimate, error
+
+
+def estimate_report(creators, report_filters, use_bq=False, tables_priority=None):
+    """Estimate the detail report's size without fetching it; returns `(estimate, error)`.
+
+    `estimate` is `{'rows', 'bytes', 'source'}`, either of the sizes may be
+    None when the source can't tell: MariaDB runs a COUNT(*) per source and
+    derives bytes from REPORT_ROW_BYTES, BigQuery dry-runs the query for the
+    bytes it would scan and counts rows from the daily rollup.
+    """
+    source = 'bigquery' if use_bq else 'mariadb'
+    try:
+        if use_bq:
+            estimate = estimate_bq_report(creators, report_filters)
+            error = None
+        else:
+            estimate, error = _estimate_maria(creators, report_filters, tables_priority or report_tables_priority())
+    except Exception as exc:
+        logger.warning('Report preflight failed: %s', exc)
+        return None, str(exc)
+    return {'rows': estimate['rows'], 'bytes': estimate['bytes'], 'source': source}, error
+
+
+def load_estimate(creators, report_filters, user_scope, use_bq=False, tables_priority=None):
+    """`estimate_report` through the report cache, so pagers and reloads don't recount."""
+    tables_priority = tables_priority or report_tables_priority()
+    source = 'bigquery' if use_bq else 'mariadb'
+    cache_key = report_fingerprint(
+        source,
+        creators,
+        report_filters,
+        user_scope,
+        tables_priority=tables_priority,
+        all_creators=creators == [None],
+        preflight=True,
+    )
+
+    def _compute():
+        estimate, error = estimate_report(creators, report_filters, use_bq=use_bq, tables_priority=tables_priority)
+        return pd.DataFrame(), {'estimate': estimate}, error
+
+    _df, meta, error = report_cache.get_or_compute(cache_key, source, _compute)
+    return meta['estimate'], error
+
+
+def _over(value, budget):
+    return value is not None and budget > 0 and value > budget
+
+
+def preflight_decision(estimate, budgets=None):
+    """INLINE, BACKGROUND (over the inline budget) or NARROW (over the hard cap) for `estimate`.
+
+    A failed preflight (no estimate) runs inline as before.
+    """
+    if not estimate:
+        return INLINE
+    budgets = budgets or report_budgets()
+    rows, size = estimate.get('rows'), estimate.get('bytes')
+    if _over(rows, budgets['max_rows']) or _over(size, budgets['max_bytes']):
+        return NARROW
+    if _over(rows, budgets['inline_rows']) or _over(size, budgets['inline_bytes']):
+        return BACKGROUND
+    return INLINE
@@ -0,0 +1,206 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+import pandas as pd
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+ALL_SOURCES = '*'
+
+
+def _env_int(name, default):
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return int(default)
+
+
+def fingerprint(source, creators, filters, scope, **extra):
+    """Stable key for a report request: data source, creators, normalized filters and user scope."""
+    creators_norm = sorted({(c or '').strip().lower() for c in creators or []})
+    payload = {
+        'source': source,
+        'creators': creators_norm,
+        'filters': filters,
+        'scope': scope,
+        'extra': extra,
+    }
+    raw = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def _frame_to_bytes(df):
+    buffer = io.BytesIO()
+    df.to_parquet(buffer, engine='pyarrow', compression='zstd', index=False)
+    return buffer.getvalue()
+
+
+def _frame_from_bytes(payload):
+    return pd.read_parquet(io.BytesIO(payload), engine='pyarrow')
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class ReportCache:
+    """Report frames stored as Parquet bytes in the shared `reports` Django cache.
+
+    Every web worker and management command reads the same entries, so a frame
+    fetched by one worker serves the next request wherever it lands. Entries
+    expire after `ttl` seconds; frames over `max_bytes` aren't stored. Entry
+    keys carry a per-source version token, and invalidating swaps the token,
+    so stale entries are never read again and just expire. Concurrent misses
+    on the same key share one computation: threads wait for their process's
+    leader, other processes for a lease held in the cache (up to `lock_wait`
+    seconds).
+    """
+
+    def __init__(self, ttl=None, max_bytes=None, alias='reports', lock_wait=None):
+        self.ttl = _env_int('REPORT_CACHE_TTL', '300') if ttl is None else ttl
+        self.max_bytes = _env_int('REPORT_CACHE_MAX_BYTES', str(64 * 1024 * 1024)) if max_bytes is None else max_bytes
+        self.lock_wait = _env_int('REPORT_CACHE_LOCK_WAIT', '120') if lock_wait is None else lock_wait
+        self.alias = alias
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.ttl > 0 and self.max_bytes > 0
+
+    @property
+    def _cache(self):
+        return caches[self.alias]
+
+    def _version(self, source):
+        version_key = f'report-cache:version:{source}'
+        token = self._cache.get(version_key)
+        if token is None:
+            # A fresh random token (not a counter) so a culled version key can
+            # never bring old entries back.
+            self._cache.add(version_key, uuid.uuid4().hex, None)
+            token = self._cache.get(version_key)
+        return token
+
+    def _entry_key(self, key, source):
+        return f'report-cache:{self._version(ALL_SOURCES)}:{source}:{self._version(source)}:{key}'
+
+    def _lookup(self, entry_key):
+        try:
+            entry = self._cache.get(entry_key)
+        except Exception:
+            logger.warning('Report cache: lookup failed', exc_info=True)
+            return None
+        if entry is None:
+            return None
+        return _frame_from_bytes(entry['payload']), dict(entry['meta']), None
+
+    def _store(self, entry_key, df, meta):
+        try:
+            payload = _frame_to_bytes(df)
+        except Exception:
+            logger.warning('Report cache: frame not serializable, skipping', exc_info=True)
+            return
+        if len(payload) > self.max_bytes:
+            return
+        try:
+            self._cache.set(entry_key, {'payload': payload, 'meta': meta}, self.ttl)
+        except Exception:
+            logger.warning('Report cache: store failed', exc_info=True)
+
+    def _wait_for_peer(self, entry_key, lease_key):
+        deadline = time.monotonic() + self.lock_wait
+        while time.monotonic() < deadline:
+            time.sleep(0.2)
+            result = self._lookup(entry_key)
+            if result is not None:
+                return result
+            if self._cache.get(lease_key) is None:
+                return None
+        return None
+
+    def _compute_shared(self, entry_key, compute):
+        lease_key = f'{entry_key}:lease'
+        leased = self._cache.add(lease_key, os.getpid(), self.lock_wait)
+        if not leased:
+            # Another process is computing this key; use its result when it lands.
+            result = self._wait_for_peer(entry_key, lease_key)
+            if result is not None:
+                return result
+        try:
+            df, meta, error = compute()
+            if error is None:
+                self._store(entry_key, df, meta)
+            return df, meta, error
+        finally:
+            if leased:
+                self._cache.delete(lease_key)
+
+    def get(self, key, source):
+        """Cached `(df, meta, error)` for `key`, or None; never computes."""
+        if not self.enabled:
+            return None
+        return self._lookup(self._entry_key(key, source))
+
+    def get_or_compute(self, key, source, compute):
+        """Return `(df, meta, error)` for `key`, calling `compute()` on a miss.
+
+        `compute` returns the same triple; results with an error are passed
+        through but never cached.
+        """
+        if not self.enabled:
+            return compute()
+
+        entry_key = self._entry_key(key, source)
+        result = self._lookup(entry_key)
+        if result is not None:
+            return result
+
+        with self._lock:
+            flight = self._flights.get(entry_key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[entry_key] = flight
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            df, meta, error = flight.result
+            return df.copy(), dict(meta), error
+
+        try:
+            df, meta, error = self._compute_shared(entry_key, compute)
+            flight.result = (df, meta, error)
+            return df.copy(), dict(meta), error
+        except Exception as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(entry_key, None)
+            flight.done.set()
+
+    def invalidate(self, source=None):
+        """Make entries for `source` (all entries when omitted) unreachable in every process."""
+        try:
+            self._cache.set(f'report-cache:version:{source or ALL_SOURCES}', uuid.uuid4().hex, None)
+        except Exception:
+            logger.warning('Report cache: invalidation failed', exc_info=True)
+
+    def clear(self):
+        self.invalidate()
+
+
+report_cache = ReportCache()
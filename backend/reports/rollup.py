@@ -0,0 +1,155 @@
+import os
+
+from google.api_core.exceptions import NotFound
+from google.cloud import bigquery
+
+from .filters import is_pending
+from .summary import DDC_NAME_PATTERN, GB_NAME_PATTERN, bq_unlimited_sql
+
+# One row per (day, source, reseller, service, status, unlimited class), so
+# summaries scan days x services instead of every report row.
+ROLLUP_COLUMNS = [
+    'Day',
+    'Source',
+    'rs_username',
+    'rs_username_norm',
+    'ServiceName',
+    'Status',
+    'IsUnlimited',
+    'Count',
+    'SumGB',
+    'SumPrice',
+]
+ROLLUP_PARTITION_FIELD = 'Day'
+ROLLUP_CLUSTER_FIELDS = ['rs_username_norm']
+# Label set on a rollup a sync couldn't bring up to date; readers skip it until
+# the next successful rebuild (CREATE OR REPLACE drops the label).
+STALE_LABEL = 'stale'
+
+
+def rollup_enabled():
+    return os.getenv('BQ_ROLLUP', '1').strip().lower() in {'1', 'true', 'yes', 'on'}
+
+
+def rollup_table_id(table_id):
+    """Rollup table next to `table_id`; BQ_ROLLUP_TABLE may name it (optionally fully qualified)."""
+    project, dataset, table = table_id.split('.')
+    name = os.getenv('BQ_ROLLUP_TABLE', '').strip() or f'{table}_daily'
+    return name if '.' in name else f'{project}.{dataset}.{name}'
+
+
+def rollup_supports(filters):
+    """Serial filters select individual rows and Pending keeps each user's
+    latest row only; the rollup has neither."""
+    return not (filters.get('serial') or filters.get('sib_serial') or is_pending(filters))
+
+
+def rollup_usable(client, rollup_id):
+    """Whether `rollup_id` exists and isn't marked stale by a failed refresh."""
+    try:
+        table = client.get_table(rollup_id)
+    except NotFound:
+        return False
+    return (table.labels or {}).get(STALE_LABEL) != 'true'
+
+
+def mark_rollup_stale(client, table_id):
+    """Label the rollup of `table_id` stale so readers fall back to the report rows."""
+    try:
+        table = client.get_table(rollup_table_id(table_id))
+    except NotFound:
+        return None
+    table.labels = {**(table.labels or {}), STALE_LABEL: 'true'}
+    return client.update_table(table, ['labels'])
+
+
+def pattern_params():
+    return [
+        bigquery.ScalarQueryParameter('gb_name_pattern', 'STRING', GB_NAME_PATTERN),
+        bigquery.ScalarQueryParameter('ddc_name_pattern', 'STRING', DDC_NAME_PATTERN),
+    ]
+
+
+def _rollup_select(table_id, where):
+    return f"""
+SELECT
+    CreateDate AS Day,
+    rs_name AS Source,
+    rs_username,
+    rs_username_norm,
+    ServiceName,
+    LOWER(TRIM(ServiceStatus)) AS Status,
+    {bq_unlimited_sql('Package', 'ServiceName')} AS IsUnlimited,
+    COUNT(1) AS Count,
+    SUM(ROUND(Package, 2)) AS SumGB,
+    SUM(ServicePrice) AS SumPrice
+FROM `{table_id}`
+WHERE {where}
+GROUP BY Day, Source, rs_username, rs_username_norm, ServiceName, Status, IsUnlimited
+"""
+
+
+def rebuild_rollup(client, table_id, location=None):
+    """Recreate the whole rollup from `table_id` (after a full sync)."""
+    rollup_id = rollup_table_id(table_id)
+    query = (
+        f"CREATE OR REPLACE TABLE `{rollup_id}`\n"
+        f"PARTITION BY {ROLLUP_PARTITION_FIELD}\n"
+        f"CLUSTER BY {', '.join(ROLLUP_CLUSTER_FIELDS)}\n"
+        f"AS{_rollup_select(table_id, 'TRUE')}"
+    )
+    job_config = bigquery.QueryJobConfig(query_parameters=pattern_params())
+    client.query(query, job_config=job_config, location=location).result()
+    return rollup_id
+
+
+def refresh_rollup_days(client, table_id, location=None, stage_table=None, start_date=None, end_date=None,
+                        retention_days=None):
+    """Recompute only the rollup days a sync touched.
+
+    The days are the `CreateDate`s in `stage_table` (incremental MERGE) or the
+    `start_date`..`end_date` window (windowed reload; open-ended without
+    `end_date`). Days older than `retention_days` are dropped like the MERGE
+    drops their rows. Builds the rollup from scratch when it doesn't exist yet
+    or is marked stale.
+    """
+    rollup_id = rollup_table_id(table_id)
+    if not rollup_usable(client, rollup_id):
+        return rebuild_rollup(client, table_id, location=location)
+
+    params = pattern_params()
+    declare_sql = ''
+    if stage_table:
+        declare_sql = (
+            "  DECLARE changed_days ARRAY<DATE> DEFAULT (\n"
+            f"    SELECT ARRAY_AGG(DISTINCT CreateDate IGNORE NULLS) FROM `{stage_table}`\n"
+            "  );\n"
+        )
+
+        def _days(col):
+            return f"{col} IN UNNEST(changed_days)"
+    else:
+        params.append(bigquery.ScalarQueryParameter('window_start', 'DATE', start_date))
+        if end_date:
+            params.append(bigquery.ScalarQueryParameter('window_end', 'DATE', end_date))
+
+        def _days(col):
+            clause = f"{col} >= @window_start"
+            return f"{clause} AND {col} <= @window_end" if end_date else clause
+
+    retention_sql = ''
+    if retention_days:
+        retention_sql = (
+            f"  DELETE FROM `{rollup_id}` "
+            f"WHERE Day < DATE_SUB(CURRENT_DATE(), INTERVAL @retention_days DAY);\n"
+        )
+        params.append(bigquery.ScalarQueryParameter('retention_days', 'INT64', int(retention_days)))
+    query = f"""
+BEGIN
+{declare_sql}  DELETE FROM `{rollup_id}` WHERE {_days('Day')};
+  INSERT INTO `{rollup_id}` ({', '.join(ROLLUP_COLUMNS)}){_rollup_select(table_id, _days('CreateDate'))};
+{retention_sql}END;
+"""
+    job_config = bigquery.QueryJobConfig(query_parameters=params)
+    client.query(query, job_config=job_config, location=location).result()
+    return rollup_id
@@ -0,0 +1,156 @@
+import numpy as np
+import pandas as pd
+
+# A package is "unlimited" when it has no traffic quota and its name doesn't
+# advertise a GB size (DDC services count as unlimited either way). The same
+# patterns drive the pandas mask and the SQL used for server-side summaries;
+# they are valid Python, PCRE (MariaDB REGEXP) and RE2 (BigQuery) syntax.
+GB_NAME_PATTERN = r'(?i)(?:\d+(?:\.\d+)?)[\s_-]*(?:gb|gig)\b'
+DDC_NAME_PATTERN = r'(?i)\bDDC\b'
+
+SUMMARY_COLUMNS = ['Creator', 'ServiceName', 'IsUnlimited', 'Count', 'SumGB']
+
+
+def maria_unlimited_sql(package_expr, name_expr):
+    """SQL flag (1/0) for unlimited packages on MariaDB, with its `%s` params."""
+    sql = (
+        f"(({package_expr}) IS NULL OR ({package_expr}) <= 0) "
+        f"AND (COALESCE({name_expr}, '') NOT REGEXP %s OR COALESCE({name_expr}, '') REGEXP %s)"
+    )
+    return sql, [GB_NAME_PATTERN, DDC_NAME_PATTERN]
+
+
+def bq_unlimited_sql(package_expr, name_expr):
+    """SQL flag for unlimited packages on BigQuery; uses @gb_name_pattern/@ddc_name_pattern."""
+    return (
+        f"(({package_expr}) IS NULL OR ({package_expr}) <= 0) "
+        f"AND (NOT REGEXP_CONTAINS(IFNULL({name_expr}, ''), @gb_name_pattern) "
+        f"OR REGEXP_CONTAINS(IFNULL({name_expr}, ''), @ddc_name_pattern))"
+    )
+
+
+def _creator_rows(summary):
+    """Nest a (Creator, ServiceName, Count, SumGB) frame sorted by creator into template rows."""
+    if summary.empty:
+        return [], None, None
+    creators = summary['Creator'].to_numpy()
+    counts = summary['Count'].to_numpy()
+    sums = summary['SumGB'].astype(float).to_numpy()
+    details = [
+        {'ServiceName': service, 'Count': int(count), 'SumGB': round(float(sum_gb), 2)}
+        for service, count, sum_gb in zip(summary['ServiceName'].to_numpy(), counts, sums)
+    ]
+    # Group boundaries of the sorted creators; totals per creator in one reduceat.
+    starts = np.flatnonzero(np.r_[True, creators[1:] != creators[:-1]])
+    ends = np.r_[starts[1:], len(creators)]
+    total_gb = np.add.reduceat(sums, starts)
+    total_count = np.add.reduceat(counts, starts)
+    creator_rows = [
+        {
+            'Creator': creators[start],
+            'TotalGB': round(float(gb), 2),
+            'TotalCount': int(count),
+            'Details': details[start:end],
+        }
+        for start, end, gb, count in zip(starts, ends, total_gb, total_count)
+    ]
+    return creator_rows, round(float(sums.sum()), 2), int(counts.sum())
+
+
+def package_column(df):
+    if 'Package' in df.columns:
+        return 'Package'
+    if 'PackageValue' in df.columns:
+        return 'PackageValue'
+    return None
+
+
+def build_summary(df, creator_col):
+    """Per-creator service counts and GB sums for detail rows, as `(creator_rows, grand_total, grand_count)`.
+
+    One groupby over (creator, service); rows with no creator or service are
+    left out, matching the pandas default.
+    """
+    pkg_col = package_column(df)
+    if df.empty or not creator_col or 'ServiceName' not in df.columns or not pkg_col:
+        return [], None, None
+    summary = (
+        pd.DataFrame({
+            'Creator': df[creator_col],
+            'ServiceName': df['ServiceName'],
+            'Package': pd.to_numeric(df[pkg_col], errors='coerce'),
+        })
+        .groupby(['Creator', 'ServiceName'], sort=True)
+        .agg(Count=('Package', 'size'), SumGB=('Package', 'sum'))
+        .reset_index()
+    )
+    return _creator_rows(summary)
+
+
+def _totals_rows(grouped, grand_total, grand_count, creator_col, pkg_col, columns):
+    data = {c: [''] * (len(grouped) + 1) for c in columns}
+    data[creator_col] = [f"{creator} Total" for creator in grouped.index] + ['Grand Total']
+    data[pkg_col] = [round(float(v), 2) for v in grouped['sum'].fillna(0)] + [round(grand_total, 2)]
+    data['Count'] = [int(v) for v in grouped['size']] + [int(grand_count)]
+    return pd.DataFrame(data)
+
+
+def totals_frame(df, creator_col, pkg_col, columns=None):
+    """Per-creator total rows plus a grand total, shaped like `columns` with blanks elsewhere."""
+    columns = list(columns if columns is not None else df.columns)
+    pkg_numeric = pd.to_numeric(df[pkg_col], errors='coerce')
+    grouped = pkg_numeric.groupby(df[creator_col], sort=True).agg(['sum', 'size'])
+    grand_total = float(pkg_numeric.sum()) if pkg_numeric.notna().any() else 0
+    return _totals_rows(grouped, grand_total, len(df), creator_col, pkg_col, columns)
+
+
+def totals_frame_from_aggregates(agg_df, creator_col, pkg_col, columns):
+    """`totals_frame` rows from (Creator, Count, SumGB) aggregates instead of the detail rows.
+
+    Rows for the same creator (e.g. from several sources) are added together;
+    rows without a creator only count toward the grand total.
+    """
+    sums = pd.to_numeric(agg_df['SumGB'], errors='coerce')
+    counts = pd.to_numeric(agg_df['Count'], errors='coerce').fillna(0)
+    grouped = (
+        pd.DataFrame({'sum': sums.fillna(0), 'size': counts})
+        .groupby(agg_df['Creator'], sort=True)
+        .sum()
+    )
+    grand_total = float(sums.sum()) if sums.notna().any() else 0
+    return _totals_rows(grouped, grand_total, counts.sum(), creator_col, pkg_col, list(columns))
+
+
+def append_totals(df, creator_col):
+    """Return `df` with a `Count` column and per-creator/grand total rows appended."""
+    pkg_col = package_column(df)
+    if df.empty or not creator_col or not pkg_col:
+        return df
+    if 'Count' not in df.columns:
+        df = df.assign(Count=None)
+    return pd.concat([df, totals_frame(df, creator_col, pkg_col)], ignore_index=True)
+
+
+def summaries_from_aggregates(agg_df):
+    """Build `(limited, unlimited)` summaries from (Creator, ServiceName, IsUnlimited, Count, SumGB) rows.
+
+    Each summary is `(creator_rows, grand_total, grand_count)` in the shape the
+    report templates and summary PDFs expect. Rows for the same creator and
+    service (e.g. from several sources) are added together.
+    """
+    if agg_df is None or agg_df.empty:
+        empty = ([], None, None)
+        return empty, empty
+
+    df = agg_df.dropna(subset=['Creator', 'ServiceName']).copy()
+    df['Count'] = pd.to_numeric(df['Count'], errors='coerce').fillna(0)
+    df['SumGB'] = pd.to_numeric(df['SumGB'], errors='coerce').fillna(0.0)
+    df['IsUnlimited'] = df['IsUnlimited'].fillna(False).astype(bool)
+    df = (
+        df.groupby(['IsUnlimited', 'Creator', 'ServiceName'], sort=True)
+        .agg(Count=('Count', 'sum'), SumGB=('SumGB', 'sum'))
+        .reset_index()
+    )
+    limited = _creator_rows(df[~df['IsUnlimited']])
+    unlimited = _creator_rows(df[df['IsUnlimited']])
+    return limited, unlimited
@@ -1,25 +1,46 @@
 import os
 import json
 import logging
+import queue
 import tempfile
+import threading
+import time
 import uuid
-from datetime import datetime, timezone
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
 from google.cloud import bigquery
 import pandas as pd
 import pymysql
 
-from pymysql.cursors import DictCursor
+from pymysql.cursors import DictCursor, SSDictCursor
+
+from .bq import (
+    FrameFileWriter,
+    LegacyReportTableError,
+    ensure_report_table,
+    load_df_to_bq,
+    load_file_to_bq,
+    resolve_load_format,
+)
+from .models import SyncWatermark
+from .report_cache import report_cache
+from .rollup import mark_rollup_stale, rebuild_rollup, refresh_rollup_days, rollup_enabled
+from maria_cache.models import Reseller, Service
+from maria_cache.sync import SERVICE_TRAFFIC_FIELDS, _package_gb
 
 logger = logging.getLogger(__name__)
 LOG_PATH = os.getenv('SYNC_LOG_PATH') or os.path.join(os.path.dirname(__file__), 'sync_logs.jsonl')
+_LOG_LOCK = threading.Lock()
 
 
 def _write_sync_log(entry):
     log_dir = os.path.dirname(LOG_PATH)
     if log_dir:
         os.makedirs(log_dir, exist_ok=True)
-    with open(LOG_PATH, 'a', encoding='utf-8') as handle:
-        handle.write(json.dumps(entry, ensure_ascii=True) + '\n')
+    with _LOG_LOCK:
+        with open(LOG_PATH, 'a', encoding='utf-8') as handle:
+            handle.write(json.dumps(entry, ensure_ascii=True) + '\n')
 
 
 def log_sync_event(event_type, message, **data):
@@ -67,14 +88,18 @@ def _parse_sources():
             if len(parts) < 6:
                 continue
             name, host, port, db, user, password = parts[:6]
-            sources.append({
+            source = {
                 'name': name or host,
                 'host': host,
                 'port': int(port),
                 'db': db,
                 'user': user,
                 'password': password,
-            })
+            }
+            # Optional 7th field: concurrent range readers for this source.
+            if len(parts) > 6 and parts[6]:
+                source['range_workers'] = parts[6]
+            sources.append(source)
         if sources:
             return sources
 
@@ -89,9 +114,178 @@ def _parse_sources():
     }]
 
 
-def _fetch_maria_rows(source, limit=0, days=None, start_date=None, end_date=None):
-    logger.info("Sync: fetching rows from %s (%s:%s/%s)", source.get('name'), source.get('host'), source.get('port'), source.get('db'))
-    query = """
+REPORT_COLUMNS = [
+    'id',
+    'CreateDate',
+    'rs_userid',
+    'rs_username',
+    'rs_name',
+    'UserServiceID',
+    'username',
+    'ServiceName',
+    'ServicePrice',
+    'Package',
+    'ServiceStatus',
+    'StartDate',
+    'EndDate',
+    'rs_username_norm',
+]
+
+
+def _resolve_chunk_size(chunk_size=None):
+    if chunk_size is None:
+        chunk_size = os.getenv('SYNC_CHUNK_SIZE', '50000')
+    try:
+        chunk_size = int(chunk_size)
+    except (TypeError, ValueError):
+        chunk_size = 50000
+    return chunk_size if chunk_size > 0 else 50000
+
+
+def _resolve_workers(workers=None):
+    if workers is None:
+        workers = os.getenv('SYNC_FETCH_WORKERS', '1')
+    try:
+        workers = int(workers)
+    except (TypeError, ValueError):
+        workers = 1
+    return max(1, workers)
+
+
+def _resolve_lookback_days(lookback_days=None):
+    if lookback_days is None:
+        lookback_days = os.getenv('SYNC_INCREMENTAL_LOOKBACK_DAYS', '3')
+    try:
+        lookback_days = int(lookback_days)
+    except (TypeError, ValueError):
+        lookback_days = 3
+    return max(0, lookback_days)
+
+
+def _resolve_source_timeout(timeout=None):
+    if timeout is None:
+        timeout = os.getenv('SYNC_SOURCE_TIMEOUT', '0')
+    try:
+        timeout = float(timeout)
+    except (TypeError, ValueError):
+        timeout = 0
+    return timeout if timeout > 0 else None
+
+
+def _stream_enabled(stream=None):
+    if stream is None:
+        return os.getenv('SYNC_STREAM', '0') == '1'
+    return bool(stream)
+
+
+def _swap_enabled(swap=None):
+    if swap is None:
+        return os.getenv('SYNC_SWAP', '0') == '1'
+    return bool(swap)
+
+
+def _pipeline_enabled(pipeline=None):
+    if pipeline is None:
+        return os.getenv('SYNC_PIPELINE', '0') == '1'
+    return bool(pipeline)
+
+
+def _resolve_pipeline_queue(size=None):
+    if size is None:
+        size = os.getenv('SYNC_PIPELINE_QUEUE', '4')
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        size = 4
+    return max(1, size)
+
+
+def _resolve_pipeline_load_rows(rows=None):
+    if rows is None:
+        rows = os.getenv('SYNC_PIPELINE_LOAD_ROWS', '500000')
+    try:
+        rows = int(rows)
+    except (TypeError, ValueError):
+        rows = 500000
+    return rows if rows > 0 else 500000
+
+
+def _connect_source(source, cursorclass=DictCursor, timeout=None):
+    cfg = {
+        'host': source['host'],
+        'port': source['port'],
+        'user': source['user'],
+        'password': source['password'],
+        'db': source['db'],
+        'charset': 'utf8mb4',
+        'cursorclass': cursorclass,
+    }
+    if timeout:
+        cfg['connect_timeout'] = max(1, int(timeout))
+        cfg['read_timeout'] = max(1, int(timeout))
+    return pymysql.connect(**cfg)
+
+
+def _sync_filters(days=None, start_date=None, end_date=None, since_id=None, since_date=None, id_range=None):
+    filters = []
+    params = []
+    if days is not None:
+        try:
+            days_val = int(days)
+        except (TypeError, ValueError):
+            days_val = 0
+        if days_val > 0:
+            filters.append("TName.CDT >= DATE_SUB(CURDATE(), INTERVAL %s DAY)")
+            params.append(days_val)
+
+    if start_date:
+        filters.append("TName.CDT >= %s")
+        params.append(start_date)
+
+    if end_date:
+        filters.append("TName.CDT <= %s")
+        params.append(end_date)
+
+    # Incremental pulls: rows past the id watermark, plus recent rows again so
+    # status/date changes inside the lookback window are picked up.
+    if since_id is not None and since_date:
+        filters.append("(TName.User_ServiceBase_Id > %s OR TName.CDT >= %s)")
+        params.extend([since_id, since_date])
+    elif since_id is not None:
+        filters.append("TName.User_ServiceBase_Id > %s")
+        params.append(since_id)
+
+    if id_range is not None:
+        filters.append("TName.User_ServiceBase_Id BETWEEN %s AND %s")
+        params.extend(id_range)
+    return filters, params
+
+
+# Fact-only variant of the sync SELECT: reseller and service attributes are
+# joined locally from maria_cache (see `_DimensionLookup`).
+_NARROW_SYNC_SELECT = """
+SELECT
+    DATE(TName.CDT) AS CreateDate,
+    TName.Creator_Id AS rs_userid,
+    TName.User_ServiceBase_Id AS UserServiceID,
+    Hu.Username AS username,
+    TName.Service_Id AS Service_Id,
+    TName.ServicePrice AS ServicePrice,
+    TName.ServiceStatus AS ServiceStatus,
+    DATE_FORMAT(NULLIF(TName.StartDate, '0000-00-00'), '%%Y-%%m-%%d') AS StartDate,
+    DATE_FORMAT(NULLIF(TName.EndDate, '0000-00-00'), '%%Y-%%m-%%d') AS EndDate
+FROM Huser_servicebase TName
+JOIN Huser Hu ON TName.User_Id = Hu.User_Id
+"""
+
+
+def _dim_offload_enabled():
+    return os.getenv('SYNC_DIM_OFFLOAD', '0') == '1'
+
+
+def _build_sync_query(limit=0, days=None, start_date=None, end_date=None, ordered=True,
+                      since_id=None, since_date=None, id_range=None, narrow=False):
+    query = _NARROW_SYNC_SELECT if narrow else """
 SELECT
     DATE(TName.CDT) AS CreateDate,
     TName.Creator_Id AS rs_userid,
@@ -114,65 +308,324 @@ LEFT JOIN Hreseller Hrc ON TName.Creator_Id = Hrc.Reseller_Id
 LEFT JOIN Hservice Hse ON TName.Service_Id = Hse.Service_Id
 """
 
-    filters = []
-    params = []
-    if days is not None:
-        try:
-            days_val = int(days)
-        except (TypeError, ValueError):
-            days_val = 0
-        if days_val > 0:
-            filters.append("TName.CDT >= DATE_SUB(CURDATE(), INTERVAL %s DAY)")
-            params.append(days_val)
-
-    if start_date:
-        filters.append("TName.CDT >= %s")
-        params.append(start_date)
-
-    if end_date:
-        filters.append("TName.CDT <= %s")
-        params.append(end_date)
-
+    filters, params = _sync_filters(
+        days=days,
+        start_date=start_date,
+        end_date=end_date,
+        since_id=since_id,
+        since_date=since_date,
+        id_range=id_range,
+    )
     if filters:
         query += "\nWHERE " + " AND ".join(filters)
 
-    query += "\nORDER BY TName.CDT DESC"
+    # A LIMIT needs the ordering to pick the newest rows; a plain stream does not,
+    # and skipping the sort lets MariaDB start sending rows immediately.
+    if ordered or (limit and limit > 0):
+        query += "\nORDER BY TName.CDT DESC"
     if limit and limit > 0:
         query += f"\nLIMIT {int(limit)}"
+    return query, params
 
-    conn = pymysql.connect(
-        host=source['host'],
-        port=source['port'],
-        user=source['user'],
-        password=source['password'],
-        db=source['db'],
-        charset='utf8mb4',
-        cursorclass=DictCursor,
+
+SHADOW_SUFFIX = '_shadow'
+
+# Row ids are `source key * ROW_ID_SOURCE_FACTOR + UserServiceID`, so the same
+# MariaDB row always lands on the same id no matter which sync path (or the
+# backfill) loaded it. Legacy hspdata rows have no source; the backfill gives
+# them `-UserServiceID`, below every MariaDB id.
+ROW_ID_SOURCE_FACTOR = 10 ** 12
+
+
+def _source_key(source_name):
+    return zlib.crc32(str(source_name or '').encode('utf-8')) % 999999 + 1
+
+
+def _stable_ids(source_name, user_service_ids):
+    return user_service_ids + _source_key(source_name) * ROW_ID_SOURCE_FACTOR
+
+
+class _DimensionLookup:
+    """Reseller and service attributes of one source for narrow sync batches.
+
+    Loaded once from maria_cache; ids the cache has not seen yet (created since
+    the last cache sync) are looked up on the source in one small query per
+    batch, so the result matches the server-side joins.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        name = source.get('name')
+        self.reseller_names = dict(
+            Reseller.objects.filter(source_name=name).values_list('source_id', 'name')
+        )
+        self.service_names = {}
+        self.service_packages = {}
+        for service_id, service_name, package_gb in Service.objects.filter(source_name=name).values_list(
+            'source_id', 'name', 'package_gb',
+        ):
+            self.service_names[service_id] = service_name
+            self.service_packages[service_id] = package_gb
+        self._lock = threading.Lock()
+
+    def _fill_missing(self, reseller_ids, service_ids):
+        conn = _connect_source(self.source)
+        try:
+            with conn.cursor() as cur:
+                if reseller_ids:
+                    placeholders = ', '.join(['%s'] * len(reseller_ids))
+                    cur.execute(
+                        f"SELECT Reseller_Id, ResellerName FROM Hreseller WHERE Reseller_Id IN ({placeholders})",
+                        reseller_ids,
+                    )
+                    for row in cur.fetchall():
+                        self.reseller_names[row['Reseller_Id']] = row['ResellerName']
+                if service_ids:
+                    placeholders = ', '.join(['%s'] * len(service_ids))
+                    cur.execute(
+                        f"SELECT Service_Id, ServiceName, {', '.join(SERVICE_TRAFFIC_FIELDS)} "
+                        f"FROM Hservice WHERE Service_Id IN ({placeholders})",
+                        service_ids,
+                    )
+                    for row in cur.fetchall():
+                        self.service_names[row['Service_Id']] = row['ServiceName']
+                        self.service_packages[row['Service_Id']] = _package_gb(row)
+        finally:
+            conn.close()
+        # Ids missing on the source too stay NULL, as with the LEFT JOINs.
+        for reseller_id in reseller_ids:
+            self.reseller_names.setdefault(reseller_id, None)
+        for service_id in service_ids:
+            self.service_names.setdefault(service_id, None)
+            self.service_packages.setdefault(service_id, None)
+
+    def apply(self, df):
+        reseller_ids = pd.to_numeric(df['rs_userid'], errors='coerce')
+        service_ids = pd.to_numeric(df['Service_Id'], errors='coerce')
+        with self._lock:
+            missing_resellers = [int(i) for i in reseller_ids.dropna().unique() if int(i) not in self.reseller_names]
+            missing_services = [int(i) for i in service_ids.dropna().unique() if int(i) not in self.service_names]
+            if missing_resellers or missing_services:
+                self._fill_missing(missing_resellers, missing_services)
+        df['rs_username'] = reseller_ids.map(self.reseller_names)
+        df['ServiceName'] = service_ids.map(self.service_names)
+        df['Package'] = service_ids.map(self.service_packages)
+        return df.drop(columns=['Service_Id'])
+
+
+def _typed_batch(rows, source, dims=None):
+    df = pd.DataFrame(rows)
+    if df.empty:
+        return df
+    if dims is not None:
+        df = dims.apply(df)
+    df['rs_name'] = source['name']
+    df['CreateDate'] = pd.to_datetime(df['CreateDate'], errors='coerce').dt.date
+    for col in ['rs_userid', 'UserServiceID']:
+        df[col] = pd.to_numeric(df[col], errors='coerce').astype('Int64')
+    df['id'] = _stable_ids(source['name'], df['UserServiceID'])
+    df['rs_username_norm'] = df['rs_username'].astype('string').str.strip().str.lower()
+    for col in ['ServicePrice', 'Package']:
+        df[col] = pd.to_numeric(df[col], errors='coerce').astype('float64')
+    return df[REPORT_COLUMNS]
+
+
+def _iter_maria_batches(source, chunk_size=None, limit=0, days=None, start_date=None, end_date=None,
+                        deadline=None, since_id=None, since_date=None):
+    """Stream sync rows from one source as typed DataFrames of at most `chunk_size` rows.
+
+    Uses an unbuffered server-side cursor, so only one chunk is held in memory
+    at a time. `since_id`/`since_date` restrict the stream to incremental rows.
+    `deadline` is a `time.monotonic()` value after which the stream gives up
+    with `TimeoutError`; socket reads are bounded by the time left as well.
+
+    Streams are not split into id ranges like buffered fetches
+    (`_fetch_maria_ranges`): they exist to keep memory flat, and N concurrent
+    unbuffered cursors would hold N snapshots open for the whole upload while
+    the spool/pipeline consumer, not the single cursor, sets the pace.
+    """
+    chunk_size = _resolve_chunk_size(chunk_size)
+    logger.info(
+        "Sync: streaming rows from %s (%s:%s/%s) chunk_size=%s",
+        source.get('name'), source.get('host'), source.get('port'), source.get('db'), chunk_size,
+    )
+    dims = _DimensionLookup(source) if _dim_offload_enabled() else None
+    query, params = _build_sync_query(
+        limit=limit,
+        days=days,
+        start_date=start_date,
+        end_date=end_date,
+        ordered=False,
+        since_id=since_id,
+        since_date=since_date,
+        narrow=dims is not None,
+    )
+    remaining = None
+    if deadline is not None:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f"Source {source.get('name')} timed out before connecting")
+    conn = _connect_source(source, cursorclass=SSDictCursor, timeout=remaining)
+    total = 0
+    try:
+        # Closing an unbuffered cursor drains the remaining rows, so an early
+        # stop only closes the connection below.
+        cur = conn.cursor()
+        cur.execute(query, params)
+        while True:
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(f"Source {source.get('name')} timed out after {total} rows")
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                break
+            df = _typed_batch(rows, source, dims=dims)
+            total += len(df)
+            yield df
+        logger.info("Sync: streamed %s rows from %s", total, source.get('name'))
+    except Exception:
+        logger.exception("Sync: failed to stream rows from %s", source.get('name'))
+        raise
+    finally:
+        conn.close()
+
+
+def _resolve_range_workers(source, range_workers=None):
+    if range_workers is None:
+        range_workers = source.get('range_workers') or os.getenv('SYNC_RANGE_WORKERS', '1')
+    try:
+        range_workers = int(range_workers)
+    except (TypeError, ValueError):
+        range_workers = 1
+    return max(1, range_workers)
+
+
+def _id_ranges(min_id, max_id, parts):
+    step = max(1, -(-(max_id - min_id + 1) // parts))
+    return [(lo, min(lo + step - 1, max_id)) for lo in range(min_id, max_id + 1, step)]
+
+
+def _resolve_snapshot_lock_timeout():
+    try:
+        timeout = int(os.getenv('SYNC_SNAPSHOT_LOCK_TIMEOUT', '10'))
+    except (TypeError, ValueError):
+        timeout = 10
+    return max(1, timeout)
+
+
+# Tables the sync SELECT reads; see `_open_range_snapshots`.
+_SYNC_TABLES = ('Huser_servicebase', 'Huser', 'Hreseller', 'Hservice')
+
+
+def _open_range_snapshots(source, conns):
+    """Start consistent-snapshot transactions on all `conns` at a single point in time.
+
+    Snapshots opened one after another would each see different commits, so a
+    separate connection holds LOCK TABLES ... READ on the sync tables (which
+    also waits out in-flight writers) until every snapshot is open; writers
+    are held off for milliseconds. Returns False without starting anything
+    when the lock can't be had within SYNC_SNAPSHOT_LOCK_TIMEOUT seconds or
+    the user lacks the LOCK TABLES privilege.
+    """
+    lock_conn = _connect_source(source)
+    try:
+        try:
+            with lock_conn.cursor() as cur:
+                cur.execute("SET SESSION lock_wait_timeout = %s", [_resolve_snapshot_lock_timeout()])
+                cur.execute(f"LOCK TABLES {', '.join(f'{table} READ' for table in _SYNC_TABLES)}")
+        except pymysql.MySQLError as exc:
+            logger.warning("Sync: could not lock %s for a shared snapshot: %s", source.get('name'), exc)
+            return False
+        try:
+            for conn in conns:
+                with conn.cursor() as cur:
+                    cur.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT")
+        finally:
+            with lock_conn.cursor() as cur:
+                cur.execute("UNLOCK TABLES")
+    finally:
+        lock_conn.close()
+    return True
+
+
+def _fetch_maria_ranges(source, range_workers, days=None, start_date=None, end_date=None):
+    """Fetch one source as `range_workers` User_ServiceBase_Id ranges on parallel connections.
+
+    All connections read from snapshots opened together under a brief table
+    lock (`_open_range_snapshots`), so the ranges add up to the source as of a
+    single moment. When the lock isn't available the source is read on one
+    connection instead of splitting it over unaligned snapshots.
+    """
+    filters, params = _sync_filters(days=days, start_date=start_date, end_date=end_date)
+    where = f"WHERE {' AND '.join(filters)}" if filters else ''
+    conns = []
+    try:
+        for _ in range(range_workers):
+            conns.append(_connect_source(source))
+        if not _open_range_snapshots(source, conns):
+            extra = conns[1:]
+            del conns[1:]
+            for conn in extra:
+                conn.close()
+            with conns[0].cursor() as cur:
+                cur.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT")
+        with conns[0].cursor() as cur:
+            cur.execute(
+                f"SELECT MIN(TName.User_ServiceBase_Id) AS lo, MAX(TName.User_ServiceBase_Id) AS hi "
+                f"FROM Huser_servicebase TName {where}",
+                params,
+            )
+            bounds = cur.fetchone()
+        if not bounds or bounds['lo'] is None:
+            return pd.DataFrame()
+
+        dims = _DimensionLookup(source) if _dim_offload_enabled() else None
+        ranges = _id_ranges(int(bounds['lo']), int(bounds['hi']), len(conns))
+        logger.info(
+            "Sync: fetching %s in %s id ranges (%s..%s)", source.get('name'), len(ranges), bounds['lo'], bounds['hi'],
+        )
+
+        def _fetch_range(conn, id_range):
+            query, range_params = _build_sync_query(
+                days=days, start_date=start_date, end_date=end_date, ordered=False, id_range=id_range,
+                narrow=dims is not None,
+            )
+            with conn.cursor() as cur:
+                cur.execute(query, range_params)
+                return _typed_batch(cur.fetchall(), source, dims=dims)
+
+        with ThreadPoolExecutor(max_workers=len(ranges), thread_name_prefix='sync-range') as pool:
+            frames = [df for df in pool.map(_fetch_range, conns, ranges) if not df.empty]
+    finally:
+        for conn in conns:
+            conn.close()
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+
+def _fetch_maria_rows(source, limit=0, days=None, start_date=None, end_date=None, range_workers=None):
+    range_workers = _resolve_range_workers(source, range_workers)
+    # A LIMIT picks the newest rows across the whole source, so it cannot be split.
+    if range_workers > 1 and not (limit and limit > 0):
+        try:
+            df = _fetch_maria_ranges(source, range_workers, days=days, start_date=start_date, end_date=end_date)
+        except Exception:
+            logger.exception("Sync: failed to fetch rows from %s", source.get('name'))
+            raise
+        logger.info("Sync: fetched %s rows from %s", len(df), source.get('name'))
+        return df
+
+    logger.info("Sync: fetching rows from %s (%s:%s/%s)", source.get('name'), source.get('host'), source.get('port'), source.get('db'))
+    dims = _DimensionLookup(source) if _dim_offload_enabled() else None
+    query, params = _build_sync_query(
+        limit=limit, days=days, start_date=start_date, end_date=end_date, narrow=dims is not None,
     )
+    conn = _connect_source(source)
     try:
         with conn.cursor() as cur:
             cur.execute(query, params)
             rows = cur.fetchall()
-            df = pd.DataFrame(rows)
-            if not df.empty:
-                df['rs_name'] = source['name']
-                df['id'] = range(1, len(df) + 1)
-                ordered_cols = [
-                    'id',
-                    'CreateDate',
-                    'rs_userid',
-                    'rs_username',
-                    'rs_name',
-                    'UserServiceID',
-                    'username',
-                    'ServiceName',
-                    'ServicePrice',
-                    'Package',
-                    'ServiceStatus',
-                    'StartDate',
-                    'EndDate',
-                ]
-                df = df[ordered_cols]
+            df = _typed_batch(rows, source, dims=dims)
             logger.info("Sync: fetched %s rows from %s", len(df), source.get('name'))
             return df
     except Exception:
@@ -182,6 +635,150 @@ LEFT JOIN Hservice Hse ON TName.Service_Id = Hse.Service_Id
         conn.close()
 
 
+class _ReportSpool:
+    """Temporary files that typed batches are appended to before a single load job.
+
+    Each source writes to its own part so a source that fails halfway can be
+    discarded without leaving partial rows behind; `finish()` joins the
+    committed parts into one Parquet (or CSV) file.
+    """
+
+    def __init__(self, load_format=None):
+        self.rows = 0
+        self.path = None
+        self.load_format = resolve_load_format(load_format)
+        self._parts = []
+        self._lock = threading.Lock()
+
+    def part(self):
+        return _SpoolPart(self)
+
+    def _temp_path(self):
+        with tempfile.NamedTemporaryFile(suffix=f'.{self.load_format}', delete=False) as tmp:
+            return tmp.name
+
+    def finish(self):
+        self.path = self._temp_path()
+        writer = FrameFileWriter(self.path, load_format=self.load_format)
+        try:
+            for part in self._parts:
+                writer.append_file(part.path)
+                part.discard()
+        finally:
+            writer.close()
+        self._parts = []
+        return self.path
+
+    def cleanup(self):
+        for part in self._parts:
+            part.discard()
+        self._parts = []
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class _SpoolPart:
+    def __init__(self, spool):
+        self.path = spool._temp_path()
+        self.rows = 0
+        self._spool = spool
+        self._writer = FrameFileWriter(self.path, load_format=spool.load_format, header=False)
+
+    def write(self, df):
+        if df is None or df.empty:
+            return 0
+        self._writer.write(df)
+        self.rows += len(df)
+        return len(df)
+
+    def commit(self):
+        self._writer.close()
+        with self._spool._lock:
+            self._spool._parts.append(self)
+            self._spool.rows += self.rows
+
+    def discard(self):
+        self._writer.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def _fetch_maria_batched(source, chunk_size=None, deadline=None, **fetch_kwargs):
+    """Buffered fetch built on the chunked stream so `deadline` can be enforced."""
+    batches = list(_iter_maria_batches(source, chunk_size=chunk_size, deadline=deadline, **fetch_kwargs))
+    if not batches:
+        return pd.DataFrame()
+    return pd.concat(batches, ignore_index=True)
+
+
+def _run_per_source(sources, fetch, workers=1, timeout=None, event_prefix=''):
+    """Call `fetch(source, deadline)` for each source and log per-source events.
+
+    With `workers` > 1 the sources run on a bounded thread pool, so total time
+    tracks the slowest source rather than the sum. `timeout` (seconds) starts
+    when a source starts. A failing or timed-out source is logged and skipped;
+    returns `{source_name: rows}` for the sources that succeeded.
+    """
+    results = {}
+
+    def _run(source):
+        name = source.get('name')
+        log_sync_event(
+            f'{event_prefix}source_start',
+            'Fetching rows from source',
+            source=name,
+            host=source.get('host'),
+            db=source.get('db'),
+        )
+        started = time.monotonic()
+        deadline = started + timeout if timeout else None
+        try:
+            rows = fetch(source, deadline)
+        except Exception as exc:
+            logger.exception("Sync: source failed: %s", name)
+            log_sync_event(
+                f'{event_prefix}source_error',
+                'Source fetch timed out' if isinstance(exc, TimeoutError) else 'Source fetch failed',
+                source=name,
+                error=str(exc),
+                elapsed=round(time.monotonic() - started, 2),
+            )
+            return
+        log_sync_event(
+            f'{event_prefix}source_success',
+            'Fetched rows from source',
+            source=name,
+            rows=rows,
+            elapsed=round(time.monotonic() - started, 2),
+        )
+        results[name] = rows
+
+    workers = min(_resolve_workers(workers), max(1, len(sources)))
+    if workers == 1:
+        for source in sources:
+            _run(source)
+        return results
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='sync-fetch') as pool:
+        futures = [pool.submit(_run, source) for source in sources]
+        for future in as_completed(futures):
+            future.result()
+    return results
+
+
+def _spool_source(spool, source, chunk_size=None, **fetch_kwargs):
+    """Stream one source into its own spool part and return the committed row count."""
+    part = spool.part()
+    try:
+        for batch in _iter_maria_batches(source, chunk_size=chunk_size, **fetch_kwargs):
+            part.write(batch)
+    except Exception:
+        part.discard()
+        raise
+    part.commit()
+    return part.rows
+
+
 def _fetch_reseller_map(source):
     logger.info("Sync: fetching reseller map from %s", source.get('name'))
     query = """
@@ -216,7 +813,23 @@ WHERE ResellerName IS NOT NULL AND ResellerName <> ''
         conn.close()
 
 
-def sync_maria_to_bigquery(limit=0, write_disposition='WRITE_TRUNCATE', days=None, auto=False):
+def check_report_table(project, table_id, location, auto=False):
+    """Fail before reading any source when `table_id` is a legacy report table.
+
+    Loads and MERGEs into a table that predates the partitioned layout fail
+    only after every source was fetched, so the table is checked up front.
+    """
+    try:
+        ensure_report_table(bigquery.Client(project=project), table_id, location=location)
+    except LegacyReportTableError as exc:
+        logger.error("Sync: %s", exc)
+        log_sync_event('sync_error', 'Legacy report table', table_id=table_id, error=str(exc), auto=auto)
+        raise
+
+
+def sync_maria_to_bigquery(limit=0, write_disposition='WRITE_TRUNCATE', days=None, auto=False,
+                           stream=None, chunk_size=None, workers=None, source_timeout=None, load_format=None,
+                           pipeline=None, swap=None):
     project = os.getenv('BQ_PROJECT')
     dataset = os.getenv('BQ_DATASET')
     table = os.getenv('BQ_TABLE')
@@ -225,7 +838,15 @@ def sync_maria_to_bigquery(limit=0, write_disposition='WRITE_TRUNCATE', days=Non
         raise RuntimeError('BigQuery config missing: BQ_PROJECT, BQ_DATASET, BQ_TABLE')
 
     table_id = f"{project}.{dataset}.{table}"
+    stream = _stream_enabled(stream)
+    pipeline = _pipeline_enabled(pipeline)
+    swap = _swap_enabled(swap)
+    chunk_size = _resolve_chunk_size(chunk_size)
+    workers = _resolve_workers(workers)
+    source_timeout = _resolve_source_timeout(source_timeout)
+    load_format = resolve_load_format(load_format)
 
+    check_report_table(project, table_id, location, auto=auto)
     sources = _parse_sources()
     source_names = [s.get('name') for s in sources]
     logger.info("Sync: starting BigQuery load to %s", table_id)
@@ -238,39 +859,118 @@ def sync_maria_to_bigquery(limit=0, write_disposition='WRITE_TRUNCATE', days=Non
         days=days,
         auto=auto,
         write_disposition=write_disposition,
+        stream=stream,
+        pipeline=pipeline,
+        swap=swap,
+        chunk_size=chunk_size if stream or pipeline else None,
+        workers=workers,
+        source_timeout=source_timeout,
+        load_format=load_format,
     )
-    all_dfs = []
-    for source in sources:
-        try:
-            log_sync_event(
-                'source_start',
-                'Fetching rows from source',
-                source=source.get('name'),
-                host=source.get('host'),
-                db=source.get('db'),
+
+    # In swap mode every path loads a shadow table instead of the live one;
+    # readers keep seeing the previous table until the validated swap below.
+    load_table = f"{table_id}{SHADOW_SUFFIX}" if swap else table_id
+    load_disposition = 'WRITE_TRUNCATE' if swap else write_disposition
+    try:
+        if pipeline:
+            results = _sync_pipelined(
+                sources, load_table, project, dataset, location, limit, load_disposition, days, auto, chunk_size,
+                workers, source_timeout, load_format,
             )
-            df = _fetch_maria_rows(source, limit=limit, days=days)
-            log_sync_event(
-                'source_success',
-                'Fetched rows from source',
-                source=source.get('name'),
-                rows=len(df),
+        elif stream:
+            results = _sync_streamed(
+                sources, load_table, project, location, limit, load_disposition, days, auto, chunk_size,
+                workers, source_timeout, load_format,
             )
-            if not df.empty:
-                all_dfs.append(df)
-        except Exception as exc:
-            logger.exception("Sync: source failed: %s", source.get('name'))
-            log_sync_event(
-                'source_error',
-                'Source fetch failed',
-                source=source.get('name'),
-                error=str(exc),
+        else:
+            results = _sync_buffered(
+                sources, load_table, project, location, limit, load_disposition, days, auto, chunk_size,
+                workers, source_timeout, load_format,
+            )
+
+        rows = sum(results.values())
+        if swap and rows:
+            _swap_shadow_table(project, load_table, table_id, location, write_disposition, source_names, results, auto)
+    finally:
+        # The shadow only lives for one sync; don't leave it behind (and billed) when it fails.
+        if swap:
+            _drop_shadow_table(project, load_table)
+
+    if rows:
+        _refresh_rollup(bigquery.Client(project=project), table_id, location, auto=auto)
+        report_cache.invalidate('bigquery')
+    return rows
+
+
+def _refresh_rollup(client, table_id, location, auto=False, stage_table=None, start_date=None, end_date=None,
+                    retention_days=None):
+    """Bring the daily rollup in line with `table_id`.
+
+    Only the days in `stage_table` or the `start_date`..`end_date` window are
+    recomputed when given, otherwise the rollup is rebuilt; a failed
+    incremental refresh falls back to a rebuild. The rebuild replaces the
+    table in one statement, so when it fails too the old rollup stays and is
+    marked stale: summaries read the report rows until a later sync rebuilds it.
+    """
+    if not rollup_enabled():
+        return
+    incremental = bool(stage_table or start_date)
+    rollup_id = None
+    if incremental:
+        try:
+            rollup_id = refresh_rollup_days(
+                client,
+                table_id,
+                location=location,
+                stage_table=stage_table,
+                start_date=start_date,
+                end_date=end_date,
+                retention_days=retention_days,
             )
+        except Exception as exc:
+            logger.warning("Sync: rollup refresh for %s failed, rebuilding: %s", table_id, exc)
+            log_sync_event('rollup_error', 'Daily rollup refresh failed', table_id=table_id, error=str(exc), auto=auto)
+            incremental = False
+    if rollup_id is None:
+        try:
+            rollup_id = rebuild_rollup(client, table_id, location=location)
+        except Exception as exc:
+            logger.warning("Sync: rollup rebuild for %s failed: %s", table_id, exc)
+            log_sync_event('rollup_error', 'Daily rollup rebuild failed', table_id=table_id, error=str(exc), auto=auto)
+            try:
+                mark_rollup_stale(client, table_id)
+            except Exception:
+                logger.warning("Sync: could not mark the rollup of %s stale", table_id, exc_info=True)
+            return
+    log_sync_event(
+        'rollup_refreshed',
+        'Refreshed daily rollup',
+        table_id=rollup_id,
+        incremental=incremental,
+        auto=auto,
+    )
+
+
+def _sync_buffered(sources, table_id, project, location, limit, write_disposition, days, auto, chunk_size,
+                   workers=1, source_timeout=None, load_format=None):
+    all_dfs = []
+
+    def _fetch(source, deadline):
+        if deadline is None:
+            df = _fetch_maria_rows(source, limit=limit, days=days)
+        else:
+            df = _fetch_maria_batched(source, chunk_size=chunk_size, deadline=deadline, limit=limit, days=days)
+        if not df.empty:
+            all_dfs.append(df)
+        return len(df)
+
+    results = _run_per_source(sources, _fetch, workers=workers, timeout=source_timeout)
 
     if not all_dfs:
         logger.warning("Sync: no data fetched from any source")
         log_sync_event('sync_no_data', 'No data fetched from any source')
-        return 0
+        return {}
 
     df = pd.concat(all_dfs, ignore_index=True)
 
@@ -283,50 +983,437 @@ def sync_maria_to_bigquery(limit=0, write_disposition='WRITE_TRUNCATE', days=Non
         df = df.sort_values(by=sort_cols, ascending=ascending, na_position='last')
 
     df = df.reset_index(drop=True)
-    df['id'] = range(1, len(df) + 1)
-
-    ordered_cols = [
-        'id',
-        'CreateDate',
-        'rs_userid',
-        'rs_username',
-        'rs_name',
-        'UserServiceID',
-        'username',
-        'ServiceName',
-        'ServicePrice',
-        'Package',
-        'ServiceStatus',
-        'StartDate',
-        'EndDate',
-    ]
-    ordered_cols = [c for c in ordered_cols if c in df.columns]
+
+    ordered_cols = [c for c in REPORT_COLUMNS if c in df.columns]
     if ordered_cols:
         df = df[ordered_cols]
 
     client = bigquery.Client(project=project)
-    job_config = bigquery.LoadJobConfig(
-        write_disposition=write_disposition,
-        autodetect=True,
-        source_format=bigquery.SourceFormat.CSV,
-    )
 
     try:
-        with tempfile.NamedTemporaryFile(mode='w+', suffix='.csv', delete=False, encoding='utf-8') as tmp:
-            df.to_csv(tmp.name, index=False)
-            tmp.flush()
-            tmp.seek(0)
-            with open(tmp.name, 'rb') as fh:
-                load_job = client.load_table_from_file(
-                    fh,
-                    table_id,
-                    job_config=job_config,
-                    location=location,
-                )
-                load_job.result()
-                logger.info("Sync: loaded %s rows into %s", len(df), table_id)
+        ensure_report_table(client, table_id, location=location)
+        load_df_to_bq(client, df, table_id, location, write_disposition, load_format=load_format)
+        logger.info("Sync: loaded %s rows into %s", len(df), table_id)
         log_sync_event('sync_loaded', 'Loaded rows into BigQuery', rows=len(df), table_id=table_id, auto=auto)
-        return len(df)
+        return results
     except Exception as exc:
         log_sync_event('sync_error', 'BigQuery load failed', table_id=table_id, error=str(exc), auto=auto)
         raise
+
+
+def _sync_streamed(sources, table_id, project, location, limit, write_disposition, days, auto, chunk_size,
+                   workers=1, source_timeout=None, load_format=None):
+    spool = _ReportSpool(load_format=load_format)
+    try:
+        results = _run_per_source(
+            sources,
+            lambda source, deadline: _spool_source(
+                spool, source, chunk_size=chunk_size, deadline=deadline, limit=limit, days=days,
+            ),
+            workers=workers,
+            timeout=source_timeout,
+        )
+
+        if not spool.rows:
+            logger.warning("Sync: no data fetched from any source")
+            log_sync_event('sync_no_data', 'No data fetched from any source')
+            return {}
+
+        client = bigquery.Client(project=project)
+        try:
+            ensure_report_table(client, table_id, location=location)
+            load_file_to_bq(client, spool.finish(), table_id, location, write_disposition, load_format=load_format)
+            logger.info("Sync: loaded %s rows into %s", spool.rows, table_id)
+        except Exception as exc:
+            log_sync_event('sync_error', 'BigQuery load failed', table_id=table_id, error=str(exc), auto=auto)
+            raise
+        log_sync_event('sync_loaded', 'Loaded rows into BigQuery', rows=spool.rows, table_id=table_id, auto=auto)
+        return results
+    finally:
+        spool.cleanup()
+
+
+def _drop_shadow_table(project, shadow_id):
+    try:
+        bigquery.Client(project=project).delete_table(shadow_id, not_found_ok=True)
+    except Exception as exc:
+        logger.warning("Sync: could not drop shadow table %s: %s", shadow_id, exc)
+
+
+def _swap_shadow_table(project, shadow_id, table_id, location, write_disposition, source_names, results, auto):
+    """Validate the loaded shadow table, then copy it over the live table in one job.
+
+    The shadow must hold exactly the rows each source reported and every
+    configured source must have succeeded; otherwise the live table is left
+    untouched and the sync fails. A copy job replaces the destination
+    atomically, so readers see either the old or the new table.
+    """
+    client = bigquery.Client(project=project)
+    query = f"SELECT rs_name, COUNT(1) AS row_count FROM `{shadow_id}` GROUP BY rs_name"
+    loaded = {row['rs_name']: row['row_count'] for row in client.query(query, location=location).result()}
+    problems = {}
+    for name in source_names:
+        expected = results.get(name)
+        if expected is None:
+            problems[name] = 'source failed'
+        elif loaded.get(name, 0) != expected:
+            problems[name] = f'expected {expected} rows, shadow has {loaded.get(name, 0)}'
+    for name in set(loaded) - set(source_names):
+        problems[name] = f'unexpected source with {loaded[name]} rows'
+
+    if problems:
+        log_sync_event(
+            'swap_validation_failed',
+            'Shadow table failed validation; live table kept',
+            shadow_table=shadow_id,
+            table_id=table_id,
+            problems=problems,
+            auto=auto,
+        )
+        raise RuntimeError(f'Shadow table {shadow_id} failed validation: {problems}')
+
+    try:
+        ensure_report_table(client, table_id, location=location)
+        copy_config = bigquery.CopyJobConfig(write_disposition=write_disposition)
+        client.copy_table(shadow_id, table_id, job_config=copy_config, location=location).result()
+    except Exception as exc:
+        log_sync_event('sync_error', 'Shadow table swap failed', table_id=table_id, error=str(exc), auto=auto)
+        raise
+    logger.info("Sync: swapped %s into %s", shadow_id, table_id)
+    log_sync_event(
+        'sync_swapped',
+        'Swapped validated shadow table into place',
+        shadow_table=shadow_id,
+        table_id=table_id,
+        rows=sum(results.values()),
+        auto=auto,
+    )
+
+
+class _PipelineAborted(RuntimeError):
+    pass
+
+
+_PIPELINE_DONE = object()
+
+
+def _pipeline_put(q, item, abort):
+    # Blocking put that gives up once another stage has failed, so a full
+    # queue never deadlocks the pipeline.
+    while True:
+        if abort.is_set():
+            raise _PipelineAborted('Sync pipeline aborted by a failed stage')
+        try:
+            q.put(item, timeout=0.5)
+            return
+        except queue.Full:
+            continue
+
+
+def _pipeline_get(q, abort):
+    while True:
+        if abort.is_set():
+            raise _PipelineAborted('Sync pipeline aborted by a failed stage')
+        try:
+            return q.get(timeout=0.5)
+        except queue.Empty:
+            continue
+
+
+def _pipeline_writer(batches, uploads, abort, load_format, load_rows, temp_paths):
+    """Transform stage: append batches to Parquet/CSV chunks of about `load_rows` rows."""
+    writer, path, rows = None, None, 0
+    try:
+        while True:
+            batch = _pipeline_get(batches, abort)
+            if batch is _PIPELINE_DONE:
+                break
+            if writer is None:
+                with tempfile.NamedTemporaryFile(suffix=f'.{load_format}', delete=False) as tmp:
+                    path = tmp.name
+                temp_paths.append(path)
+                writer = FrameFileWriter(path, load_format=load_format)
+            writer.write(batch)
+            rows += len(batch)
+            if rows >= load_rows:
+                writer.close()
+                _pipeline_put(uploads, (path, rows), abort)
+                writer, path, rows = None, None, 0
+        if writer is not None:
+            writer.close()
+            _pipeline_put(uploads, (path, rows), abort)
+            writer = None
+        _pipeline_put(uploads, _PIPELINE_DONE, abort)
+    except Exception:
+        abort.set()
+        raise
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def _pipeline_uploader(client, uploads, abort, stage_table, location, load_format):
+    """Upload stage: append each finished chunk to the stage table as its own load job."""
+    loaded = 0
+    try:
+        while True:
+            item = _pipeline_get(uploads, abort)
+            if item is _PIPELINE_DONE:
+                return loaded
+            path, rows = item
+            started = time.monotonic()
+            try:
+                load_file_to_bq(client, path, stage_table, location, 'WRITE_APPEND', load_format=load_format)
+            finally:
+                if os.path.exists(path):
+                    os.remove(path)
+            loaded += rows
+            log_sync_event(
+                'pipeline_chunk_loaded',
+                'Loaded chunk into stage table',
+                rows=rows,
+                total=loaded,
+                elapsed=round(time.monotonic() - started, 2),
+            )
+    except Exception:
+        abort.set()
+        raise
+
+
+def _sync_pipelined(sources, table_id, project, dataset, location, limit, write_disposition, days, auto,
+                    chunk_size, workers=1, source_timeout=None, load_format=None):
+    """Fetch, transform and upload concurrently through bounded queues.
+
+    Source readers push typed batches onto a bounded queue, a writer turns
+    them into load-sized files and an uploader appends each file to a stage
+    table while later batches are still being read. Full queues block the
+    stage before them, so memory stays at a few batches/files. Rows of a
+    source that failed midway are deleted from the stage, then a copy job
+    publishes the stage to `table_id` with `write_disposition`.
+    """
+    queue_size = _resolve_pipeline_queue()
+    load_rows = _resolve_pipeline_load_rows()
+    batches = queue.Queue(maxsize=queue_size)
+    uploads = queue.Queue(maxsize=queue_size)
+    abort = threading.Event()
+    temp_paths = []
+
+    client = bigquery.Client(project=project)
+    stage_table = f"{project}.{dataset}.report_user_service_stage_{uuid.uuid4().hex}"
+
+    def _fetch(source, deadline):
+        rows = 0
+        for batch in _iter_maria_batches(source, chunk_size=chunk_size, deadline=deadline, limit=limit, days=days):
+            _pipeline_put(batches, batch, abort)
+            rows += len(batch)
+        return rows
+
+    try:
+        ensure_report_table(client, stage_table, location=location)
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix='sync-pipeline') as stages:
+            writer_future = stages.submit(
+                _pipeline_writer, batches, uploads, abort, load_format, load_rows, temp_paths,
+            )
+            upload_future = stages.submit(
+                _pipeline_uploader, client, uploads, abort, stage_table, location, load_format,
+            )
+            try:
+                results = _run_per_source(sources, _fetch, workers=workers, timeout=source_timeout)
+            finally:
+                try:
+                    _pipeline_put(batches, _PIPELINE_DONE, abort)
+                except _PipelineAborted:
+                    pass
+            errors = [f.exception() for f in (writer_future, upload_future) if f.exception() is not None]
+            if errors:
+                # Report the stage that failed first, not the one it aborted.
+                exc = next((e for e in errors if not isinstance(e, _PipelineAborted)), errors[0])
+                log_sync_event('sync_error', 'Sync pipeline failed', table_id=table_id, error=str(exc), auto=auto)
+                raise exc
+
+        rows = sum(results.values())
+        failed = [s.get('name') for s in sources if s.get('name') not in results]
+        if failed and rows:
+            client.query(
+                f"DELETE FROM `{stage_table}` WHERE rs_name IN UNNEST(@failed)",
+                job_config=bigquery.QueryJobConfig(
+                    query_parameters=[bigquery.ArrayQueryParameter('failed', 'STRING', failed)],
+                ),
+                location=location,
+            ).result()
+
+        if not rows:
+            logger.warning("Sync: no data fetched from any source")
+            log_sync_event('sync_no_data', 'No data fetched from any source')
+            return {}
+
+        try:
+            ensure_report_table(client, table_id, location=location)
+            copy_config = bigquery.CopyJobConfig(write_disposition=write_disposition)
+            client.copy_table(stage_table, table_id, job_config=copy_config, location=location).result()
+        except Exception as exc:
+            log_sync_event('sync_error', 'BigQuery load failed', table_id=table_id, error=str(exc), auto=auto)
+            raise
+        logger.info("Sync: loaded %s rows into %s", rows, table_id)
+        log_sync_event('sync_loaded', 'Loaded rows into BigQuery', rows=rows, table_id=table_id, auto=auto)
+        return results
+    finally:
+        for path in temp_paths:
+            if os.path.exists(path):
+                os.remove(path)
+        client.delete_table(stage_table, not_found_ok=True)
+
+
+def _merge_report_rows(client, stage_table, table_id, location, retention_days=None):
+    """MERGE staged rows into `table_id` keyed on (rs_name, UserServiceID).
+
+    With `retention_days`, target rows older than the window that are not in
+    the stage are deleted in the same statement, matching what a full
+    `days=N` WRITE_TRUNCATE sync would keep.
+    """
+    update_cols = [c for c in REPORT_COLUMNS if c not in ('rs_name', 'UserServiceID')]
+    update_set = ',\n    '.join(f'{col} = S.{col}' for col in update_cols)
+    cols_csv = ', '.join(REPORT_COLUMNS)
+    values_csv = ', '.join(f'S.{col}' for col in REPORT_COLUMNS)
+    query = f"""
+MERGE `{table_id}` T
+USING `{stage_table}` S
+ON T.rs_name = S.rs_name AND T.UserServiceID = S.UserServiceID
+WHEN MATCHED THEN UPDATE SET
+    {update_set}
+WHEN NOT MATCHED THEN
+  INSERT ({cols_csv})
+  VALUES ({values_csv})
+"""
+    params = []
+    if retention_days:
+        query += "WHEN NOT MATCHED BY SOURCE AND T.CreateDate < DATE_SUB(CURRENT_DATE(), INTERVAL @retention_days DAY) THEN\n  DELETE\n"
+        params.append(bigquery.ScalarQueryParameter('retention_days', 'INT64', int(retention_days)))
+    job = client.query(query, job_config=bigquery.QueryJobConfig(query_parameters=params), location=location)
+    job.result()
+    return job.num_dml_affected_rows
+
+
+def sync_incremental_to_bigquery(lookback_days=None, bootstrap_days=None, retention_days=None, auto=False,
+                                 chunk_size=None, workers=None, source_timeout=None, load_format=None):
+    """Pull only new or recently changed rows per source and MERGE them into BigQuery.
+
+    Each source keeps a watermark (highest `User_ServiceBase_Id` and newest
+    `CDT` date seen) in `SyncWatermark`. A cycle fetches rows past the id
+    watermark plus the last `lookback_days` of rows again, so changes to
+    recent rows are refreshed; older rows that change in MariaDB are only
+    picked up by a full sync. Sources without a watermark are bootstrapped
+    from the last `bootstrap_days` (all rows when None). Watermarks only move
+    for sources that fetched successfully and after the MERGE committed.
+    """
+    project = os.getenv('BQ_PROJECT')
+    dataset = os.getenv('BQ_DATASET')
+    table = os.getenv('BQ_TABLE')
+    location = os.getenv('BQ_LOCATION', 'US')
+    if not (project and dataset and table):
+        raise RuntimeError('BigQuery config missing: BQ_PROJECT, BQ_DATASET, BQ_TABLE')
+
+    table_id = f"{project}.{dataset}.{table}"
+    lookback_days = _resolve_lookback_days(lookback_days)
+    chunk_size = _resolve_chunk_size(chunk_size)
+    workers = _resolve_workers(workers)
+    source_timeout = _resolve_source_timeout(source_timeout)
+    load_format = resolve_load_format(load_format)
+    check_report_table(project, table_id, location, auto=auto)
+
+    sources = _parse_sources()
+    watermarks = {
+        mark.source_name: mark
+        for mark in SyncWatermark.objects.filter(table_id=table_id, source_name__in=[s.get('name') for s in sources])
+    }
+    log_sync_event(
+        'incremental_start',
+        'Starting incremental BigQuery sync',
+        table_id=table_id,
+        sources=[s.get('name') for s in sources],
+        lookback_days=lookback_days,
+        bootstrap_days=bootstrap_days,
+        retention_days=retention_days,
+        watermarks={name: mark.last_user_service_id for name, mark in watermarks.items()},
+        auto=auto,
+        workers=workers,
+        load_format=load_format,
+    )
+
+    seen = {}
+    spool = _ReportSpool(load_format=load_format)
+
+    def _fetch(source, deadline):
+        name = source.get('name')
+        mark = watermarks.get(name)
+        if mark is None:
+            fetch_kwargs = {'days': bootstrap_days}
+        else:
+            since_date = None
+            if mark.last_create_date:
+                since_date = mark.last_create_date - timedelta(days=lookback_days)
+            fetch_kwargs = {'since_id': mark.last_user_service_id, 'since_date': since_date}
+
+        max_id, max_date = None, None
+        part = spool.part()
+        try:
+            for batch in _iter_maria_batches(source, chunk_size=chunk_size, deadline=deadline, **fetch_kwargs):
+                part.write(batch)
+                batch_id = batch['UserServiceID'].max()
+                if pd.notna(batch_id) and (max_id is None or batch_id > max_id):
+                    max_id = int(batch_id)
+                dates = batch['CreateDate'].dropna()
+                if not dates.empty and (max_date is None or dates.max() > max_date):
+                    max_date = dates.max()
+        except Exception:
+            part.discard()
+            raise
+        part.commit()
+        seen[name] = (max_id, max_date)
+        return part.rows
+
+    client = bigquery.Client(project=project)
+    stage_table = f"{project}.{dataset}.report_user_service_stage_{uuid.uuid4().hex}"
+    try:
+        _run_per_source(sources, _fetch, workers=workers, timeout=source_timeout, event_prefix='incremental_')
+
+        affected = 0
+        if spool.rows:
+            try:
+                ensure_report_table(client, table_id, location=location)
+                load_file_to_bq(client, spool.finish(), stage_table, location, 'WRITE_TRUNCATE', load_format=load_format)
+                affected = _merge_report_rows(client, stage_table, table_id, location, retention_days=retention_days)
+            except Exception as exc:
+                log_sync_event('incremental_error', 'Incremental merge failed', table_id=table_id, error=str(exc), auto=auto)
+                raise
+            _refresh_rollup(
+                client, table_id, location, auto=auto, stage_table=stage_table, retention_days=retention_days
+            )
+        else:
+            logger.info("Sync: no new rows for %s", table_id)
+
+        for name, (max_id, max_date) in seen.items():
+            if max_id is None:
+                continue
+            mark = watermarks.get(name) or SyncWatermark(source_name=name, table_id=table_id)
+            mark.last_user_service_id = max(max_id, mark.last_user_service_id or 0)
+            if max_date is not None and (mark.last_create_date is None or max_date > mark.last_create_date):
+                mark.last_create_date = max_date
+            mark.save()
+
+        logger.info("Sync: merged %s staged rows into %s (%s affected)", spool.rows, table_id, affected)
+        log_sync_event(
+            'incremental_merged',
+            'Merged incremental rows into BigQuery',
+            table_id=table_id,
+            rows=spool.rows,
+            affected=affected,
+            sources=sorted(seen),
+            auto=auto,
+        )
+        if spool.rows:
+            report_cache.invalidate('bigquery')
+        return spool.rows
+    finally:
+        spool.cleanup()
+        client.delete_table(stage_table, not_found_ok=True)
@@ -0,0 +1,91 @@
+from unittest import mock
+
+import pandas as pd
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from reports import views
+
+META = {'info_tables': ['A ← Huser_servicebase'], 'unresolved_creators': []}
+
+
+def _report_rows():
+    return pd.DataFrame({
+        'RowID': [5, 3, 9, 1, 2],
+        'Creator': ['B', 'A', 'A', 'A', 'B'],
+        'ServiceName': ['10GB', '5GB', '10GB', '20GB', '1GB'],
+        'Username': ['u5', 'u3', 'u9', 'u1', 'u2'],
+        'PackageValue': [10.0, 5.0, 10.0, None, 1.0],
+    })
+
+
+@mock.patch.object(views, 'preflight_enabled', return_value=False)
+@mock.patch.object(views, 'report_source', return_value=(False, None))
+class ReportRowsApiTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.client.force_login(self.user)
+        self.url = reverse('reports:report_rows_api')
+
+    def get(self, **params):
+        return self.client.get(self.url, {'creators_raw': 'A, B', 'page_size': 25, **params})
+
+    def test_requires_login(self, *_mocks):
+        self.client.logout()
+        self.assertEqual(self.get().status_code, 302)
+
+    def test_pages_are_columnar_and_cursor_linked(self, *_mocks):
+        rows = pd.concat([_report_rows()] * 6, ignore_index=True)
+        rows['RowID'] = range(1, len(rows) + 1)
+        with mock.patch.object(views, 'pages_in_sql', return_value=False), \
+                mock.patch.object(views, 'load_report', return_value=(rows, META, None)) as load_report:
+            first = self.get().json()
+            second = self.get(cursor=first['next']).json()
+        self.assertEqual(load_report.call_args.args[0], ['A', 'B'])
+        self.assertEqual(first['columns'][:2], ['RowID', 'Creator'])
+        self.assertEqual(len(first['data'][0]), 25)
+        self.assertEqual(len(second['data'][0]), 5)
+        self.assertIsNone(second['next'])
+        self.assertIsNotNone(second['prev'])
+        self.assertEqual(first['total_count'], 30)
+        self.assertEqual(first['info_tables'], META['info_tables'])
+        ids = first['data'][0] + second['data'][0]
+        self.assertEqual(sorted(ids), list(range(1, 31)))
+        self.assertEqual(len(set(ids)), 30)
+
+    def test_sql_pages_pass_the_cursor_through(self, *_mocks):
+        page = _report_rows().iloc[:2]
+        result = (page, 'next:["rs1",2,3]', None, 40, 12.5, META, None)
+        with mock.patch.object(views, 'load_detail_page', return_value=result) as load_page:
+            response = self.get(cursor='next:["rs1",1,9]')
+        self.assertEqual(load_page.call_args.args[3], 25)
+        self.assertEqual(load_page.call_args.kwargs['cursor'], ('next', ('rs1', 1, 9)))
+        body = response.json()
+        self.assertEqual(body['next'], 'next:["rs1",2,3]')
+        self.assertEqual(body['total_count'], 40)
+        self.assertEqual(body['total_gb'], 12.5)
+        self.assertEqual(body['data'][4], [10.0, 5.0])
+        self.assertIsNone(body['error'])
+
+    def test_missing_values_are_null(self, *_mocks):
+        rows = _report_rows()
+        with mock.patch.object(views, 'pages_in_sql', return_value=False), \
+                mock.patch.object(views, 'load_report', return_value=(rows, META, None)):
+            body = self.get().json()
+        package = body['data'][body['columns'].index('Package')]
+        self.assertIn(None, package)
+
+    def test_invalid_page_size_falls_back_to_the_default(self, *_mocks):
+        with mock.patch.object(views, 'pages_in_sql', return_value=False), \
+                mock.patch.object(views, 'load_report', return_value=(pd.DataFrame(), META, 'rs1: timed out')):
+            body = self.get(page_size=7).json()
+        self.assertEqual(body['page_size'], 50)
+        self.assertEqual(body['columns'], [])
+        self.assertEqual(body['error'], 'rs1: timed out')
+
+    def test_reseller_without_a_profile_gets_an_error(self, *_mocks):
+        self.client.force_login(User.objects.create_user('someone', password='pw'))
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], views.NO_CREATORS_ERROR)
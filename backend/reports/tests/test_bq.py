@@ -0,0 +1,76 @@
+import datetime
+import os
+import tempfile
+from unittest import mock
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from django.test import TestCase
+from google.cloud import bigquery
+
+from reports import bq
+
+
+def _frame(ids):
+    return pd.DataFrame({
+        'id': ids,
+        'CreateDate': ['2026-03-01'] * len(ids),
+        'rs_userid': ['7'] * len(ids),
+        'rs_username': ['Alpha'] * len(ids),
+        'UserServiceID': ids,
+        'ServicePrice': ['1000'] * len(ids),
+        'Package': [10.5] + [None] * (len(ids) - 1),
+        'StartDate': ['2026-03-01'] + ['bad date'] * (len(ids) - 1),
+    })
+
+
+class ParquetLoadTests(TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.parquet')
+        os.close(handle)
+        self.addCleanup(os.remove, self.path)
+
+    def test_arrow_table_follows_the_schema(self):
+        table = bq.frame_to_arrow(_frame([1, 2]), bq.REPORT_USER_SERVICE_SCHEMA)
+        self.assertEqual(table.schema, bq.arrow_schema(bq.REPORT_USER_SERVICE_SCHEMA))
+        self.assertEqual(table.schema.field('rs_userid').type, pa.int64())
+        self.assertEqual(table.column('CreateDate').to_pylist(), [datetime.date(2026, 3, 1)] * 2)
+        self.assertEqual(table.column('ServicePrice').to_pylist(), [1000.0, 1000.0])
+        self.assertEqual(table.column('Package').to_pylist(), [10.5, None])
+        self.assertEqual(table.column('StartDate').to_pylist(), [datetime.date(2026, 3, 1), None])
+        self.assertEqual(table.column('EndDate').null_count, 2)  # Missing columns load as NULL.
+
+    def test_writer_appends_batches_and_parts(self):
+        handle, part_path = tempfile.mkstemp(suffix='.parquet')
+        os.close(handle)
+        self.addCleanup(os.remove, part_path)
+        part = bq.FrameFileWriter(part_path, load_format='parquet', header=False)
+        part.write(_frame([3]))
+        part.close()
+
+        writer = bq.FrameFileWriter(self.path, load_format='parquet')
+        writer.write(_frame([1, 2]))
+        writer.write(pd.DataFrame())
+        writer.append_file(part_path)
+        writer.close()
+        table = pq.read_table(self.path)
+        self.assertEqual(table.column('id').to_pylist(), [1, 2, 3])
+        self.assertEqual(table.schema, bq.arrow_schema(bq.REPORT_USER_SERVICE_SCHEMA))
+
+    def test_load_job_uses_the_explicit_schema(self):
+        client = mock.Mock()
+        bq.load_df_to_bq(client, _frame([1]), 'p.d.report_user_service', 'US', 'WRITE_APPEND', load_format='parquet')
+        job_config = client.load_table_from_file.call_args.kwargs['job_config']
+        self.assertEqual(job_config.source_format, bigquery.SourceFormat.PARQUET)
+        self.assertFalse(job_config.autodetect)
+        self.assertEqual(job_config.schema, bq.REPORT_USER_SERVICE_SCHEMA)
+        self.assertEqual(job_config.write_disposition, 'WRITE_APPEND')
+        self.assertEqual(job_config.time_partitioning.field, bq.REPORT_PARTITION_FIELD)
+
+    def test_load_format_setting(self):
+        with mock.patch.dict('os.environ', {'BQ_LOAD_FORMAT': 'CSV'}):
+            self.assertEqual(bq.resolve_load_format(), 'csv')
+            self.assertEqual(bq.resolve_load_format('parquet'), 'parquet')
+        with self.assertRaises(ValueError):
+            bq.resolve_load_format('avro')
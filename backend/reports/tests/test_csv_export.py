@@ -0,0 +1,181 @@
+import io
+from unittest import mock
+
+import pandas as pd
+from django.test import TestCase
+
+from reports import pipeline
+from reports.csv_export import iter_report_csv, iter_streamed_report_csv
+from reports.filters import resolve_report_filters
+from reports.pipeline import prepare_detail_frame, unlimited_mask
+
+
+def buffered_export(csv_df, creator_col, unlimited_rows):
+    """The download_csv export as it was before streaming, kept as the reference output."""
+
+    def _add_totals_csv(df):
+        if df.empty or not creator_col or ('Package' not in df.columns and 'PackageValue' not in df.columns):
+            return df
+
+        pkg_col = 'Package' if 'Package' in df.columns else 'PackageValue'
+        if 'Count' not in df.columns:
+            df['Count'] = None
+        pkg_numeric = pd.to_numeric(df[pkg_col], errors='coerce')
+        totals = (
+            df.assign(_pkg=pkg_numeric)
+            .groupby(creator_col)
+            .agg(SumPkg=('_pkg', 'sum'), Count=('Count', 'size'))
+            .reset_index()
+        )
+
+        def _blank_row_csv():
+            return {c: '' for c in df.columns}
+
+        total_rows = []
+        for _, row in totals.iterrows():
+            r = _blank_row_csv()
+            r[creator_col] = f"{row[creator_col]} Total"
+            r[pkg_col] = round(float(row['SumPkg']) if pd.notna(row['SumPkg']) else 0, 2)
+            r['Count'] = int(row['Count'])
+            total_rows.append(r)
+
+        grand_total = float(pkg_numeric.sum()) if pkg_numeric.notna().any() else 0
+        grand_count = int(len(df))
+        r = _blank_row_csv()
+        r[creator_col] = 'Grand Total'
+        r[pkg_col] = round(grand_total, 2)
+        r['Count'] = grand_count
+        total_rows.append(r)
+
+        return pd.concat([df, pd.DataFrame(total_rows)], ignore_index=True)
+
+    limited_df = _add_totals_csv(csv_df[~unlimited_rows].copy())
+    unlimited_df = _add_totals_csv(csv_df[unlimited_rows].copy())
+
+    output = io.StringIO()
+    output.write('Limited Packages Report\n')
+    limited_df.to_csv(output, index=False)
+    output.write('\n')
+    output.write('Unlimited Packages Report\n')
+    unlimited_df.to_csv(output, index=False)
+    return output.getvalue().encode('utf-8')
+
+
+def streamed_export(df, creator_col, chunk_rows):
+    return ''.join(iter_report_csv(df, creator_col, unlimited_mask(df), chunk_rows=chunk_rows)).encode('utf-8')
+
+
+class IterReportCsvTests(TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({
+            'RowID': [5, 3, 9, 1, 2, 7, 8],
+            'Creator': ['B', 'A', 'A', 'فروشنده', 'B', 'A', 'B'],
+            'ServiceName': ['10GB', 'Unlimited', '5 GB', 'DDC Unlimited', 'Unlimited', '20GB', '1GB'],
+            'Username': ['u1', 'u2', 'u3', 'u4', 'u5', 'u6', 'u,7'],
+            'Package': [10.0, 0.0, 5.0, 100.0, None, 20.125, 1.0],
+        })
+
+    def test_matches_buffered_export_byte_for_byte(self):
+        mask = unlimited_mask(self.df)
+        self.assertTrue(mask.any() and not mask.all())
+        expected = buffered_export(self.df, 'Creator', mask)
+        for chunk_rows in (1, 2, 5000):
+            self.assertEqual(streamed_export(self.df, 'Creator', chunk_rows), expected, chunk_rows)
+
+    def test_empty_sections(self):
+        limited_only = self.df[~unlimited_mask(self.df)].reset_index(drop=True)
+        self.assertEqual(
+            streamed_export(limited_only, 'Creator', 2),
+            buffered_export(limited_only, 'Creator', unlimited_mask(limited_only)),
+        )
+        empty = self.df.iloc[0:0]
+        self.assertEqual(streamed_export(empty, 'Creator', 2), buffered_export(empty, 'Creator', unlimited_mask(empty)))
+
+    def test_without_creator_column(self):
+        df = self.df.drop(columns=['Creator'])
+        self.assertEqual(streamed_export(df, None, 3), buffered_export(df, None, unlimited_mask(df)))
+
+
+def _source_rows(source_name, row_ids, creators, services, package_bytes):
+    gib = 1073741824
+    return pd.DataFrame({
+        'RowID': row_ids,
+        'CreatorID': [ord(c[0]) for c in creators],
+        'Creator': creators,
+        'ServiceName': services,
+        'Username': [f'{source_name}-u{i}' for i in row_ids],
+        'CreateDT': '2026-01-02 03:04:05',
+        'ServiceStatus': 'Active',
+        'ServicePrice': '1,000',
+        'StartDate': '2026-01-02',
+        'EndDate': None,
+        'PackageBytes': package_bytes,
+        'PackageValue': [round(b / gib, 2) for b in package_bytes],
+    })
+
+
+class StreamedSourceExportTests(TestCase):
+    """`export_report_sections` against two fake MariaDB sources, compared with the buffered export."""
+
+    def setUp(self):
+        gib = 1073741824
+        self.sources = {
+            'rs1': _source_rows(
+                'rs1', [4, 1, 6, 3], ['B', 'A', 'A', 'فروشنده'],
+                ['10GB', 'Unlimited', '5 GB', 'DDC Unlimited'], [10 * gib, 0, 5 * gib, 100 * gib],
+            ),
+            'rs2': _source_rows(
+                'rs2', [2, 5, 7, 8, 9], ['A', 'B', 'A', 'B', 'فروشنده'],
+                ['20GB', 'Unlimited', '1GB', '3GB', '2GB'], [int(20.125 * gib), 0, gib, 3 * gib, 2 * gib],
+            ),
+        }
+
+    def fake_chunks(self, query, params, tables_priority, source_name, chunk_rows=5000):
+        df = self.sources[source_name]
+        mask = unlimited_mask(df)
+        df = df[~mask if 'AND NOT (' in query else mask]
+        df = df.sort_values(['Creator', 'RowID'])
+        for start in range(0, len(df), chunk_rows):
+            yield df.iloc[start:start + chunk_rows].copy()
+
+    def fake_totals(self, plan=None, tables_priority=None):
+        frames = []
+        for source_name in plan:
+            df = self.sources[source_name]
+            frames.append(
+                df.assign(IsUnlimited=unlimited_mask(df).astype(int), Package=df['PackageValue'])
+                .groupby(['Creator', 'IsUnlimited'], as_index=False)
+                .agg(Count=('RowID', 'size'), SumGB=('Package', 'sum'))
+            )
+        return pd.concat(frames, ignore_index=True), {}, {}
+
+    def buffered(self):
+        frames = [df.assign(Source=name) for name, df in self.sources.items()]
+        df = pd.concat(frames, ignore_index=True).drop(columns=['CreatorID'])
+        final_df = prepare_detail_frame(df, resolve_report_filters({}))
+        return ''.join(iter_report_csv(final_df, 'Creator', unlimited_mask(final_df)))
+
+    def test_matches_buffered_export(self):
+        sources = [{'name': name} for name in self.sources]
+        with mock.patch.object(pipeline, 'get_sources', return_value=sources), \
+                mock.patch.object(pipeline, 'iter_query_chunks', side_effect=self.fake_chunks), \
+                mock.patch.object(pipeline, 'run_query_all_sources', side_effect=self.fake_totals):
+            for chunk_rows in (1, 2, 5000):
+                columns, creator_col, sections, error = pipeline.export_report_sections(
+                    [None], resolve_report_filters({}), chunk_rows=chunk_rows
+                )
+                self.assertIsNone(error)
+                streamed = ''.join(iter_streamed_report_csv(columns, creator_col, sections))
+                self.assertEqual(streamed, self.buffered(), chunk_rows)
+        self.assertIn('rs2-u7', streamed)
+        self.assertIn('فروشنده Total', streamed)
+
+    def test_export_queries_split_sections_and_sort_per_source(self):
+        with mock.patch.object(pipeline, 'get_sources', return_value=[{'name': 'rs1'}]):
+            plan, _names, _ids, _unresolved = pipeline.maria_report_plan(
+                [None], resolve_report_filters({}), mode='export', unlimited=False
+            )
+        (query, _params), = plan['rs1']
+        self.assertIn('AND NOT (', query)
+        self.assertTrue(query.rstrip().endswith('AS BINARY), TName.User_ServiceBase_Id'))
+        self.assertNotIn('LIMIT', query)
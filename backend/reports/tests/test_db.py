@@ -0,0 +1,172 @@
+import threading
+from unittest import mock
+
+import pandas as pd
+from django.test import TestCase
+
+from maria_cache.models import Reseller
+from reports import db
+
+SOURCES = [{'name': 'rs1'}, {'name': 'rs2'}]
+
+
+class _Conn:
+    def __init__(self):
+        self.open = True
+        self.pings = 0
+        self.rollbacks = 0
+
+    def ping(self, reconnect=False):
+        self.pings += 1
+        if not self.open:
+            raise ConnectionError('gone')
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.open = False
+
+
+@mock.patch.dict('os.environ', {'MARIA_POOL_SIZE': '2', 'MARIA_POOL_CHECKOUT_TIMEOUT': '0'})
+class ConnectionPoolTests(TestCase):
+    def pool(self):
+        pool = db._ConnectionPool({'name': 'rs1'})
+        pool._connect = mock.Mock(side_effect=lambda: _Conn())
+        return pool
+
+    def test_released_connections_are_reused_after_a_ping(self):
+        pool = self.pool()
+        conn, created_at = pool.acquire()
+        pool.release(conn, created_at)
+        self.assertEqual(conn.rollbacks, 1)
+        again, again_created = pool.acquire()
+        self.assertIs(again, conn)
+        self.assertEqual(again_created, created_at)
+        self.assertEqual(conn.pings, 1)
+        pool._connect.assert_called_once()
+
+    def test_dead_and_stale_connections_are_replaced(self):
+        pool = self.pool()
+        dead, dead_created = pool.acquire()
+        stale, stale_created = pool.acquire()
+        pool.release(dead, dead_created)
+        pool.release(stale, stale_created - pool.recycle_seconds - 1)
+        dead.open = False  # Dropped by the server while idle.
+        first, _ = pool.acquire()
+        second, _ = pool.acquire()
+        self.assertNotIn(first, (dead, stale))
+        self.assertNotIn(second, (dead, stale))
+        self.assertFalse(stale.open)
+        self.assertEqual(pool._connect.call_count, 4)
+
+    def test_checkout_is_bounded(self):
+        pool = self.pool()
+        held = [pool.acquire(), pool.acquire()]
+        with self.assertRaises(db.MariaPoolTimeout):
+            pool.acquire()
+        pool.release(*held.pop())
+        self.assertIsNotNone(pool.acquire())
+
+    def test_pooled_connection_returns_on_close(self):
+        pool = self.pool()
+        with db.PooledConnection(pool, *pool.acquire()) as conn:
+            self.assertTrue(conn.open)
+        with self.assertRaises(db.pymysql.err.InterfaceError):
+            conn.cursor()
+        self.assertEqual(len(pool._idle), 1)
+
+    def test_waiters_get_a_released_connection(self):
+        pool = self.pool()
+        pool.checkout_timeout = 5
+        held = [pool.acquire(), pool.acquire()]
+        got = []
+        waiter = threading.Thread(target=lambda: got.append(pool.acquire()))
+        waiter.start()
+        pool.release(*held[0])
+        waiter.join(5)
+        self.assertIs(got[0][0], held[0][0])
+
+
+@mock.patch.object(db, 'get_sources', return_value=SOURCES)
+class ResolveCreatorIdsTests(TestCase):
+    databases = {'default', 'cache'}
+
+    def setUp(self):
+        Reseller.objects.create(source_name='rs1', source_id=3, name='Alpha', name_norm='alpha')
+        Reseller.objects.create(source_name='rs2', source_id=8, name='alpha', name_norm='alpha')
+
+    def test_cached_names_skip_the_source(self, _sources):
+        with mock.patch.object(db, '_run_df') as run_df:
+            ids, unresolved = db.resolve_creator_ids([' ALPHA ', 'alpha'], source_name='rs1')
+        self.assertEqual(ids, {' ALPHA ': [3]})
+        self.assertEqual(unresolved, [])
+        run_df.assert_not_called()
+
+    def test_names_missing_from_the_cache_are_looked_up_once(self, _sources):
+        found = pd.DataFrame({'Reseller_Id': [11, 12], 'ResellerName': ['Beta ', 'Other']})
+        with mock.patch.object(db, '_run_df', return_value=found) as run_df:
+            ids, unresolved = db.resolve_creator_ids(['Alpha', 'Beta', 'Gamma'], source_name='rs2')
+        self.assertEqual(ids, {'Alpha': [8], 'Beta': [11]})
+        self.assertEqual(unresolved, ['Gamma'])
+        run_df.assert_called_once()
+        query, values = run_df.call_args.args
+        self.assertEqual(query, 'SELECT Reseller_Id, ResellerName FROM Hreseller WHERE ResellerName IN (%s,%s,%s,%s)')
+        self.assertEqual(values, ['Beta', 'Gamma', 'beta', 'gamma'])
+        self.assertEqual(run_df.call_args.kwargs, {'source_name': 'rs2'})
+
+    def test_failed_lookup_leaves_names_unresolved(self, _sources):
+        with mock.patch.object(db, '_run_df', side_effect=RuntimeError('gone away')), \
+                self.assertLogs('reports.db', 'WARNING'):
+            ids, unresolved = db.resolve_creator_ids(['Alpha', 'Beta'], source_name='rs1')
+        self.assertEqual(ids, {'Alpha': [3]})
+        self.assertEqual(unresolved, ['Beta'])
+
+
+
+class FanOutTests(TestCase):
+    def test_sources_run_concurrently_and_are_tagged(self):
+        # Each source waits for the other, so this only finishes when both run at once.
+        barrier = threading.Barrier(2, timeout=5)
+
+        def _run_query(query, params=None, tables_priority=None, source_name=None):
+            barrier.wait()
+            return pd.DataFrame({'RowID': params}), f'{source_name}_table'
+
+        plan = {'rs1': [('q', [1, 2])], 'rs2': [('q', [3])], 'rs3': []}
+        with mock.patch.object(db, 'run_query', side_effect=_run_query) as run_query:
+            df, used_tables, errors = db.run_query_all_sources(plan=plan)
+        self.assertEqual(errors, {})
+        self.assertEqual(used_tables, {'rs1': ['rs1_table'], 'rs2': ['rs2_table']})
+        self.assertEqual(sorted(zip(df['Source'], df['RowID'])), [('rs1', 1), ('rs1', 2), ('rs2', 3)])
+        self.assertEqual(run_query.call_count, 2)  # Sources with nothing to run are skipped.
+
+    def test_failed_and_slow_sources_are_reported(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def _run_query(query, params=None, tables_priority=None, source_name=None):
+            if source_name == 'rs2':
+                raise RuntimeError('access denied')
+            if source_name == 'rs3':
+                release.wait(5)
+            return pd.DataFrame({'RowID': [1]}), 'Huser_servicebase'
+
+        plan = {name: [('q', [])] for name in ('rs1', 'rs2', 'rs3')}
+        with mock.patch.object(db, 'run_query', side_effect=_run_query):
+            df, used_tables, errors = db.run_query_all_sources(plan=plan, timeout=0.2)
+        self.assertEqual(errors, {'rs2': 'access denied', 'rs3': 'Timed out after 0.2s'})
+        self.assertEqual(list(df['Source']), ['rs1'])
+        self.assertEqual(list(used_tables), ['rs1'])
+
+    @mock.patch.object(db, 'get_sources', return_value=SOURCES)
+    def test_single_query_runs_on_every_source(self, _sources):
+        def _run_query(query, params=None, tables_priority=None, source_name=None):
+            return pd.DataFrame({'n': [1]}), None
+
+        with mock.patch.object(db, 'run_query', side_effect=_run_query) as run_query:
+            df, _used, _errors = db.run_query_all_sources('SELECT 1', [7])
+        self.assertEqual(sorted(df['Source']), ['rs1', 'rs2'])
+        self.assertEqual(
+            sorted(call.kwargs['source_name'] for call in run_query.call_args_list), ['rs1', 'rs2'],
+        )
@@ -0,0 +1,124 @@
+import datetime
+import sqlite3
+
+import pandas as pd
+from django.test import TestCase
+
+from reports.filters import apply_report_filters, bq_filter_clauses, maria_filter_clauses, resolve_report_filters
+
+
+def _rows(status):
+    return pd.DataFrame({
+        'UserServiceID': [1, 2, 3, 4],
+        'Username': ['u', 'u', 'v', 'v'],
+        'ServiceStatus': [status] * 4,
+        'CreateDate': ['2026-01-01', '2026-01-05', '2026-01-01', '2026-01-02'],
+    })
+
+
+class PendingSibSerialTests(TestCase):
+    """With Pending the SIB-serial filter applies after the latest-row-per-user dedup."""
+
+    filters = {'serial': None, 'sib_serial': ('<=', 2, None), 'date': None, 'service_status': 'Pending'}
+
+    def test_sib_serial_runs_after_the_dedup(self):
+        # u's latest row is 2 (kept), v's is 4 (filtered out); filtering first
+        # would have kept v's row 3 instead.
+        result = apply_report_filters(_rows('Pending'), self.filters)
+        self.assertEqual(list(result['UserServiceID']), [2])
+
+    def test_other_statuses_filter_rows_directly(self):
+        result = apply_report_filters(_rows('Active'), {**self.filters, 'service_status': 'Active'})
+        self.assertEqual(list(result['UserServiceID']), [1, 2])
+
+    def test_sib_serial_stays_out_of_pending_sql(self):
+        clauses, params = maria_filter_clauses(self.filters)
+        self.assertFalse(any('User_ServiceBase_Id' in clause for clause in clauses))
+        bq_clauses, _ = bq_filter_clauses(self.filters)
+        self.assertFalse(any('UserServiceID' in clause for clause in bq_clauses))
+
+        active_clauses, _ = maria_filter_clauses({**self.filters, 'service_status': 'Active'})
+        self.assertTrue(any('User_ServiceBase_Id' in clause for clause in active_clauses))
+
+
+def _service_rows():
+    return pd.DataFrame({
+        'RowID': list(range(1, 9)),
+        'Username': ['u1', 'u2', 'u3', 'u4', 'u5', 'u6', 'u7', 'u8'],
+        'CreateDT': [
+            '2026-01-01 00:00:00', '2026-01-01 23:59:59', '2026-01-02 08:00:00', '2026-01-03 00:00:00',
+            '2026-01-04 12:00:00', '2026-01-05 00:00:01', '2026-01-06 09:00:00', '2026-01-07 18:30:00',
+        ],
+        'ServiceStatus': ['Active', 'Active', 'Expired', 'Active', 'Active', 'Expired', 'Active', 'Active'],
+    })
+
+
+class SqlPushdownTests(TestCase):
+    """The WHERE clauses select exactly the rows the in-memory filters keep."""
+
+    def sql_ids(self, df, filters):
+        conn = sqlite3.connect(':memory:')
+        self.addCleanup(conn.close)
+        conn.execute('CREATE TABLE TName (User_ServiceBase_Id INTEGER, CDT TEXT, ServiceStatus TEXT)')
+        conn.executemany(
+            'INSERT INTO TName VALUES (?, ?, ?)',
+            df[['RowID', 'CreateDT', 'ServiceStatus']].itertuples(index=False),
+        )
+        clauses, params = maria_filter_clauses(filters)
+        params = [p.isoformat() if isinstance(p, datetime.date) else p for p in params]
+        query = f"SELECT User_ServiceBase_Id FROM TName WHERE {' AND '.join(clauses or ['1'])} ORDER BY 1"
+        return [row[0] for row in conn.execute(query.replace('%s', '?'), params)]
+
+    def test_sql_matches_the_in_memory_filters(self):
+        df = _service_rows()
+        cases = [
+            {'serial_op': 'BETWEEN', 'serial_min': 2, 'serial_max': 6},
+            {'serial_op': '>', 'serial_value': 3, 'sib_serial_op': '<=', 'sib_serial_value': 7},
+            {'date_op': '=', 'date_value': datetime.date(2026, 1, 1)},
+            {'date_op': 'BETWEEN', 'date_start': datetime.date(2026, 1, 2), 'date_end': datetime.date(2026, 1, 5)},
+            {'date_op': '>', 'date_value': datetime.date(2026, 1, 4)},
+            {'date_op': '<', 'date_value': datetime.date(2026, 1, 3)},
+            {'date_op': '<=', 'date_value': datetime.date(2026, 1, 3), 'service_status': 'Active'},
+            {'filter_serial': True, 'serial_op': 'NONE', 'service_status': 'NONE'},
+        ]
+        for raw in cases:
+            filters = resolve_report_filters(raw)
+            expected = list(apply_report_filters(df, filters)['RowID'])
+            self.assertEqual(self.sql_ids(df, filters), expected, raw)
+
+    def test_bigquery_clauses_and_parameters(self):
+        filters = resolve_report_filters({
+            'serial_op': 'BETWEEN', 'serial_min': 2, 'serial_max': 6,
+            'sib_serial_op': '>=', 'sib_serial_value': 3,
+            'date_op': '<=', 'date_value': datetime.date(2026, 1, 3),
+            'service_status': ' Active ',
+        })
+        clauses, params = bq_filter_clauses(filters)
+        self.assertEqual(clauses, [
+            'UserServiceID BETWEEN @serial_min AND @serial_max',
+            'UserServiceID >= @sib_serial_value',
+            'CreateDate < @date_upper',
+            'LOWER(TRIM(ServiceStatus)) = @service_status',
+        ])
+        self.assertEqual(
+            [(p.name, p.type_, p.value) for p in params],
+            [
+                ('serial_min', 'INT64', 2),
+                ('serial_max', 'INT64', 6),
+                ('sib_serial_value', 'INT64', 3),
+                ('date_upper', 'DATE', datetime.date(2026, 1, 4)),
+                ('service_status', 'STRING', 'active'),
+            ],
+        )
+
+    def test_form_values_are_normalized(self):
+        self.assertEqual(resolve_report_filters({'serial_min': 1, 'serial_max': 5})['serial'], ('BETWEEN', 1, 5))
+        self.assertEqual(
+            resolve_report_filters({'serial_op': 'BETWEEN', 'serial_value': 4, 'serial_min': 1})['serial'],
+            ('=', 4, None),
+        )
+        self.assertEqual(resolve_report_filters({'serial_op': 'EXACT', 'serial_value': 4})['serial'], ('=', 4, None))
+        self.assertEqual(
+            resolve_report_filters(None),
+            {'serial': None, 'sib_serial': None, 'date': None, 'service_status': None},
+        )
@@ -0,0 +1,119 @@
+import datetime
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from reports import jobs
+from reports.models import ReportJob
+
+
+def _ago(**delta):
+    return timezone.now() - datetime.timedelta(**delta)
+
+
+class ClaimNextJobTests(TestCase):
+    def test_claims_oldest_queued_job(self):
+        first = ReportJob.objects.create(action='download_csv')
+        second = ReportJob.objects.create(action='download_csv')
+        ReportJob.objects.create(action='download_csv', status=ReportJob.STATUS_DONE)
+
+        claimed = jobs.claim_next_job()
+        self.assertEqual(claimed.id, first.id)
+        self.assertEqual(claimed.status, ReportJob.STATUS_RUNNING)
+        self.assertIsNotNone(claimed.started_at)
+        self.assertEqual(claimed.heartbeat_at, claimed.started_at)
+
+        self.assertEqual(jobs.claim_next_job().id, second.id)
+        self.assertIsNone(jobs.claim_next_job())
+
+    def test_claimed_job_is_not_claimed_twice(self):
+        job = ReportJob.objects.create(action='download_csv')
+        # Another worker claims it between the listing and the update.
+        original_filter = ReportJob.objects.filter
+
+        def _filter(*args, **kwargs):
+            if kwargs.get('id') == job.id and kwargs.get('status') == ReportJob.STATUS_QUEUED:
+                original_filter(id=job.id).update(status=ReportJob.STATUS_RUNNING)
+            return original_filter(*args, **kwargs)
+
+        with mock.patch.object(ReportJob.objects, 'filter', side_effect=_filter):
+            self.assertIsNone(jobs.claim_next_job())
+
+
+class RequeueStaleJobsTests(TestCase):
+    def test_requeues_only_jobs_without_a_recent_heartbeat(self):
+        beating = ReportJob.objects.create(
+            action='download_csv', status=ReportJob.STATUS_RUNNING, started_at=_ago(hours=3), heartbeat_at=_ago(seconds=10)
+        )
+        dead = ReportJob.objects.create(
+            action='download_csv', status=ReportJob.STATUS_RUNNING, started_at=_ago(hours=3), heartbeat_at=_ago(minutes=10)
+        )
+        legacy = ReportJob.objects.create(action='download_csv', status=ReportJob.STATUS_RUNNING, started_at=_ago(hours=3))
+        done = ReportJob.objects.create(action='download_csv', status=ReportJob.STATUS_DONE, heartbeat_at=_ago(days=1))
+
+        self.assertEqual(jobs.requeue_stale_jobs(300), 2)
+        statuses = dict(ReportJob.objects.values_list('id', 'status'))
+        self.assertEqual(statuses[beating.id], ReportJob.STATUS_RUNNING)
+        self.assertEqual(statuses[dead.id], ReportJob.STATUS_QUEUED)
+        self.assertEqual(statuses[legacy.id], ReportJob.STATUS_QUEUED)
+        self.assertEqual(statuses[done.id], ReportJob.STATUS_DONE)
+
+
+class HeartbeatTests(TransactionTestCase):
+    """The heartbeat thread writes through its own connection, so this needs committed rows."""
+
+    def test_running_job_keeps_beating(self):
+        ReportJob.objects.create(action='download_csv')
+        job = jobs.claim_next_job()
+        ReportJob.objects.filter(id=job.id).update(heartbeat_at=_ago(hours=1))
+        beats = []
+
+        def _slow_job(running):
+            for _ in range(100):
+                if ReportJob.objects.get(id=running.id).heartbeat_at > _ago(seconds=30):
+                    break
+                time.sleep(0.05)
+            beats.append(jobs.requeue_stale_jobs(300))
+            running.status = ReportJob.STATUS_DONE
+            running.finished_at = timezone.now()
+
+        with mock.patch.object(jobs, 'heartbeat_interval', return_value=0.01), \
+                mock.patch.object(jobs, 'run_report_job', side_effect=_slow_job):
+            job = jobs.process_job(job)
+        self.assertEqual(beats, [0])
+        self.assertEqual(job.status, ReportJob.STATUS_DONE)
+
+
+class PurgeReportJobsTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        self.storage = FileSystemStorage(location=self.media)
+        field = ReportJob._meta.get_field('file')
+        patcher = mock.patch.object(field, 'storage', self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _job(self, status, finished_at):
+        job = ReportJob.objects.create(action='download_csv', status=status, finished_at=finished_at)
+        job.file.save(f'report-{job.id}.csv', ContentFile(b'a,b\n'), save=True)
+        return job
+
+    def test_deletes_old_finished_jobs_and_files(self):
+        old_done = self._job(ReportJob.STATUS_DONE, _ago(days=10))
+        old_failed = self._job(ReportJob.STATUS_FAILED, _ago(days=8))
+        recent = self._job(ReportJob.STATUS_DONE, _ago(days=1))
+        running = self._job(ReportJob.STATUS_RUNNING, None)
+        old_name = old_done.file.name
+
+        self.assertEqual(jobs.purge_report_jobs(7), 2)
+        self.assertEqual(set(ReportJob.objects.values_list('id', flat=True)), {recent.id, running.id})
+        self.assertFalse(self.storage.exists(old_name))
+        self.assertFalse(self.storage.exists(old_failed.file.name))
+        self.assertTrue(self.storage.exists(recent.file.name))
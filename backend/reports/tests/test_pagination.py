@@ -0,0 +1,185 @@
+from unittest import mock
+
+import pandas as pd
+from django.test import TestCase
+
+from reports.bq import _bq_report_sql
+from reports.filters import resolve_report_filters
+from reports.pagination import (
+    cursor_matches,
+    decode_cursor,
+    detail_page,
+    encode_cursor,
+    keyset_page,
+    keyset_window,
+)
+from reports.pipeline import MARIA_PAGE_KEY, maria_report_plan
+
+KEY = ['Creator', 'RowID']
+
+
+def _frame():
+    # Out of order on purpose; key order is ('', 9) (A, 1) (A, 3) (A, 7) (B, 2) (B, 5).
+    return pd.DataFrame({
+        'Creator': ['B', 'A', None, 'A', 'B', 'A'],
+        'RowID': [5, 3, 9, 1, 2, 7],
+        'Package': [1.0, 2.0, 0.5, None, 1.25, 3.0],
+    })
+
+
+def _keys(df):
+    return list(zip(df['Creator'].fillna(''), df['RowID']))
+
+
+class CursorTests(TestCase):
+    def test_round_trip(self):
+        raw = encode_cursor('next', ('reseller:with:colons', 'rs1', 42.0))
+        self.assertEqual(raw, 'next:["reseller:with:colons","rs1",42]')
+        self.assertEqual(decode_cursor(raw), ('next', ('reseller:with:colons', 'rs1', 42)))
+
+    def test_fractional_ids_survive(self):
+        self.assertEqual(decode_cursor(encode_cursor('prev', ('a', 2.5))), ('prev', ('a', 2.5)))
+
+    def test_invalid_cursors(self):
+        for raw in (None, '', 'next', 'next:[]', 'next:{"a":1}', 'next:[true]', 'down:["a",1]', 'next:1:a'):
+            self.assertIsNone(decode_cursor(raw), raw)
+
+    def test_cursor_must_match_key(self):
+        self.assertTrue(cursor_matches(('next', ('A', 1)), KEY))
+        self.assertFalse(cursor_matches(('next', ('A', 'rs1', 1)), KEY))
+        self.assertFalse(cursor_matches(('next', (1, 'A')), KEY))
+
+
+class KeysetPageTests(TestCase):
+    def test_walks_forward_and_back(self):
+        df = _frame()
+        page, next_cursor, prev_cursor = keyset_page(df, KEY, 2)
+        self.assertEqual(_keys(page), [('', 9), ('A', 1)])
+        self.assertIsNone(prev_cursor)
+        self.assertEqual(next_cursor, 'next:["A",1]')
+
+        page, next_cursor, prev_cursor = keyset_page(df, KEY, 2, decode_cursor(next_cursor))
+        self.assertEqual(_keys(page), [('A', 3), ('A', 7)])
+        self.assertEqual(prev_cursor, 'prev:["A",3]')
+
+        last, last_next, _ = keyset_page(df, KEY, 2, decode_cursor(next_cursor))
+        self.assertEqual(_keys(last), [('B', 2), ('B', 5)])
+        self.assertIsNone(last_next)
+
+        back, _, back_prev = keyset_page(df, KEY, 2, decode_cursor(prev_cursor))
+        self.assertEqual(_keys(back), [('', 9), ('A', 1)])
+        self.assertIsNone(back_prev)
+
+    def test_cursor_between_keys(self):
+        # The row the cursor points at may be gone; the page starts at the next key.
+        page, _, _ = keyset_page(_frame(), KEY, 2, ('next', ('A', 4)))
+        self.assertEqual(_keys(page), [('A', 7), ('B', 2)])
+
+    def test_foreign_cursor_starts_over(self):
+        page, _, _ = keyset_page(_frame(), KEY, 2, ('next', ('A', 'rs1', 4)))
+        self.assertEqual(_keys(page), [('', 9), ('A', 1)])
+
+    def test_single_page(self):
+        page, next_cursor, prev_cursor = keyset_page(_frame(), KEY, 50)
+        self.assertEqual(len(page), 6)
+        self.assertIsNone(next_cursor)
+        self.assertIsNone(prev_cursor)
+
+    def test_detail_page_totals_cover_whole_frame(self):
+        page, _, _, total_count, total_gb = detail_page(_frame(), 2)
+        self.assertEqual(len(page), 2)
+        self.assertEqual(total_count, 6)
+        self.assertEqual(total_gb, 7.75)
+
+    def test_ties_across_sources(self):
+        # Row ids repeat across sources; every row must still be paged exactly once.
+        df = pd.DataFrame({
+            'Creator': ['- User_From_Site -'] * 4,
+            'RowID': [1, 2, 2, 3],
+            'Source': ['rs1', 'rs1', 'rs2', 'rs2'],
+        })
+        seen, cursor = [], None
+        while True:
+            page, next_cursor, _, total_count, _ = detail_page(df, 2, decode_cursor(cursor))
+            seen.extend(zip(page['Source'], page['RowID']))
+            if next_cursor is None:
+                break
+            cursor = next_cursor
+        self.assertEqual(total_count, 4)
+        self.assertEqual(seen, [('rs1', 1), ('rs1', 2), ('rs2', 2), ('rs2', 3)])
+
+
+class KeysetWindowTests(TestCase):
+    def test_extra_row_means_next_page(self):
+        fetched = _frame().iloc[[0, 1, 4]]  # page_size + 1 rows past the cursor, in source order
+        page, next_cursor, prev_cursor = keyset_window(fetched, 2, ('next', ('A', 1)))
+        self.assertEqual(_keys(page), [('A', 3), ('B', 2)])
+        self.assertEqual(next_cursor, 'next:["B",2]')
+        self.assertEqual(prev_cursor, 'prev:["A",3]')
+
+    def test_prev_keeps_rows_nearest_the_cursor(self):
+        fetched = _frame().iloc[[1, 3, 5]]  # (A, 3), (A, 1), (A, 7) before ('B', 2)
+        page, next_cursor, prev_cursor = keyset_window(fetched, 2, ('prev', ('B', 2)))
+        self.assertEqual(_keys(page), [('A', 3), ('A', 7)])
+        self.assertEqual(next_cursor, 'next:["A",7]')
+        self.assertEqual(prev_cursor, 'prev:["A",3]')
+
+    def test_last_page(self):
+        page, next_cursor, _ = keyset_window(_frame().iloc[:2], 2, None)
+        self.assertEqual(len(page), 2)
+        self.assertIsNone(next_cursor)
+
+    def test_merges_sources_on_page_key(self):
+        # page_size + 1 rows from each source, as the per-source queries return them.
+        fetched = pd.DataFrame({
+            'Source': ['rs2', 'rs2', 'rs2', 'rs1', 'rs1'],
+            'CreatorID': [3, 3, 4, 7, 7],
+            'RowID': [2, 5, 1, 1, 2],
+        })
+        page, next_cursor, _ = keyset_window(fetched, 2, None, key_cols=MARIA_PAGE_KEY)
+        self.assertEqual(list(zip(page['Source'], page['RowID'])), [('rs1', 1), ('rs1', 2)])
+        self.assertEqual(next_cursor, 'next:["rs1",7,2]')
+
+
+class MariaPageSqlTests(TestCase):
+    @mock.patch('reports.pipeline.get_sources', return_value=[{'name': 'rs1'}, {'name': 'rs2'}, {'name': 'rs3'}])
+    def test_page_predicate_per_source(self, _get_sources):
+        plan, _names, _ids, _unresolved = maria_report_plan(
+            [None], resolve_report_filters({}), page=(25, ('next', ('rs2', 4, 7.0)))
+        )
+        self.assertEqual(plan['rs1'], [])  # wholly before the cursor
+        (query, params), = plan['rs2']
+        self.assertIn('(TName.Creator_Id > %s OR (TName.Creator_Id = %s AND TName.User_ServiceBase_Id > %s))', query)
+        self.assertIn('ORDER BY TName.Creator_Id ASC, TName.User_ServiceBase_Id ASC', query)
+        self.assertNotIn('ORDER BY TName.CDT', query)
+        self.assertEqual(params[-4:], [4, 4, 7, 26])
+        (query, params), = plan['rs3']
+        self.assertNotIn('TName.User_ServiceBase_Id >', query)
+        self.assertEqual(params[-1], 26)
+
+    @mock.patch('reports.pipeline.get_sources', return_value=[{'name': 'rs1'}, {'name': 'rs2'}])
+    def test_prev_page_reads_backwards(self, _get_sources):
+        plan, _names, _ids, _unresolved = maria_report_plan(
+            [None], resolve_report_filters({}), page=(25, ('prev', ('rs1', 4, 7.0)))
+        )
+        self.assertEqual(plan['rs2'], [])  # wholly after the cursor
+        (query, _params), = plan['rs1']
+        self.assertIn('TName.User_ServiceBase_Id < %s', query)
+        self.assertIn('ORDER BY TName.Creator_Id DESC, TName.User_ServiceBase_Id DESC', query)
+
+
+class BigQueryPageSqlTests(TestCase):
+    def test_source_breaks_ties(self):
+        query, params = _bq_report_sql(
+            'p.d.report_user_service', [None], resolve_report_filters({}),
+            page=(25, ('next', ('- User_From_Site -', 'rs1', 2))),
+        )
+        self.assertIn("(COALESCE(rs_username, '') = @cursor_creator AND COALESCE(rs_name, '') > @cursor_source)", query)
+        self.assertIn(
+            "ORDER BY COALESCE(rs_username, '') ASC, COALESCE(rs_name, '') ASC, COALESCE(UserServiceID, -1) ASC",
+            query,
+        )
+        values = {p.name: p.value for p in params}
+        self.assertEqual(values['cursor_source'], 'rs1')
+        self.assertEqual(values['cursor_id'], 2)
+        self.assertEqual(values['limit'], 26)
@@ -0,0 +1,107 @@
+from unittest import mock
+
+import pandas as pd
+from django.test import TestCase
+
+from maria_cache.models import Reseller
+from reports import pipeline
+from reports.filters import resolve_report_filters
+
+SOURCES = [{'name': 'rs1'}, {'name': 'rs2'}]
+
+
+@mock.patch('reports.db.get_sources', return_value=SOURCES)
+@mock.patch.object(pipeline, 'get_sources', return_value=SOURCES)
+class CreatorResolutionTests(TestCase):
+    databases = {'default', 'cache'}
+
+    def setUp(self):
+        # Reseller ids differ per server for the same name.
+        Reseller.objects.create(source_name='rs1', source_id=3, name='Alpha', name_norm='alpha')
+        Reseller.objects.create(source_name='rs2', source_id=8, name='ALPHA', name_norm='alpha')
+        Reseller.objects.create(source_name='rs2', source_id=9, name='Beta', name_norm='beta')
+
+    def plan(self, creators):
+        with mock.patch('reports.db._run_df', return_value=pd.DataFrame()) as run_df:
+            result = pipeline.maria_report_plan(creators, resolve_report_filters({}))
+        self.lookups = [call.kwargs['source_name'] for call in run_df.call_args_list]
+        return result
+
+    def test_names_become_creator_ids_per_source(self, *_sources):
+        plan, source_names, ids_by_source, unresolved = self.plan(['alpha', ' Beta'])
+        self.assertEqual(source_names, ['rs1', 'rs2'])
+        self.assertEqual(ids_by_source, {'rs1': {'alpha': [3]}, 'rs2': {'alpha': [8], ' Beta': [9]}})
+        (query, params), = plan['rs1']
+        self.assertIn('AND TName.Creator_Id IN (%s)', query)
+        self.assertNotIn('ResellerName =', query)
+        self.assertEqual(params, [3])
+        (query, params), = plan['rs2']
+        self.assertIn('AND TName.Creator_Id IN (%s,%s)', query)
+        self.assertEqual(params, [8, 9])
+        # Beta is only missing on rs1, so it isn't reported as unresolved.
+        self.assertEqual(unresolved, [])
+        self.assertEqual(self.lookups, ['rs1'])
+
+    def test_names_unknown_everywhere_are_unresolved(self, *_sources):
+        plan, _names, _ids, unresolved = self.plan(['Alpha', 'Nobody'])
+        self.assertEqual(unresolved, ['Nobody'])
+        self.assertEqual(plan['rs1'][0][1], [3])
+
+    def test_unresolved_names_query_nothing(self, *_sources):
+        plan, _names, _ids, unresolved = self.plan(['Nobody'])
+        self.assertEqual(plan, {'rs1': [], 'rs2': []})
+        self.assertEqual(unresolved, ['Nobody'])
+
+    def test_all_creators_skip_resolution(self, *_sources):
+        plan, _names, ids_by_source, unresolved = self.plan([None])
+        self.assertEqual(ids_by_source, {})
+        self.assertEqual(unresolved, [])
+        self.assertEqual(self.lookups, [])
+        for source_name in ('rs1', 'rs2'):
+            (query, params), = plan[source_name]
+            self.assertNotIn('Creator_Id IN', query)
+            self.assertEqual(params, [])
+
+
+def _detail_rows(creator_ids, creators):
+    return pd.DataFrame({
+        'RowID': list(range(1, len(creator_ids) + 1)),
+        'CreatorID': creator_ids,
+        'Creator': creators,
+        'PackageValue': [1.0] * len(creator_ids),
+    })
+
+
+@mock.patch.dict('os.environ', {'REPORT_CREATOR_BATCH_SIZE': '2'})
+@mock.patch('reports.db.get_sources', return_value=SOURCES[:1])
+@mock.patch.object(pipeline, 'get_sources', return_value=SOURCES[:1])
+class SetBasedQueryTests(TestCase):
+    databases = {'default', 'cache'}
+
+    def setUp(self):
+        for i, name in enumerate(['A', 'B', 'C'], 1):
+            Reseller.objects.create(source_name='rs1', source_id=i, name=name, name_norm=name.lower())
+
+    def test_creators_share_one_query_per_id_batch(self, *_sources):
+        queries = []
+
+        def _run_query(query, params=None, tables_priority=None, source_name=None):
+            queries.append(params)
+            ids = [p for p in params if p in (1, 2, 3)]
+            return _detail_rows(ids, [chr(64 + i) for i in ids]), 'Huser_servicebase'
+
+        with mock.patch('reports.db.run_query', side_effect=_run_query):
+            df, meta, error = pipeline.fetch_report(['A', 'b', 'C'], resolve_report_filters({}))
+        self.assertIsNone(error)
+        self.assertEqual(queries, [[1, 2], [3]])
+        self.assertEqual(sorted(df['Creator']), ['A', 'B', 'C'])
+        self.assertNotIn('CreatorID', df.columns)
+        self.assertEqual(
+            meta['info_tables'],
+            ['A ← Huser_servicebase', 'b ← Huser_servicebase', 'C ← Huser_servicebase'],
+        )
+
+    def test_info_lines_only_name_creators_with_rows(self, *_sources):
+        with mock.patch('reports.db.run_query', return_value=(_detail_rows([2], ['B']), 'Huser_servicebase')):
+            _df, meta, _error = pipeline.fetch_report(['A', 'B'], resolve_report_filters({}))
+        self.assertEqual(meta['info_tables'], ['B ← Huser_servicebase'])
@@ -0,0 +1,29 @@
+from django.test import TestCase
+
+from reports.preflight import BACKGROUND, INLINE, NARROW, preflight_decision
+
+BUDGETS = {'inline_rows': 100, 'inline_bytes': 1000, 'max_rows': 500, 'max_bytes': 5000}
+
+
+class PreflightDecisionTests(TestCase):
+    def decide(self, rows=None, size=None, budgets=BUDGETS):
+        return preflight_decision({'rows': rows, 'bytes': size}, budgets)
+
+    def test_no_estimate_runs_inline(self):
+        self.assertEqual(preflight_decision(None, BUDGETS), INLINE)
+        self.assertEqual(self.decide(), INLINE)
+
+    def test_budgets_are_inclusive(self):
+        self.assertEqual(self.decide(rows=100, size=1000), INLINE)
+        self.assertEqual(self.decide(rows=101), BACKGROUND)
+        self.assertEqual(self.decide(size=1001), BACKGROUND)
+        self.assertEqual(self.decide(rows=500, size=5000), BACKGROUND)
+
+    def test_hard_cap_wins(self):
+        self.assertEqual(self.decide(rows=501), NARROW)
+        self.assertEqual(self.decide(rows=10, size=5001), NARROW)
+
+    def test_zero_budget_disables_the_limit(self):
+        unlimited = {'inline_rows': 0, 'inline_bytes': 0, 'max_rows': 0, 'max_bytes': 0}
+        self.assertEqual(self.decide(rows=10 ** 9, size=10 ** 12, budgets=unlimited), INLINE)
+        self.assertEqual(self.decide(rows=501, budgets={**BUDGETS, 'max_rows': 0}), BACKGROUND)
@@ -0,0 +1,136 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import pandas as pd
+from django.test import TestCase, override_settings
+
+from reports.cache_backends import BoundedFileCache
+from reports.report_cache import ReportCache, fingerprint
+
+LOCMEM_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'default-tests'},
+    'reports': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'report-cache-tests'},
+}
+
+
+class BoundedFileCacheTests(TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+
+    def cache(self, **options):
+        return BoundedFileCache(self.dir, {'OPTIONS': options})
+
+    def age(self, cache, key, seconds_ago):
+        stamp = time.time() - seconds_ago
+        os.utime(cache._key_to_file(key), (stamp, stamp))
+
+    def test_evicts_least_recently_used_over_entry_limit(self):
+        cache = self.cache(MAX_ENTRIES=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        self.age(cache, 'a', 20)
+        self.age(cache, 'b', 10)
+        self.assertEqual(cache.get('a'), 1)  # now the most recently used
+        cache.set('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+
+    def test_stays_under_byte_budget(self):
+        cache = self.cache(MAX_ENTRIES=100, MAX_BYTES=3000)
+        for i in range(5):
+            cache.set(f'k{i}', os.urandom(1000))
+            self.age(cache, f'k{i}', 100 - i)
+        sizes = [os.path.getsize(f) for f in cache._list_cache_files()]
+        self.assertLessEqual(sum(sizes), 3000)
+        self.assertIsNotNone(cache.get('k4'))
+        self.assertIsNone(cache.get('k0'))
+
+    def test_miss_returns_default(self):
+        self.assertEqual(self.cache().get('missing', 'fallback'), 'fallback')
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ReportCacheTests(TestCase):
+    def setUp(self):
+        self.cache = ReportCache(ttl=60, max_bytes=1024 * 1024, lock_wait=5)
+        self.cache.clear()
+        self.calls = 0
+
+    def compute(self, error=None):
+        def _compute():
+            self.calls += 1
+            return pd.DataFrame({'Creator': ['A', 'B'], 'Package': [1.5, None]}), {'info_tables': ['x']}, error
+        return _compute
+
+    def test_second_request_is_served_from_the_cache(self):
+        df, meta, error = self.cache.get_or_compute('k', 'maria', self.compute())
+        cached_df, cached_meta, cached_error = self.cache.get_or_compute('k', 'maria', self.compute())
+        self.assertEqual(self.calls, 1)
+        pd.testing.assert_frame_equal(cached_df, df)
+        self.assertEqual(cached_meta, meta)
+        self.assertIsNone(cached_error)
+        self.assertIsNotNone(self.cache.get('k', 'maria'))
+        self.assertIsNone(self.cache.get('k', 'bigquery'))
+
+    def test_failed_results_are_not_cached(self):
+        self.cache.get_or_compute('k', 'maria', self.compute(error='rs1: timed out'))
+        _df, _meta, error = self.cache.get_or_compute('k', 'maria', self.compute())
+        self.assertEqual(self.calls, 2)
+        self.assertIsNone(error)
+
+    def test_invalidation_is_per_source(self):
+        self.cache.get_or_compute('k', 'maria', self.compute())
+        self.cache.get_or_compute('k', 'bigquery', self.compute())
+        self.cache.invalidate('bigquery')
+        self.assertIsNotNone(self.cache.get('k', 'maria'))
+        self.assertIsNone(self.cache.get('k', 'bigquery'))
+        self.cache.invalidate()
+        self.assertIsNone(self.cache.get('k', 'maria'))
+
+    def test_concurrent_misses_compute_once(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def _slow():
+            started.set()
+            release.wait(5)
+            return self.compute()()
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.cache.get_or_compute('k', 'maria', _slow)))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        started.wait(5)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(len(results), 4)
+        # Each caller gets its own copy to modify.
+        self.assertEqual(len({id(df) for df, _meta, _error in results}), 4)
+
+    def test_disabled_or_oversized_frames_are_not_stored(self):
+        small = ReportCache(ttl=60, max_bytes=10)
+        small.get_or_compute('k', 'maria', self.compute())
+        self.assertIsNone(small.get('k', 'maria'))
+        off = ReportCache(ttl=0)
+        off.get_or_compute('k', 'maria', self.compute())
+        off.get_or_compute('k', 'maria', self.compute())
+        self.assertEqual(self.calls, 3)
+
+    def test_fingerprint_normalizes_creators(self):
+        filters = {'serial': None, 'date': ('=', '2026-01-01', None)}
+        self.assertEqual(
+            fingerprint('maria', ['Alpha ', 'beta'], filters, 'admin'),
+            fingerprint('maria', ['BETA', 'alpha'], dict(filters), 'admin'),
+        )
+        self.assertNotEqual(
+            fingerprint('maria', ['alpha'], filters, 'admin'),
+            fingerprint('maria', ['alpha'], filters, 'reseller:alpha'),
+        )
@@ -0,0 +1,115 @@
+import datetime
+from unittest import mock
+
+from django.test import TestCase
+from google.api_core.exceptions import NotFound
+
+from reports import bq, rollup, sync
+from reports.filters import resolve_report_filters
+
+TABLE_ID = 'proj.ds.report_user_service'
+ROLLUP_ID = 'proj.ds.report_user_service_daily'
+
+
+def _client(labels=None, exists=True):
+    client = mock.Mock()
+    if exists:
+        client.get_table.return_value.labels = labels or {}
+        client.get_table.return_value.schema = bq.REPORT_USER_SERVICE_SCHEMA
+    else:
+        client.get_table.side_effect = NotFound('missing')
+    client.query.return_value.result.return_value = []
+    return client
+
+
+class RollupSqlTests(TestCase):
+    def test_rollup_table_name(self):
+        self.assertEqual(rollup.rollup_table_id(TABLE_ID), ROLLUP_ID)
+        with mock.patch.dict('os.environ', {'BQ_ROLLUP_TABLE': 'other.daily'}):
+            self.assertEqual(rollup.rollup_table_id(TABLE_ID), 'other.daily')
+
+    def test_row_level_filters_need_the_report_rows(self):
+        self.assertTrue(rollup.rollup_supports(resolve_report_filters({'date_value': datetime.date(2026, 1, 1)})))
+        self.assertFalse(rollup.rollup_supports(resolve_report_filters({'serial_value': 5})))
+        self.assertFalse(rollup.rollup_supports(resolve_report_filters({'sib_serial_value': 5})))
+        self.assertFalse(rollup.rollup_supports(resolve_report_filters({'service_status': 'Pending'})))
+
+    def test_rebuild_replaces_the_table(self):
+        client = _client()
+        self.assertEqual(rollup.rebuild_rollup(client, TABLE_ID), ROLLUP_ID)
+        query = client.query.call_args.args[0]
+        self.assertTrue(query.startswith(f'CREATE OR REPLACE TABLE `{ROLLUP_ID}`\nPARTITION BY Day\n'))
+        self.assertIn('GROUP BY Day, Source, rs_username, rs_username_norm, ServiceName, Status, IsUnlimited', query)
+        self.assertIn('WHERE TRUE', query)
+
+    def test_refresh_recomputes_the_staged_days_only(self):
+        client = _client()
+        rollup.refresh_rollup_days(client, TABLE_ID, stage_table='proj.ds.stage', retention_days=30)
+        query = client.query.call_args.args[0]
+        self.assertIn('SELECT ARRAY_AGG(DISTINCT CreateDate IGNORE NULLS) FROM `proj.ds.stage`', query)
+        self.assertIn(f'DELETE FROM `{ROLLUP_ID}` WHERE Day IN UNNEST(changed_days);', query)
+        self.assertIn('WHERE CreateDate IN UNNEST(changed_days)', query)
+        self.assertIn('INTERVAL @retention_days DAY', query)
+        client.query.assert_called_once()
+
+    def test_refresh_of_a_window(self):
+        client = _client()
+        rollup.refresh_rollup_days(
+            client, TABLE_ID, start_date=datetime.date(2026, 1, 1), end_date=datetime.date(2026, 1, 31),
+        )
+        query = client.query.call_args.args[0]
+        self.assertIn('WHERE Day >= @window_start AND Day <= @window_end;', query)
+        params = {p.name: p.value for p in client.query.call_args.kwargs['job_config'].query_parameters}
+        self.assertEqual(params['window_end'], datetime.date(2026, 1, 31))
+
+    def test_stale_or_missing_rollup_is_rebuilt(self):
+        for client in (_client(labels={rollup.STALE_LABEL: 'true'}), _client(exists=False)):
+            rollup.refresh_rollup_days(client, TABLE_ID, stage_table='proj.ds.stage')
+            self.assertTrue(client.query.call_args.args[0].startswith('CREATE OR REPLACE TABLE'))
+
+
+@mock.patch.dict('os.environ', {'BQ_ROLLUP': '1'})
+class RollupReadTests(TestCase):
+    def setUp(self):
+        bq._creator_norm_tables.clear()
+        self.addCleanup(bq._creator_norm_tables.clear)
+
+    def summary(self, client, filters):
+        with mock.patch.object(bq, 'get_bq_client', return_value=client), \
+                mock.patch.object(bq, 'get_bq_table_id', return_value=TABLE_ID):
+            _df, table_id = bq.run_bq_summary_query(['a'], resolve_report_filters(filters))
+        return table_id, client.query.call_args.args[0]
+
+    def test_summaries_read_the_rollup(self):
+        table_id, query = self.summary(_client(), {'date_value': datetime.date(2026, 1, 1)})
+        self.assertEqual(table_id, ROLLUP_ID)
+        self.assertIn('SUM(Count) AS Count', query)
+        self.assertIn('Day >= @date_lower', query)
+
+    def test_stale_rollup_or_row_filters_read_the_report_rows(self):
+        table_id, query = self.summary(_client(labels={rollup.STALE_LABEL: 'true'}), {})
+        self.assertEqual(table_id, TABLE_ID)
+        self.assertIn('COUNT(1) AS Count', query)
+        table_id, _query = self.summary(_client(), {'serial_value': 5})
+        self.assertEqual(table_id, TABLE_ID)
+
+
+@mock.patch.dict('os.environ', {'BQ_ROLLUP': '1'})
+@mock.patch.object(sync, 'log_sync_event')
+class RefreshAfterSyncTests(TestCase):
+    def test_failed_refresh_falls_back_to_a_rebuild(self, log_event):
+        with mock.patch.object(sync, 'refresh_rollup_days', side_effect=RuntimeError('quota')), \
+                mock.patch.object(sync, 'rebuild_rollup', return_value=ROLLUP_ID) as rebuild, \
+                self.assertLogs('reports.sync', 'WARNING'):
+            sync._refresh_rollup(mock.Mock(), TABLE_ID, 'US', stage_table='proj.ds.stage')
+        rebuild.assert_called_once()
+        self.assertEqual(log_event.call_args.args[0], 'rollup_refreshed')
+        self.assertFalse(log_event.call_args.kwargs['incremental'])
+
+    def test_failed_rebuild_marks_the_rollup_stale(self, log_event):
+        with mock.patch.object(sync, 'rebuild_rollup', side_effect=RuntimeError('quota')), \
+                mock.patch.object(sync, 'mark_rollup_stale') as mark_stale, \
+                self.assertLogs('reports.sync', 'WARNING'):
+            sync._refresh_rollup(mock.Mock(), TABLE_ID, 'US')
+        mark_stale.assert_called_once()
+        self.assertEqual(log_event.call_args.args[:2], ('rollup_error', 'Daily rollup rebuild failed'))
@@ -0,0 +1,87 @@
+import re
+import sqlite3
+from unittest import mock
+
+import pandas as pd
+from django.test import TestCase
+
+from reports import bq, pipeline
+from reports.filters import resolve_report_filters
+from reports.pipeline import unlimited_mask
+from reports.summary import build_summary, maria_unlimited_sql, summaries_from_aggregates
+
+
+def _detail_rows():
+    return pd.DataFrame({
+        'Creator': ['B', 'A', 'A', 'B', 'A', 'B', 'A', 'A', None],
+        'ServiceName': ['10GB', '5 gig', 'Unlimited', 'DDC Unlimited', 'DDC 20GB', 'Night 2_GB', None, '10GB',
+                        'Unlimited'],
+        'PackageBytes': [10, 5, 0, None, 20, 0, 3, 10, None],
+        'Package': [10.0, 5.0, 0.0, None, 20.0, 0.0, 3.0, 10.0, None],
+    })
+
+
+def _aggregate(df, mask):
+    """What the summary SQL returns: one row per (creator, service, unlimited class)."""
+    return (
+        df.assign(IsUnlimited=mask.astype(int))
+        .groupby(['Creator', 'ServiceName', 'IsUnlimited'], as_index=False)
+        .agg(Count=('Package', 'size'), SumGB=('Package', 'sum'))
+    )
+
+
+class ServerSideSummaryTests(TestCase):
+    def test_aggregates_give_the_detail_row_summaries(self):
+        df = _detail_rows()
+        mask = unlimited_mask(df)
+        # Two sources return rows for the same creator and service; they add up.
+        agg = pd.concat([_aggregate(df.iloc[:5], mask.iloc[:5]), _aggregate(df.iloc[5:], mask.iloc[5:])])
+        limited, unlimited = summaries_from_aggregates(agg)
+        self.assertEqual(limited, build_summary(df[~mask], 'Creator'))
+        self.assertEqual(unlimited, build_summary(df[mask], 'Creator'))
+        self.assertEqual(summaries_from_aggregates(pd.DataFrame()), (([], None, None), ([], None, None)))
+
+    def test_sql_unlimited_flag_matches_the_pandas_mask(self):
+        conn = sqlite3.connect(':memory:')
+        self.addCleanup(conn.close)
+        # MariaDB's REGEXP, for the patterns' PCRE subset.
+        conn.create_function('regexp', 2, lambda pattern, value: re.search(pattern, value) is not None)
+        df = _detail_rows()
+        sql, params = maria_unlimited_sql('Pkg', 'Name')
+        sql = sql.replace('%s', '?')
+        rows = [(None if pd.isna(p) else p, n) for p, n in zip(df['PackageBytes'], df['ServiceName'])]
+        flags = [bool(conn.execute(f'SELECT {sql} FROM (SELECT ? AS Pkg, ? AS Name)', [*params, *row]).fetchone()[0])
+                 for row in rows]
+        self.assertEqual(flags, list(unlimited_mask(df)))
+
+    @mock.patch.object(pipeline, 'get_sources', return_value=[{'name': 'rs1'}])
+    def test_maria_summary_groups_in_sql(self, _sources):
+        plan, _names, _ids, _unresolved = pipeline.maria_report_plan(
+            [None], resolve_report_filters({'service_status': 'Active'}), mode='summary'
+        )
+        (query, params), = plan['rs1']
+        self.assertIn('COUNT(*) AS Count', query)
+        self.assertIn('GROUP BY CreatorID, Creator, ServiceName, IsUnlimited', query)
+        self.assertNotIn('Hu.Username', query)
+        self.assertEqual(query.count('%s'), len(params))
+        self.assertEqual(params[-1], 'Active')
+
+    @mock.patch.dict('os.environ', {'BQ_ROLLUP': '0'})
+    def test_bigquery_summary_groups_in_sql(self):
+        bq._creator_norm_tables.clear()
+        self.addCleanup(bq._creator_norm_tables.clear)
+        client = mock.Mock()
+        client.get_table.return_value.schema = bq.REPORT_USER_SERVICE_SCHEMA
+        client.query.return_value.result.return_value = [
+            {'Creator': 'A', 'ServiceName': '10GB', 'IsUnlimited': False, 'Count': 2, 'SumGB': 20.0},
+        ]
+        with mock.patch.object(bq, 'get_bq_client', return_value=client), \
+                mock.patch.object(bq, 'get_bq_table_id', return_value='p.d.report_user_service'):
+            df, table_id = bq.run_bq_summary_query(['a'], resolve_report_filters({}))
+        self.assertEqual(table_id, 'p.d.report_user_service')
+        self.assertEqual(list(df.columns), ['Creator', 'ServiceName', 'IsUnlimited', 'Count', 'SumGB'])
+        query = client.query.call_args.args[0]
+        self.assertIn('GROUP BY Creator, ServiceName, IsUnlimited', query)
+        self.assertIn('rs_username_norm IN UNNEST(@creator_list)', query)
+        params = {p.name for p in client.query.call_args.kwargs['job_config'].query_parameters}
+        self.assertEqual(params, {'creator_list', 'gb_name_pattern', 'ddc_name_pattern'})
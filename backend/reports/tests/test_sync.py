@@ -0,0 +1,637 @@
+import datetime
+import io
+import threading
+import time
+from unittest import mock
+
+import pandas as pd
+from django.test import TestCase
+from google.cloud import bigquery
+
+from maria_cache.models import Reseller, Service
+from reports import bq, sync
+from reports.management.commands import backfill_report_user_service as backfill
+from reports.filters import resolve_report_filters
+from reports.models import SyncWatermark
+
+TABLE_ID = 'proj.ds.report_user_service'
+BQ_ENV = {'BQ_PROJECT': 'proj', 'BQ_DATASET': 'ds', 'BQ_TABLE': 'report_user_service', 'BQ_LOCATION': 'US'}
+
+
+def _batch(source, ids, dates):
+    return pd.DataFrame({
+        'id': ids,
+        'UserServiceID': ids,
+        'CreateDate': [datetime.date.fromisoformat(d) for d in dates],
+        'rs_name': source,
+    })
+
+
+def _raw_rows(ids, reseller='Alpha'):
+    """Rows as the wide sync SELECT returns them from MariaDB."""
+    return [{
+        'CreateDate': datetime.datetime(2026, 3, 1, 10, 0),
+        'rs_userid': 7,
+        'rs_username': f' {reseller} ',
+        'rs_name': reseller,
+        'UserServiceID': i,
+        'username': f'u{i}',
+        'ServiceName': '10GB',
+        'ServicePrice': '1000',
+        'Package': 10,
+        'ServiceStatus': 'Active',
+        'StartDate': '2026-03-01',
+        'EndDate': None,
+    } for i in ids]
+
+
+class _FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self._rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        self.conn.queries.append((query, params))
+        self._rows = list(self.conn.rows)
+
+    def fetchmany(self, size):
+        self.conn.fetches += 1
+        chunk, self._rows = self._rows[:size], self._rows[size:]
+        return chunk
+
+    def fetchall(self):
+        chunk, self._rows = self._rows, []
+        return chunk
+
+
+class _FakeConn:
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+        self.fetches = 0
+        self.closed = False
+
+    def cursor(self):
+        return _FakeCursor(self)
+
+    def close(self):
+        self.closed = True
+
+
+class MergeReportRowsTests(TestCase):
+    def merge(self, **kwargs):
+        client = mock.Mock()
+        client.query.return_value.num_dml_affected_rows = 7
+        affected = sync._merge_report_rows(client, 'proj.ds.stage', TABLE_ID, 'US', **kwargs)
+        query = client.query.call_args.args[0]
+        params = client.query.call_args.kwargs['job_config'].query_parameters
+        return affected, query, params
+
+    def test_retention_deletes_old_rows_missing_from_the_stage(self):
+        affected, query, params = self.merge(retention_days=30)
+        self.assertEqual(affected, 7)
+        self.assertIn('ON T.rs_name = S.rs_name AND T.UserServiceID = S.UserServiceID', query)
+        self.assertIn(
+            'WHEN NOT MATCHED BY SOURCE AND T.CreateDate < DATE_SUB(CURRENT_DATE(), INTERVAL @retention_days DAY) THEN\n'
+            '  DELETE',
+            query,
+        )
+        self.assertEqual([(p.name, p.value) for p in params], [('retention_days', 30)])
+
+    def test_without_retention_nothing_is_deleted(self):
+        _affected, query, params = self.merge()
+        self.assertNotIn('NOT MATCHED BY SOURCE', query)
+        self.assertNotIn('DELETE', query)
+        self.assertEqual(params, [])
+
+
+@mock.patch.dict('os.environ', BQ_ENV)
+@mock.patch.object(sync, 'report_cache')
+@mock.patch.object(sync, 'log_sync_event')
+@mock.patch.object(sync, '_refresh_rollup')
+@mock.patch.object(sync, 'load_file_to_bq')
+@mock.patch.object(sync, 'ensure_report_table')
+@mock.patch.object(sync.bigquery, 'Client')
+@mock.patch.object(sync, '_parse_sources', return_value=[{'name': 'rs1'}, {'name': 'rs2'}])
+class IncrementalWatermarkTests(TestCase):
+    def run_sync(self, batches, **kwargs):
+        calls = []
+
+        def _iter_batches(source, chunk_size=None, deadline=None, **fetch_kwargs):
+            calls.append((source['name'], fetch_kwargs))
+            result = batches[source['name']]
+            if isinstance(result, Exception):
+                raise result
+            yield from result
+
+        with mock.patch.object(sync, '_iter_maria_batches', side_effect=_iter_batches):
+            rows = sync.sync_incremental_to_bigquery(lookback_days=2, workers=1, load_format='parquet', **kwargs)
+        return rows, dict(calls)
+
+    def marks(self):
+        return {
+            mark.source_name: (mark.last_user_service_id, mark.last_create_date)
+            for mark in SyncWatermark.objects.filter(table_id=TABLE_ID)
+        }
+
+    def test_bootstrap_then_advance(self, _sources, client_cls, *_mocks):
+        client_cls.return_value.query.return_value.num_dml_affected_rows = 0
+        rows, calls = self.run_sync({
+            'rs1': [_batch('rs1', [10, 12], ['2026-03-01', '2026-03-04']), _batch('rs1', [11], ['2026-03-02'])],
+            'rs2': [_batch('rs2', [5], ['2026-02-01'])],
+        }, bootstrap_days=90)
+        self.assertEqual(rows, 4)
+        self.assertEqual(calls['rs1'], {'days': 90})
+        self.assertEqual(self.marks(), {
+            'rs1': (12, datetime.date(2026, 3, 4)),
+            'rs2': (5, datetime.date(2026, 2, 1)),
+        })
+
+        rows, calls = self.run_sync({
+            'rs1': [_batch('rs1', [13], ['2026-03-03'])],
+            'rs2': [],
+        })
+        self.assertEqual(rows, 1)
+        self.assertEqual(calls['rs1'], {'since_id': 12, 'since_date': datetime.date(2026, 3, 2)})
+        # Ids only move forward; an older CreateDate doesn't pull the date back.
+        self.assertEqual(self.marks(), {
+            'rs1': (13, datetime.date(2026, 3, 4)),
+            'rs2': (5, datetime.date(2026, 2, 1)),
+        })
+
+    def test_failed_source_keeps_its_watermark(self, _sources, client_cls, *_mocks):
+        client_cls.return_value.query.return_value.num_dml_affected_rows = 0
+        SyncWatermark.objects.create(source_name='rs2', table_id=TABLE_ID, last_user_service_id=5)
+        with self.assertLogs('reports.sync', 'ERROR'):
+            self.run_sync({
+                'rs1': [_batch('rs1', [3], ['2026-03-01'])],
+                'rs2': RuntimeError('connection lost'),
+            })
+        self.assertEqual(self.marks(), {'rs1': (3, datetime.date(2026, 3, 1)), 'rs2': (5, None)})
+
+    def test_failed_merge_keeps_all_watermarks(self, _sources, client_cls, *_mocks):
+        client_cls.return_value.query.side_effect = RuntimeError('merge failed')
+        with self.assertRaises(RuntimeError):
+            self.run_sync({'rs1': [_batch('rs1', [3], ['2026-03-01'])], 'rs2': []})
+        self.assertEqual(self.marks(), {})
+        client_cls.return_value.delete_table.assert_called_once()
+
+
+class StableRowIdTests(TestCase):
+    def test_ids_depend_only_on_source_and_row(self):
+        ids = pd.Series([1, 2], dtype='Int64')
+        self.assertEqual(list(sync._stable_ids('rs1', ids)), list(sync._stable_ids('rs1', ids)))
+        self.assertNotEqual(list(sync._stable_ids('rs1', ids)), list(sync._stable_ids('rs2', ids)))
+        self.assertGreater(sync._stable_ids('rs1', ids).min(), 0)
+
+
+@mock.patch.dict('os.environ', BQ_ENV)
+class BackfillIdTests(TestCase):
+    def test_backfill_keeps_stage_ids_and_gives_legacy_rows_negative_ids(self):
+        client = mock.Mock()
+        stage = _batch('rs1', [11, 12], ['2026-01-02', '2026-01-03'])
+        with mock.patch.object(backfill.bigquery, 'Client', return_value=client), \
+                mock.patch.object(backfill, '_parse_sources', return_value=[{'name': 'rs1'}]), \
+                mock.patch.object(backfill, '_fetch_maria_rows', return_value=stage), \
+                mock.patch.object(backfill, '_fetch_reseller_map', return_value=pd.DataFrame()), \
+                mock.patch.object(backfill, 'load_df_to_bq'), \
+                mock.patch.object(backfill, 'ensure_report_table'), \
+                mock.patch.object(backfill, '_refresh_rollup'), \
+                mock.patch.object(backfill, 'log_sync_event'), \
+                mock.patch.object(backfill, 'report_cache') as cache:
+            backfill.Command(stdout=io.StringIO()).handle(
+                cutoff_date='2026-01-01', target_table='', hsp_table='', stream=False, chunk_size=0,
+                load_format='',
+            )
+        query = client.query.call_args.args[0]
+        self.assertNotIn('ROW_NUMBER', query)
+        self.assertIn('SAFE_CAST(id AS INT64) AS id', query)
+        self.assertIn('-SAFE_CAST(h.UserServiceId AS INT64) AS id', query)
+        cache.invalidate.assert_called_once_with('bigquery')
+
+
+def _legacy_table():
+    """A report table as the oldest syncs wrote it: no partitioning, no rs_username_norm."""
+    table = mock.Mock(time_partitioning=None, clustering_fields=None)
+    table.schema = [f for f in bq.REPORT_USER_SERVICE_SCHEMA if f.name != 'rs_username_norm']
+    return table
+
+
+class LegacyReportTableTests(TestCase):
+    def setUp(self):
+        bq._creator_norm_tables.clear()
+        self.addCleanup(bq._creator_norm_tables.clear)
+
+    def test_ensure_report_table_refuses_a_legacy_table(self):
+        client = mock.Mock()
+        client.get_table.return_value = _legacy_table()
+        with self.assertRaisesRegex(bq.LegacyReportTableError, 'repartition_report_table'):
+            bq.ensure_report_table(client, TABLE_ID)
+        client.create_table.assert_not_called()
+
+    def test_other_tables_are_left_alone(self):
+        client = mock.Mock()
+        client.get_table.return_value = _legacy_table()
+        self.assertIs(
+            bq.ensure_report_table(client, 'proj.ds.map', schema=[bigquery.SchemaField('x', 'STRING')]),
+            client.get_table.return_value,
+        )
+
+    def test_reports_match_creators_without_rs_username_norm(self):
+        client = mock.Mock()
+        client.get_table.return_value = _legacy_table()
+        with self.assertLogs('reports.bq', 'WARNING'):
+            creator_sql = bq.report_creator_sql(client, TABLE_ID)
+        self.assertEqual(bq.report_creator_sql(client, TABLE_ID), creator_sql)
+        client.get_table.assert_called_once()  # Looked up once, not per query.
+        query, _params = bq._bq_report_sql(
+            TABLE_ID, ['reseller'], resolve_report_filters({}), creator_sql=creator_sql
+        )
+        self.assertIn('LOWER(TRIM(rs_username)) IN UNNEST(@creator_list)', query)
+        self.assertNotIn('rs_username_norm', query)
+
+    def test_current_table_uses_the_column(self):
+        client = mock.Mock()
+        client.get_table.return_value.schema = bq.REPORT_USER_SERVICE_SCHEMA
+        self.assertEqual(bq.report_creator_sql(client, TABLE_ID), 'rs_username_norm')
+
+    @mock.patch.dict('os.environ', BQ_ENV)
+    def test_syncs_fail_before_reading_sources(self):
+        client = mock.Mock()
+        client.get_table.return_value = _legacy_table()
+        with mock.patch.object(sync.bigquery, 'Client', return_value=client), \
+                mock.patch.object(sync, '_parse_sources') as parse_sources, \
+                mock.patch.object(sync, 'log_sync_event') as log_event:
+            for run in (sync.sync_maria_to_bigquery, sync.sync_incremental_to_bigquery):
+                with self.assertRaises(bq.LegacyReportTableError), self.assertLogs('reports.sync', 'ERROR'):
+                    run(auto=True)
+        parse_sources.assert_not_called()
+        self.assertEqual(log_event.call_args.args[0], 'sync_error')
+
+
+SOURCE = {'name': 'rs1', 'host': 'h', 'port': 3306, 'db': 'd', 'user': 'u', 'password': ''}
+
+
+class StreamedFetchTests(TestCase):
+    def test_batches_are_typed_and_bounded(self):
+        conn = _FakeConn(_raw_rows(range(1, 6)))
+        with mock.patch.object(sync, '_connect_source', return_value=conn) as connect:
+            batches = list(sync._iter_maria_batches(SOURCE, chunk_size=2))
+        self.assertEqual(connect.call_args.kwargs['cursorclass'], sync.SSDictCursor)
+        self.assertEqual([len(b) for b in batches], [2, 2, 1])
+        batch = batches[0]
+        self.assertEqual(list(batch.columns), sync.REPORT_COLUMNS)
+        self.assertEqual(batch['CreateDate'].iloc[0], datetime.date(2026, 3, 1))
+        self.assertEqual(str(batch['UserServiceID'].dtype), 'Int64')
+        self.assertEqual(batch['ServicePrice'].iloc[0], 1000.0)
+        self.assertEqual(batch['rs_username_norm'].iloc[0], 'alpha')
+        self.assertEqual(batch['rs_name'].iloc[0], 'rs1')
+        self.assertNotIn('ORDER BY', conn.queries[0][0])
+        self.assertTrue(conn.closed)
+
+    def test_deadline_stops_the_stream(self):
+        conn = _FakeConn(_raw_rows(range(1, 6)))
+        stream = sync._iter_maria_batches(SOURCE, chunk_size=2, deadline=60)
+        with mock.patch.object(sync, '_connect_source', return_value=conn), \
+                mock.patch.object(sync.time, 'monotonic', side_effect=[0, 0, 120]), \
+                self.assertLogs('reports.sync', 'ERROR'):
+            self.assertEqual(len(next(stream)), 2)
+            with self.assertRaisesRegex(TimeoutError, 'after 2 rows'):
+                next(stream)
+        self.assertEqual(conn.fetches, 1)
+        self.assertTrue(conn.closed)
+
+    def test_spool_keeps_only_committed_sources(self):
+        spool = sync._ReportSpool(load_format='csv')
+        self.addCleanup(spool.cleanup)
+
+        def _batches(source, **kwargs):
+            yield sync._typed_batch(_raw_rows([1, 2]), source)
+            if source['name'] == 'rs2':
+                raise RuntimeError('connection lost')
+
+        with mock.patch.object(sync, '_iter_maria_batches', side_effect=_batches):
+            self.assertEqual(sync._spool_source(spool, {'name': 'rs1'}), 2)
+            with self.assertRaises(RuntimeError):
+                sync._spool_source(spool, {'name': 'rs2'})
+        self.assertEqual(spool.rows, 2)
+        loaded = pd.read_csv(spool.finish())
+        self.assertEqual(list(loaded.columns), [f.name for f in bq.REPORT_USER_SERVICE_SCHEMA])
+        self.assertEqual(list(loaded['rs_name']), ['rs1', 'rs1'])
+
+
+@mock.patch.object(sync, 'log_sync_event')
+class PerSourceFetchTests(TestCase):
+    SOURCES = [{'name': 'rs1'}, {'name': 'rs2'}, {'name': 'rs3'}]
+
+    def test_sources_run_concurrently(self, log_event):
+        # Each fetch waits for the others, so this only finishes when all run at once.
+        barrier = threading.Barrier(3, timeout=5)
+
+        def _fetch(source, deadline):
+            barrier.wait()
+            return len(source['name'])
+
+        results = sync._run_per_source(self.SOURCES, _fetch, workers=3)
+        self.assertEqual(results, {'rs1': 3, 'rs2': 3, 'rs3': 3})
+
+    def test_failed_source_is_skipped(self, log_event):
+        def _fetch(source, deadline):
+            if source['name'] == 'rs2':
+                raise TimeoutError('too slow')
+            return 1
+
+        with self.assertLogs('reports.sync', 'ERROR'):
+            results = sync._run_per_source(self.SOURCES, _fetch, workers=2, event_prefix='incremental_')
+        self.assertEqual(results, {'rs1': 1, 'rs3': 1})
+        errors = [c for c in log_event.call_args_list if c.args[0] == 'incremental_source_error']
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(errors[0].args[1], 'Source fetch timed out')
+        self.assertEqual(errors[0].kwargs['source'], 'rs2')
+
+    def test_timeout_sets_a_deadline_per_source(self, log_event):
+        deadlines = []
+        sync._run_per_source(self.SOURCES[:1], lambda source, deadline: deadlines.append(deadline) or 0, timeout=30)
+        sync._run_per_source(self.SOURCES[:1], lambda source, deadline: deadlines.append(deadline) or 0)
+        self.assertAlmostEqual(deadlines[0] - time.monotonic(), 30, delta=5)
+        self.assertIsNone(deadlines[1])
+
+    @mock.patch.dict('os.environ', BQ_ENV)
+    def test_full_sync_loads_the_sources_that_succeeded(self, log_event):
+        def _batches(source, **kwargs):
+            if source['name'] == 'rs2':
+                raise RuntimeError('connection lost')
+            yield sync._typed_batch(_raw_rows([1, 2, 3]), source)
+
+        with mock.patch.object(sync, '_parse_sources', return_value=self.SOURCES[:2]), \
+                mock.patch.object(sync.bigquery, 'Client'), \
+                mock.patch.object(sync, 'ensure_report_table'), \
+                mock.patch.object(sync, 'load_file_to_bq') as load_file, \
+                mock.patch.object(sync, '_iter_maria_batches', side_effect=_batches), \
+                mock.patch.object(sync, '_refresh_rollup'), \
+                mock.patch.object(sync, 'report_cache'), \
+                self.assertLogs('reports.sync', 'ERROR'):
+            sync.sync_maria_to_bigquery(stream=True, workers=2, load_format='csv', pipeline=False, swap=False)
+        load_file.assert_called_once()
+        self.assertEqual(load_file.call_args.args[2], TABLE_ID)
+        loaded = [c for c in log_event.call_args_list if c.args[0] == 'sync_loaded']
+        self.assertEqual(loaded[0].kwargs['rows'], 3)
+
+
+@mock.patch.dict('os.environ', {'SYNC_PIPELINE_LOAD_ROWS': '3', 'SYNC_PIPELINE_QUEUE': '1'})
+@mock.patch.object(sync, 'log_sync_event')
+@mock.patch.object(sync, 'ensure_report_table')
+class PipelinedSyncTests(TestCase):
+    SOURCES = [{'name': 'rs1'}, {'name': 'rs2'}]
+
+    def run_pipeline(self, client, load_file, failing=()):
+        def _batches(source, **kwargs):
+            for i in range(1, 5):
+                yield sync._typed_batch(_raw_rows([i]), source)
+            if source['name'] in failing:
+                raise RuntimeError('connection lost')
+
+        with mock.patch.object(sync.bigquery, 'Client', return_value=client), \
+                mock.patch.object(sync, 'load_file_to_bq', side_effect=load_file), \
+                mock.patch.object(sync, '_iter_maria_batches', side_effect=_batches):
+            return sync._sync_pipelined(
+                self.SOURCES, TABLE_ID, 'proj', 'ds', 'US', 0, 'WRITE_TRUNCATE', None, False, 1,
+                workers=2, load_format='csv',
+            )
+
+    def test_chunks_upload_while_sources_are_read(self, _ensure, log_event):
+        client = mock.Mock()
+        loads = []
+
+        def _load(client, path, table_id, location, disposition, load_format=None):
+            loads.append((table_id, disposition, len(pd.read_csv(path))))
+
+        with self.assertLogs('reports.sync', 'ERROR'):
+            results = self.run_pipeline(client, _load, failing=('rs2',))
+        self.assertEqual(results, {'rs1': 4})
+        stage = loads[0][0]
+        self.assertTrue(stage.startswith('proj.ds.report_user_service_stage_'))
+        self.assertEqual({(t, d) for t, d, _rows in loads}, {(stage, 'WRITE_APPEND')})
+        self.assertEqual(sum(rows for _t, _d, rows in loads), 8)
+        self.assertTrue(all(rows <= 3 for _t, _d, rows in loads))
+        # The failed source's rows are taken out of the stage before it is published.
+        delete_query = client.query.call_args.args[0]
+        self.assertEqual(delete_query, f'DELETE FROM `{stage}` WHERE rs_name IN UNNEST(@failed)')
+        params = client.query.call_args.kwargs['job_config'].query_parameters
+        self.assertEqual(params[0].values, ['rs2'])
+        client.copy_table.assert_called_once()
+        self.assertEqual(client.copy_table.call_args.args, (stage, TABLE_ID))
+        client.delete_table.assert_called_once_with(stage, not_found_ok=True)
+
+    def test_failed_upload_aborts_the_pipeline(self, _ensure, log_event):
+        client = mock.Mock()
+
+        def _load(*args, **kwargs):
+            raise RuntimeError('load job failed')
+
+        with self.assertLogs('reports.sync', 'ERROR'), self.assertRaisesRegex(RuntimeError, 'load job failed'):
+            self.run_pipeline(client, _load)
+        client.copy_table.assert_not_called()
+        client.delete_table.assert_called_once()
+        self.assertEqual(log_event.call_args.args[:2], ('sync_error', 'Sync pipeline failed'))
+
+
+@mock.patch.object(sync, 'log_sync_event')
+@mock.patch.object(sync, 'ensure_report_table')
+class ShadowSwapTests(TestCase):
+    SHADOW = TABLE_ID + sync.SHADOW_SUFFIX
+
+    def swap(self, loaded, results):
+        client = mock.Mock()
+        client.query.return_value.result.return_value = [
+            {'rs_name': name, 'row_count': count} for name, count in loaded.items()
+        ]
+        with mock.patch.object(sync.bigquery, 'Client', return_value=client):
+            sync._swap_shadow_table(
+                'proj', self.SHADOW, TABLE_ID, 'US', 'WRITE_TRUNCATE', ['rs1', 'rs2'], results, False,
+            )
+        return client
+
+    def test_validated_shadow_replaces_the_live_table(self, _ensure, log_event):
+        client = self.swap({'rs1': 4, 'rs2': 2}, {'rs1': 4, 'rs2': 2})
+        self.assertEqual(client.copy_table.call_args.args, (self.SHADOW, TABLE_ID))
+        self.assertEqual(client.copy_table.call_args.kwargs['job_config'].write_disposition, 'WRITE_TRUNCATE')
+        self.assertEqual(log_event.call_args.args[0], 'sync_swapped')
+
+    def test_live_table_kept_when_validation_fails(self, _ensure, log_event):
+        cases = [
+            ({'rs1': 4}, {'rs1': 4}, {'rs2': 'source failed'}),
+            ({'rs1': 3, 'rs2': 2}, {'rs1': 4, 'rs2': 2}, {'rs1': 'expected 4 rows, shadow has 3'}),
+            ({'rs1': 4, 'rs2': 2, 'rs9': 1}, {'rs1': 4, 'rs2': 2}, {'rs9': 'unexpected source with 1 rows'}),
+        ]
+        for loaded, results, problems in cases:
+            with self.assertRaisesRegex(RuntimeError, 'failed validation'):
+                self.swap(loaded, results)
+            self.assertEqual(log_event.call_args.args[0], 'swap_validation_failed')
+            self.assertEqual(log_event.call_args.kwargs['problems'], problems)
+
+    @mock.patch.dict('os.environ', BQ_ENV)
+    def test_failed_swap_drops_the_shadow(self, _ensure, log_event):
+        client = mock.Mock()
+        client.query.return_value.result.return_value = []
+
+        def _batches(source, **kwargs):
+            yield sync._typed_batch(_raw_rows([1]), source)
+
+        with mock.patch.object(sync.bigquery, 'Client', return_value=client), \
+                mock.patch.object(sync, '_parse_sources', return_value=[{'name': 'rs1'}]), \
+                mock.patch.object(sync, 'load_file_to_bq') as load_file, \
+                mock.patch.object(sync, '_iter_maria_batches', side_effect=_batches), \
+                mock.patch.object(sync, 'report_cache') as cache, \
+                self.assertRaisesRegex(RuntimeError, 'failed validation'):
+            sync.sync_maria_to_bigquery(stream=True, swap=True, pipeline=False, load_format='csv')
+        self.assertEqual(load_file.call_args.args[2:5], (self.SHADOW, 'US', 'WRITE_TRUNCATE'))
+        client.copy_table.assert_not_called()
+        client.delete_table.assert_called_with(self.SHADOW, not_found_ok=True)
+        cache.invalidate.assert_not_called()
+
+
+class _RangeConn(_FakeConn):
+    """A source connection answering the bounds query and `BETWEEN` range queries."""
+
+    def __init__(self, ids, lock_error=None):
+        super().__init__([])
+        self.ids = ids
+        self.lock_error = lock_error
+
+    def cursor(self):
+        conn = self
+        cursor = _FakeCursor(self)
+
+        def _execute(query, params=None):
+            conn.queries.append((query, params))
+            if query.startswith('LOCK TABLES') and conn.lock_error:
+                raise conn.lock_error
+            if 'BETWEEN %s AND %s' in query:
+                lo, hi = params[-2:]
+                cursor._rows = _raw_rows([i for i in conn.ids if lo <= i <= hi])
+
+        cursor.execute = _execute
+        cursor.fetchone = lambda: {'lo': min(conn.ids), 'hi': max(conn.ids)}
+        return cursor
+
+
+class RangeFetchTests(TestCase):
+    IDS = [3, 4, 8, 9, 10, 15, 21, 22]
+
+    def fetch(self, lock_error=None, **kwargs):
+        conns = []
+
+        def _connect(source, **_kwargs):
+            conns.append(_RangeConn(self.IDS, lock_error))
+            return conns[-1]
+
+        with mock.patch.object(sync, '_connect_source', side_effect=_connect):
+            df = sync._fetch_maria_rows(SOURCE, **kwargs)
+        return df, conns
+
+    def test_id_ranges_cover_the_bounds_once(self):
+        self.assertEqual(sync._id_ranges(3, 22, 3), [(3, 9), (10, 16), (17, 22)])
+        self.assertEqual(sync._id_ranges(5, 6, 4), [(5, 5), (6, 6)])
+
+    def test_ranges_read_from_one_shared_snapshot(self):
+        df, conns = self.fetch(range_workers=3)
+        self.assertEqual(sorted(df['UserServiceID']), self.IDS)
+        lock_conn, readers = conns[3], conns[:3]
+        self.assertEqual(
+            [q for q, _p in lock_conn.queries if 'TABLES' in q],
+            ['LOCK TABLES Huser_servicebase READ, Huser READ, Hreseller READ, Hservice READ', 'UNLOCK TABLES'],
+        )
+        ranges = []
+        for conn in readers:
+            self.assertEqual(conn.queries[0][0], 'START TRANSACTION WITH CONSISTENT SNAPSHOT')
+            ranges.extend(tuple(p[-2:]) for q, p in conn.queries if 'BETWEEN' in q)
+            self.assertTrue(conn.closed)
+        self.assertEqual(sorted(ranges), [(3, 9), (10, 16), (17, 22)])
+
+    def test_without_the_lock_one_connection_reads_everything(self):
+        with self.assertLogs('reports.sync', 'WARNING'):
+            df, conns = self.fetch(lock_error=sync.pymysql.MySQLError('access denied'), range_workers=3)
+        self.assertEqual(sorted(df['UserServiceID']), self.IDS)
+        readers = [conn for conn in conns if any('BETWEEN' in q for q, _p in conn.queries)]
+        self.assertEqual(len(readers), 1)
+        self.assertTrue(all(conn.closed for conn in conns))
+
+    def test_limit_is_not_split(self):
+        conn = _FakeConn(_raw_rows([1, 2]))
+        with mock.patch.object(sync, '_connect_source', return_value=conn) as connect:
+            df = sync._fetch_maria_rows(SOURCE, limit=2, range_workers=3)
+        self.assertEqual(len(df), 2)
+        connect.assert_called_once()
+        self.assertNotIn('BETWEEN', conn.queries[0][0])
+
+
+def _narrow_rows(pairs):
+    """Rows as the fact-only sync SELECT returns them: (reseller id, service id) per row."""
+    return [{
+        'CreateDate': datetime.date(2026, 3, 1),
+        'rs_userid': reseller_id,
+        'UserServiceID': i,
+        'username': f'u{i}',
+        'Service_Id': service_id,
+        'ServicePrice': 1000,
+        'ServiceStatus': 'Active',
+        'StartDate': None,
+        'EndDate': None,
+    } for i, (reseller_id, service_id) in enumerate(pairs, 1)]
+
+
+class DimensionLookupTests(TestCase):
+    databases = {'default', 'cache'}
+
+    def setUp(self):
+        Reseller.objects.create(source_name='rs1', source_id=7, name=' Alpha ', name_norm='alpha')
+        Service.objects.create(source_name='rs1', source_id=1, name='10GB', package_gb=10.0)
+        Reseller.objects.create(source_name='rs2', source_id=8, name='Other', name_norm='other')
+
+    def source_conn(self):
+        conn = _FakeConn([])
+        cursor = _FakeCursor(conn)
+
+        def _execute(query, params=None):
+            conn.queries.append((query, params))
+            if 'FROM Hreseller' in query:
+                cursor._rows = [{'Reseller_Id': 9, 'ResellerName': 'Beta'}]
+            else:
+                cursor._rows = [{'Service_Id': 2, 'ServiceName': '5GB', 'STrA': 0, 'MTrA': 5 * 1073741824,
+                                 'DTrA': 0, 'YTrA': 0, 'ExtraTraffic': 0}]
+
+        cursor.execute = _execute
+        conn.cursor = lambda: cursor
+        return conn
+
+    def test_joins_match_the_server_side_query(self):
+        conn = self.source_conn()
+        with mock.patch.object(sync, '_connect_source', return_value=conn):
+            dims = sync._DimensionLookup(SOURCE)
+            df = sync._typed_batch(_narrow_rows([(7, 1), (9, 2), (404, 404), (None, None)]), SOURCE, dims=dims)
+            again = sync._typed_batch(_narrow_rows([(9, 2), (404, 404)]), SOURCE, dims=dims)
+        self.assertEqual(list(df.columns), sync.REPORT_COLUMNS)
+        self.assertEqual(list(df['rs_username'].fillna('-')), [' Alpha ', 'Beta', '-', '-'])
+        self.assertEqual(list(df['rs_username_norm'].fillna('-')), ['alpha', 'beta', '-', '-'])
+        self.assertEqual(list(df['ServiceName'].fillna('-')), ['10GB', '5GB', '-', '-'])
+        self.assertEqual(list(df['Package'].fillna(-1)), [10.0, 5.0, -1, -1])
+        self.assertEqual(list(again['rs_username'].fillna('-')), ['Beta', '-'])
+        # Ids the cache lacks are looked up once; ids the source lacks too are remembered as NULL.
+        self.assertEqual([p for _q, p in conn.queries], [[9, 404], [2, 404]])
+
+    def test_narrow_query_leaves_the_dimension_joins_out(self):
+        query, _params = sync._build_sync_query(narrow=True)
+        self.assertNotIn('Hreseller', query)
+        self.assertNotIn('Hservice', query)
+        self.assertIn('TName.Service_Id AS Service_Id', query)
+        with mock.patch.dict('os.environ', {'SYNC_DIM_OFFLOAD': '1'}), \
+                mock.patch.object(sync, '_connect_source', return_value=_FakeConn([])) as connect:
+            list(sync._iter_maria_batches(SOURCE))
+        self.assertNotIn('Hreseller', connect.return_value.queries[0][0])
@@ -1,10 +1,13 @@
 from django.urls import path
-from .views import report_view, sync_logs_view, logout_view, create_package_view, download_created_users_pdf, download_created_users_qr_pdf, download_pdf_archive, manual_sync_permissions, login_view
+from .views import report_view, report_rows_api, report_job_status, report_job_download, sync_logs_view, logout_view, create_package_view, download_created_users_pdf, download_created_users_qr_pdf, download_pdf_archive, manual_sync_permissions, login_view
 
 app_name = 'reports'
 
 urlpatterns = [
     path('reports/', report_view, name='report'),
+    path('reports/api/rows/', report_rows_api, name='report_rows_api'),
+    path('reports/jobs/<int:job_id>/', report_job_status, name='report_job_status'),
+    path('reports/jobs/<int:job_id>/download/', report_job_download, name='report_job_download'),
     path('create-package/', create_package_view, name='create_package'),
     path('create-package/download-pdf/', download_created_users_pdf, name='create_package_download_pdf'),
     path('create-package/download-qr-pdf/', download_created_users_qr_pdf, name='create_package_download_qr_pdf'),
@@ -1,5 +1,4 @@
 import os
-import io
 import re
 import datetime
 import tempfile
@@ -10,10 +9,12 @@ from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import logout
 from django.contrib.auth import views as auth_views
-from django.http import HttpResponse, HttpResponseForbidden, FileResponse
+from django.http import HttpResponse, HttpResponseForbidden, FileResponse, JsonResponse, StreamingHttpResponse
 from django.core.management import call_command
+from django.views.decorators.gzip import gzip_page
 from django.core.files.base import ContentFile
 from django.shortcuts import redirect
+from django.urls import reverse
 from .forms import FilterForm, CreatePackageForm
 from maria_cache.sync import sync_reference_tables
 from maria_cache.models import Reseller as CacheReseller
@@ -28,11 +29,39 @@ from .db import (
     get_sources,
 )
 from .user_create import create_users, UserCreateError
-from .models import ResellerProfile, PdfArchive
+from .models import ResellerProfile, PdfArchive, ReportJob
 from fpdf import FPDF
 
-from .db import run_query
-from .bq import run_bq_report_query
+from .csv_export import iter_report_csv, iter_streamed_report_csv
+from .filters import resolve_report_filters
+from .jobs import JOB_ACTIONS, enqueue_report_job, should_run_in_background
+from .pagination import PAGE_SIZES, columnar, decode_cursor, detail_page, parse_page_size
+from .pipeline import (
+    NO_CREATORS_ERROR,
+    cached_report,
+    detail_summaries,
+    export_report_sections,
+    load_detail_page,
+    load_report,
+    pages_in_sql,
+    prepare_detail_frame,
+    report_creators,
+    report_source,
+    report_tables_priority,
+    report_user_scope,
+    unlimited_mask,
+)
+from .preflight import (
+    BACKGROUND,
+    INLINE,
+    NARROW,
+    NARROW_ERROR,
+    PAGE_TOO_LARGE_ERROR,
+    load_estimate,
+    preflight_decision,
+    preflight_enabled,
+)
+from .summary import append_totals, summaries_from_aggregates
 from .sync import read_sync_logs, sync_maria_to_bigquery
 
 
@@ -131,9 +160,9 @@ def export_df_to_pdf(df):
         pdf.cell(col_widths[i], line_height, header_text, border=1, align='C', fill=True)
     pdf.ln(line_height)
 
-    for idx, row in df.iterrows():
-        for i, c in enumerate(cols):
-            cell_text = _truncate(_safe_str(row[c]), col_widths[i])
+    for values in df.itertuples(index=False, name=None):
+        for i, value in enumerate(values):
+            cell_text = _truncate(_safe_str(value), col_widths[i])
             pdf.cell(col_widths[i], line_height, cell_text, border=1)
         pdf.ln(line_height)
 
@@ -334,9 +363,9 @@ def export_summary_tables_to_pdf(limited_df, unlimited_df):
             pdf.cell(col_widths[i], line_height, header_text, border=1, align='C', fill=True)
         pdf.ln(line_height)
 
-        for _, row in df.iterrows():
-            for i, c in enumerate(cols):
-                cell_text = _truncate_text(pdf, _safe_str(row.get(c, '')), col_widths[i])
+        for values in df.reindex(columns=cols, fill_value='').itertuples(index=False, name=None):
+            for i, value in enumerate(values):
+                cell_text = _truncate_text(pdf, _safe_str(value), col_widths[i])
                 pdf.cell(col_widths[i], line_height, cell_text, border=1)
             pdf.ln(line_height)
 
@@ -404,9 +433,9 @@ def export_detail_tables_to_pdf(limited_df, unlimited_df):
             pdf.cell(col_widths[i], line_height, header_text, border=1, align='C', fill=True)
         pdf.ln(line_height)
 
-        for _, row in df.iterrows():
-            for i, c in enumerate(cols):
-                cell_text = _truncate_text(pdf, _safe_str(row.get(c, '')), col_widths[i])
+        for values in df.reindex(columns=cols, fill_value='').itertuples(index=False, name=None):
+            for i, value in enumerate(values):
+                cell_text = _truncate_text(pdf, _safe_str(value), col_widths[i])
                 pdf.cell(col_widths[i], line_height, cell_text, border=1)
             pdf.ln(line_height)
 
@@ -730,6 +759,7 @@ def report_view(request):
     form = FilterForm(request.POST or None)
     final_df = pd.DataFrame()
     info_tables = []
+    unresolved_creators = []
     show_results = False
     show_summary = False
     summary_rows = []
@@ -738,30 +768,27 @@ def report_view(request):
     unlimited_summary_rows = []
     unlimited_grand_total = None
     unlimited_grand_count = None
-
-    # determine allowed creators for this user
-    if hasattr(request.user, 'resellerprofile'):
-        allowed_creators = [request.user.resellerprofile.reseller_name]
-    else:
-        allowed_creators = None  # admin or not assigned
+    show_details = False
+    detail_columns = None
+    detail_rows = None
+    detail_next = None
+    detail_prev = None
+    detail_total_count = None
+    detail_total_gb = None
+    report_estimate = None
+    page_size = parse_page_size(request.POST.get('page_size'))
 
     if request.method == 'POST' and form.is_valid():
         action = request.POST.get('action')
+        # Pager buttons submit only a cursor; they stay in the detail table.
+        detail_cursor = decode_cursor(request.POST.get('cursor'))
+        if detail_cursor is not None:
+            action = 'show_details'
         creators_raw = form.cleaned_data.get('creators_raw')
-        if creators_raw:
-            creators_raw = creators_raw.replace('،', ',').replace('؛', ',').replace(';', ',')
-        if creators_raw and [c.strip() for c in creators_raw.split(',') if c.strip()]:
-            creators = [c.strip() for c in creators_raw.split(',') if c.strip()]
-        else:
-            if allowed_creators:
-                creators = allowed_creators
-            elif request.user.is_superuser:
-                creators = [None]  # no filter for superusers
-            else:
-                creators = []
+        creators = report_creators(creators_raw, request.user)
 
         if not creators:
-            request.session['error'] = 'No reseller selected or assigned. Enter a creator name or ask admin to assign your reseller profile.'
+            request.session['error'] = NO_CREATORS_ERROR
             return render(request, template_name, {
                 'form': form,
                 'df': None,
@@ -770,25 +797,10 @@ def report_view(request):
                 'error': request.session.pop('error', None)
             })
 
-        total_dfs = []
-        tables_priority = [t.strip() for t in os.getenv('BQ_TABLE_PRIORITY', '').split(',') if t.strip()]
-        if not tables_priority:
-            tables_priority = ['Huser_servicebase']
-        limit = 0
-        use_bq = os.getenv('REPORT_SOURCE', 'mariadb').lower() == 'bigquery'
-        bq_creds_path = os.getenv('GOOGLE_APPLICATION_CREDENTIALS', '').strip()
-        if use_bq:
-            if bq_creds_path and not os.path.exists(bq_creds_path):
-                local_keys = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'keys.json'))
-                if os.path.exists(local_keys):
-                    os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = local_keys
-                else:
-                    use_bq = False
-                    request.session['error'] = 'BigQuery credentials not configured. Falling back to MariaDB.'
-            elif not bq_creds_path:
-                local_keys = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'keys.json'))
-                if os.path.exists(local_keys):
-                    os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = local_keys
+        tables_priority = report_tables_priority()
+        use_bq, source_warning = report_source()
+        if source_warning:
+            request.session['error'] = source_warning
 
         def _safe_filename(value):
             if value is None:
@@ -856,489 +868,226 @@ def report_view(request):
                 return value.isoformat()
             return str(value)
 
-        def _build_summary_rows(source_df, creator_col):
-            if source_df.empty or not creator_col or 'ServiceName' not in source_df.columns:
-                return [], None, None
-
-            df = source_df.copy()
-            if 'Package' not in df.columns and 'PackageValue' in df.columns:
-                df['Package'] = df['PackageValue']
-            if 'Package' not in df.columns:
-                return [], None, None
-
-            df['Package'] = pd.to_numeric(df['Package'], errors='coerce')
-            summary = (
-                df.groupby([creator_col, 'ServiceName'])
-                .agg(Count=('ServiceName', 'size'), SumGB=('Package', 'sum'))
-                .reset_index()
-            )
-
-            creator_rows = []
-            for creator in summary[creator_col].unique():
-                df_c = summary[summary[creator_col] == creator]
-                total_gb = df_c['SumGB'].astype(float).sum()
-                total_count = int(df_c['Count'].sum())
-                details = [
-                    {
-                        'ServiceName': row['ServiceName'],
-                        'Count': int(row['Count']),
-                        'SumGB': round(float(row['SumGB']), 2)
-                    }
-                    for _, row in df_c.iterrows()
+        # build effective filters (reuse from session for downloads)
+        filter_serial_post = (request.POST.get('filter_serial') or '').strip().lower()
+        filter_date_post = (request.POST.get('filter_date') or '').strip().lower()
+        filter_input_present = (
+            form.cleaned_data.get('filter_serial')
+            or form.cleaned_data.get('filter_date')
+            or filter_serial_post in {'on', 'true', '1', 'yes', 'y'}
+            or filter_date_post in {'on', 'true', '1', 'yes', 'y'}
+            or any(
+                v is not None
+                for v in [
+                    form.cleaned_data.get('serial_value'),
+                    form.cleaned_data.get('serial_min'),
+                    form.cleaned_data.get('serial_max'),
+                    form.cleaned_data.get('sib_serial_value'),
+                    form.cleaned_data.get('sib_serial_min'),
+                    form.cleaned_data.get('sib_serial_max'),
+                    form.cleaned_data.get('date_value'),
+                    form.cleaned_data.get('date_start'),
+                    form.cleaned_data.get('date_end'),
                 ]
-                creator_rows.append({
-                    'Creator': creator,
-                    'TotalGB': round(total_gb, 2),
-                    'TotalCount': total_count,
-                    'Details': details
-                })
-
-            grand_total = round(summary['SumGB'].astype(float).sum(), 2) if not summary.empty else None
-            grand_count = int(summary['Count'].sum()) if not summary.empty else None
-            return creator_rows, grand_total, grand_count
-
-        def _unlimited_mask(source_df):
-            if source_df.empty:
-                return pd.Series([], dtype=bool)
-
-            if 'PackageBytes' in source_df.columns:
-                series = pd.to_numeric(source_df['PackageBytes'], errors='coerce')
-            elif 'Package' in source_df.columns:
-                series = pd.to_numeric(source_df['Package'], errors='coerce')
-            elif 'PackageValue' in source_df.columns:
-                series = pd.to_numeric(source_df['PackageValue'], errors='coerce')
-            else:
-                return pd.Series([False] * len(source_df), index=source_df.index)
-
-            base_unlimited = series.isna() | (series <= 0)
-
-            if 'ServiceName' not in source_df.columns:
-                return base_unlimited
-
-            name_series = source_df['ServiceName'].fillna('').astype(str)
-            gb_pattern = re.compile(r'(?:\d+(?:\.\d+)?)[\s_-]*(?:gb|gig)\b', re.IGNORECASE)
-            name_has_gb = name_series.str.contains(gb_pattern)
-            name_has_ddc = name_series.str.contains(r'\bDDC\b', case=False, regex=True)
-
-            # Unlimited only when GB is missing/zero and name matches unlimited rules.
-            return base_unlimited & ((~name_has_gb) | name_has_ddc)
-
-        if use_bq:
-            try:
-                bq_date_op = form.cleaned_data.get('date_op')
-                bq_date_value = form.cleaned_data.get('date_value')
-                bq_date_start = form.cleaned_data.get('date_start')
-                bq_date_end = form.cleaned_data.get('date_end')
-                bq_service_status = form.cleaned_data.get('service_status')
-
-                if bq_date_op == 'NONE':
-                    bq_date_op = None
-                if bq_date_op in (None, '') and bq_date_start and bq_date_end:
-                    bq_date_op = 'BETWEEN'
-                if bq_date_op in {'EXACT', '='} and not bq_date_value and bq_date_start and bq_date_end:
-                    bq_date_op = 'BETWEEN'
-                if bq_date_op in {'<', '>', '<=', '>='} and not bq_date_value and bq_date_start and bq_date_end:
-                    bq_date_op = 'BETWEEN'
-                if bq_date_op == 'BETWEEN' and (not bq_date_start or not bq_date_end) and bq_date_value:
-                    bq_date_op = '='
-                df, used_table = run_bq_report_query(
-                    creators,
-                    limit=limit,
-                    date_op=bq_date_op,
-                    date_value=bq_date_value,
-                    date_start=bq_date_start,
-                    date_end=bq_date_end,
-                    service_status=bq_service_status,
-                )
-                if not df.empty:
-                    total_dfs.append(df)
-                    creators_label = ', '.join([c for c in creators if c]) if creators else 'all'
-                    info_tables.append(f"{creators_label} ← {used_table}")
-            except Exception as exc:
-                request.session['error'] = str(exc)
+            )
+            or (form.cleaned_data.get('service_status') not in (None, '', 'NONE'))
+        )
+
+        if filter_input_present:
+            request.session['report_filters'] = {
+                'filter_serial': bool(
+                    form.cleaned_data.get('filter_serial')
+                    or filter_serial_post in {'on', 'true', '1', 'yes', 'y'}
+                ),
+                'serial_op': form.cleaned_data.get('serial_op'),
+                'serial_value': form.cleaned_data.get('serial_value'),
+                'serial_min': form.cleaned_data.get('serial_min'),
+                'serial_max': form.cleaned_data.get('serial_max'),
+                'sib_serial_op': form.cleaned_data.get('sib_serial_op'),
+                'sib_serial_value': form.cleaned_data.get('sib_serial_value'),
+                'sib_serial_min': form.cleaned_data.get('sib_serial_min'),
+                'sib_serial_max': form.cleaned_data.get('sib_serial_max'),
+                'filter_date': bool(
+                    form.cleaned_data.get('filter_date')
+                    or filter_date_post in {'on', 'true', '1', 'yes', 'y'}
+                ),
+                'date_op': form.cleaned_data.get('date_op'),
+                'date_value': _serialize_date(form.cleaned_data.get('date_value')),
+                'date_start': _serialize_date(form.cleaned_data.get('date_start')),
+                'date_end': _serialize_date(form.cleaned_data.get('date_end')),
+                'service_status': form.cleaned_data.get('service_status'),
+            }
         else:
-            service_status = form.cleaned_data.get('service_status')
-            status_filter_sql = ''
-            status_params = []
-            if service_status and service_status not in {'NONE', ''}:
-                status_filter_sql = "\n  AND TName.ServiceStatus = %s"
-                status_params = [service_status]
-            for creator in creators:
-                query_base = """
-SELECT
-    TName.User_ServiceBase_Id AS RowID,
-    IF(TName.Creator_Id = 0, '- User_From_Site -', Hrc.ResellerName) AS Creator,
-    Hse.ServiceName AS ServiceName,
-    Hu.Username AS Username,
-    DATE_FORMAT(TName.CDT, '%%Y-%%m-%%d %%H:%%i:%%s') AS CreateDT,
-    TName.ServiceStatus AS ServiceStatus,
-    FORMAT(TName.ServicePrice, 0) AS ServicePrice,
-    DATE_FORMAT(NULLIF(TName.StartDate, '0000-00-00'), '%%Y-%%m-%%d') AS StartDate,
-    DATE_FORMAT(NULLIF(TName.EndDate, '0000-00-00'), '%%Y-%%m-%%d') AS EndDate,
-    COALESCE(NULLIF(Hse.STrA, 0), NULLIF(Hse.MTrA, 0), NULLIF(Hse.DTrA, 0), NULLIF(Hse.YTrA, 0), NULLIF(Hse.ExtraTraffic, 0)) AS PackageBytes,
-    CASE
-        WHEN COALESCE(NULLIF(Hse.STrA, 0), NULLIF(Hse.MTrA, 0), NULLIF(Hse.DTrA, 0), NULLIF(Hse.YTrA, 0), NULLIF(Hse.ExtraTraffic, 0)) IS NULL THEN NULL
-        ELSE ROUND(COALESCE(NULLIF(Hse.STrA, 0), NULLIF(Hse.MTrA, 0), NULLIF(Hse.DTrA, 0), NULLIF(Hse.YTrA, 0), NULLIF(Hse.ExtraTraffic, 0)) / 1073741824, 2)
-    END AS PackageValue
-FROM {table_path} TName
-JOIN Huser Hu ON TName.User_Id = Hu.User_Id
-LEFT JOIN Hreseller Hrc ON TName.Creator_Id = Hrc.Reseller_Id
-LEFT JOIN Hservice Hse ON TName.Service_Id = Hse.Service_Id
-WHERE (TRIM(LOWER(Hrc.ResellerName)) = TRIM(LOWER(%s)) OR %s IS NULL)
-"""
-                if status_filter_sql:
-                    query_base += status_filter_sql
-                query_base += """
-ORDER BY TName.CDT DESC
-LIMIT %s
-"""
-                params = [creator, creator]
-                params.extend(status_params)
-                params.append(limit)
-                try:
-                    df, used_table = run_query(query_base, params=params, tables_priority=tables_priority)
-                    if not df.empty:
-                        total_dfs.append(df)
-                        info_tables.append(f"{creator} ← {used_table}")
-                except Exception as exc:
-                    request.session['error'] = str(exc)
-                    break
-
-        show_results = True
-        if total_dfs:
-            final_df = pd.concat(total_dfs, ignore_index=True)
-            final_df = final_df.where(pd.notnull(final_df), None)
-
-            # Reorder columns for BigQuery reports
-            if use_bq:
-                desired_order = [
-                    'id',
-                    'CreateDate',
-                    'UserServiceID',
-                    'rs_username',
-                    'rs_name',
-                    'ServiceName',
-                    'username',
-                    'ServiceStatus',
-                    'ServicePrice',
-                    'Package',
-                    'StartDate',
-                    'EndDate',
-                ]
-                present = [c for c in desired_order if c in final_df.columns]
-                remaining = [c for c in final_df.columns if c not in present]
-                if present:
-                    final_df = final_df[present + remaining]
-
-            if 'Package' not in final_df.columns and 'PackageValue' in final_df.columns:
-                final_df['Package'] = final_df['PackageValue']
-
-            if 'Package' in final_df.columns:
-                pkg_numeric = pd.to_numeric(final_df['Package'], errors='coerce')
-                if pkg_numeric.notna().any():
-                    final_df['Package'] = pkg_numeric.round(2)
-
-            # build effective filters (reuse from session for downloads)
-            filter_serial_post = (request.POST.get('filter_serial') or '').strip().lower()
-            filter_date_post = (request.POST.get('filter_date') or '').strip().lower()
-            filter_input_present = (
-                form.cleaned_data.get('filter_serial')
-                or form.cleaned_data.get('filter_date')
-                or filter_serial_post in {'on', 'true', '1', 'yes', 'y'}
-                or filter_date_post in {'on', 'true', '1', 'yes', 'y'}
-                or any(
-                    v is not None
-                    for v in [
-                        form.cleaned_data.get('serial_value'),
-                        form.cleaned_data.get('serial_min'),
-                        form.cleaned_data.get('serial_max'),
-                        form.cleaned_data.get('sib_serial_value'),
-                        form.cleaned_data.get('sib_serial_min'),
-                        form.cleaned_data.get('sib_serial_max'),
-                        form.cleaned_data.get('date_value'),
-                        form.cleaned_data.get('date_start'),
-                        form.cleaned_data.get('date_end'),
-                    ]
-                )
-                or (form.cleaned_data.get('service_status') not in (None, '', 'NONE'))
+            if creators_raw:
+                request.session.pop('report_filters', None)
+
+        session_filters = request.session.get('report_filters') or {}
+        use_session_filters = (
+            not filter_input_present
+            and action in {'download_report', 'download_csv', 'download_summary_pdf', 'download_unlimited_pdf'}
+            and session_filters
+        )
+
+        effective_filters = form.cleaned_data
+        if use_session_filters:
+            effective_filters = {
+                **form.cleaned_data,
+                **session_filters,
+                'date_value': _parse_date(session_filters.get('date_value')),
+                'date_start': _parse_date(session_filters.get('date_start')),
+                'date_end': _parse_date(session_filters.get('date_end')),
+            }
+
+        report_filters = resolve_report_filters(effective_filters)
+
+        # Summaries aggregate in SQL; the pending filter keeps only each user's
+        # latest row, which the aggregate queries can't express, so it stays on
+        # the detail path.
+        server_summary = (
+            action in {'show_summary', 'download_summary_pdf', 'download_unlimited_pdf'}
+            and str(report_filters['service_status'] or '').strip().lower() != 'pending'
+        )
+
+        # Detail pages are cut in SQL, so their size doesn't depend on the report's.
+        sql_detail_page = action == 'show_details' and pages_in_sql(report_filters)
+
+        # Size up detail queries first: small ones run here, larger downloads
+        # go to the job worker and anything past the hard cap isn't fetched.
+        decision = None
+        if not server_summary and not sql_detail_page and preflight_enabled():
+            report_estimate, _estimate_error = load_estimate(
+                creators,
+                report_filters,
+                report_user_scope(request.user),
+                use_bq=use_bq,
+                tables_priority=tables_priority,
             )
+            decision = preflight_decision(report_estimate) if report_estimate else None
+        run_in_background = should_run_in_background(action, creators, report_filters, decision=decision)
+        if decision == NARROW or (decision == BACKGROUND and not run_in_background):
+            # Page views can't go to the worker; downloads only end up here past the cap or without jobs.
+            too_large = decision == NARROW or action in JOB_ACTIONS
+            request.session['error'] = NARROW_ERROR if too_large else PAGE_TOO_LARGE_ERROR
+            return render(request, template_name, {
+                'form': form,
+                'report_estimate': report_estimate,
+                'page_size': page_size,
+                'page_sizes': PAGE_SIZES,
+                'error': request.session.pop('error', None)
+            })
 
-            if filter_input_present:
-                request.session['report_filters'] = {
-                    'filter_serial': bool(
-                        form.cleaned_data.get('filter_serial')
-                        or filter_serial_post in {'on', 'true', '1', 'yes', 'y'}
-                    ),
-                    'serial_op': form.cleaned_data.get('serial_op'),
-                    'serial_value': form.cleaned_data.get('serial_value'),
-                    'serial_min': form.cleaned_data.get('serial_min'),
-                    'serial_max': form.cleaned_data.get('serial_max'),
-                    'sib_serial_op': form.cleaned_data.get('sib_serial_op'),
-                    'sib_serial_value': form.cleaned_data.get('sib_serial_value'),
-                    'sib_serial_min': form.cleaned_data.get('sib_serial_min'),
-                    'sib_serial_max': form.cleaned_data.get('sib_serial_max'),
-                    'filter_date': bool(
-                        form.cleaned_data.get('filter_date')
-                        or filter_date_post in {'on', 'true', '1', 'yes', 'y'}
-                    ),
-                    'date_op': form.cleaned_data.get('date_op'),
-                    'date_value': _serialize_date(form.cleaned_data.get('date_value')),
-                    'date_start': _serialize_date(form.cleaned_data.get('date_start')),
-                    'date_end': _serialize_date(form.cleaned_data.get('date_end')),
-                    'service_status': form.cleaned_data.get('service_status'),
-                }
-            else:
-                if creators_raw:
-                    request.session.pop('report_filters', None)
-
-            session_filters = request.session.get('report_filters') or {}
-            use_session_filters = (
-                not filter_input_present
-                and action in {'download_report', 'download_csv', 'download_summary_pdf', 'download_unlimited_pdf'}
-                and session_filters
+        if run_in_background:
+            filename = _build_report_filename('csv' if action == 'download_csv' else 'pdf', creators, effective_filters)
+            if action in {'download_summary_pdf', 'download_unlimited_pdf'}:
+                prefix = 'combined-summary-' if action == 'download_unlimited_pdf' else 'summary-'
+                filename = filename.replace('report-', prefix)
+            report_job = enqueue_report_job(
+                request.user,
+                action,
+                creators,
+                report_filters,
+                report_user_scope(request.user),
+                filename,
             )
+            return render(request, template_name, {
+                'form': form,
+                'report_job': report_job,
+                'report_estimate': report_estimate,
+                'page_size': page_size,
+                'page_sizes': PAGE_SIZES,
+                'error': request.session.pop('error', None)
+            })
 
-            effective_filters = form.cleaned_data
-            if use_session_filters:
-                effective_filters = {
-                    **form.cleaned_data,
-                    **session_filters,
-                    'date_value': _parse_date(session_filters.get('date_value')),
-                    'date_start': _parse_date(session_filters.get('date_start')),
-                    'date_end': _parse_date(session_filters.get('date_end')),
-                }
-
-            # apply serial filter
-            serial_op = effective_filters.get('serial_op')
-            serial_value = effective_filters.get('serial_value')
-            serial_min = effective_filters.get('serial_min')
-            serial_max = effective_filters.get('serial_max')
-            filter_serial_flag = effective_filters.get('filter_serial')
-            filter_serial_enabled = (
-                filter_serial_flag
-                or any(v is not None for v in [serial_value, serial_min, serial_max])
+        # CSV downloads not already cached stream from the source; failed or
+        # empty exports take the regular path below, which reports them.
+        if (
+            action == 'download_csv'
+            and pages_in_sql(report_filters)
+            and cached_report(
+                creators,
+                report_filters,
+                report_user_scope(request.user),
+                use_bq=use_bq,
+                tables_priority=tables_priority,
+            ) is None
+        ):
+            columns, creator_col, sections, export_error = export_report_sections(
+                creators, report_filters, use_bq=use_bq, tables_priority=tables_priority
             )
+            if not export_error and any(len(totals) for _chunks, totals in sections):
+                resp = StreamingHttpResponse(
+                    iter_streamed_report_csv(columns, creator_col, sections),
+                    content_type='text/csv',
+                )
+                filename = _build_report_filename('csv', creators, effective_filters)
+                resp['Content-Disposition'] = f'attachment; filename="{filename}"'
+                return resp
 
-            if serial_op == 'NONE':
-                filter_serial_enabled = False
-
-            if filter_serial_enabled:
-                serial_col = 'UserServiceID' if 'UserServiceID' in final_df.columns else 'RowID'
-                if serial_col in final_df.columns:
-                    if serial_op in (None, ''):
-                        serial_op = '='
-                    if serial_op == '=' and serial_value is None and serial_min is not None and serial_max is not None:
-                        serial_op = 'BETWEEN'
-                    elif serial_op == 'BETWEEN' and (serial_min is None or serial_max is None) and serial_value is not None:
-                        serial_op = '='
-
-                    serial_series = pd.to_numeric(final_df[serial_col], errors='coerce')
-                    if serial_op == 'BETWEEN' and serial_min is not None and serial_max is not None:
-                        final_df = final_df[serial_series.between(serial_min, serial_max)]
-                    elif serial_op == '=' and serial_value is not None:
-                        final_df = final_df[serial_series == serial_value]
-                    elif serial_op == '>' and serial_value is not None:
-                        final_df = final_df[serial_series > serial_value]
-                    elif serial_op == '<' and serial_value is not None:
-                        final_df = final_df[serial_series < serial_value]
-                    elif serial_op == '>=' and serial_value is not None:
-                        final_df = final_df[serial_series >= serial_value]
-                    elif serial_op == '<=' and serial_value is not None:
-                        final_df = final_df[serial_series <= serial_value]
-
-            # apply date filter
-            date_op = effective_filters.get('date_op')
-            date_value = effective_filters.get('date_value')
-            date_start = effective_filters.get('date_start')
-            date_end = effective_filters.get('date_end')
-            filter_date_flag = effective_filters.get('filter_date')
-            filter_date_enabled = (
-                filter_date_flag
-                or any(v is not None for v in [date_value, date_start, date_end])
+        if sql_detail_page:
+            (
+                page_df, detail_next, detail_prev, detail_total_count, detail_total_gb, fetch_meta, fetch_error
+            ) = load_detail_page(
+                creators,
+                report_filters,
+                report_user_scope(request.user),
+                page_size,
+                cursor=detail_cursor,
+                use_bq=use_bq,
+                tables_priority=tables_priority,
             )
+            fetched_df = pd.DataFrame()
+            if not page_df.empty:
+                show_details = True
+                detail_columns = list(page_df.columns)
+                detail_rows = page_df.values.tolist()
+        else:
+            fetched_df, fetch_meta, fetch_error = load_report(
+                creators,
+                report_filters,
+                report_user_scope(request.user),
+                use_bq=use_bq,
+                tables_priority=tables_priority,
+                summary=server_summary,
+            )
+        info_tables = fetch_meta['info_tables']
+        unresolved_creators = fetch_meta['unresolved_creators']
+        if fetch_error:
+            request.session['error'] = fetch_error
+        show_results = True
+        if server_summary and not fetched_df.empty:
+            show_summary = True
+            show_results = False
+            (
+                (summary_rows, summary_grand_total, summary_grand_count),
+                (unlimited_summary_rows, unlimited_grand_total, unlimited_grand_count),
+            ) = summaries_from_aggregates(fetched_df)
+
+        if not fetched_df.empty and not server_summary:
+            final_df = prepare_detail_frame(fetched_df, report_filters, use_bq=use_bq)
+            if action == 'show_details':
+                show_details = True
+                # Only the visible page is turned into rows; totals cover the whole result.
+                page_df, detail_next, detail_prev, detail_total_count, detail_total_gb = detail_page(
+                    final_df, page_size, cursor=detail_cursor
+                )
+                detail_columns = list(page_df.columns)
+                detail_rows = page_df.values.tolist()
 
-            if date_op == 'NONE':
-                filter_date_enabled = False
-
-            if filter_date_enabled:
-                date_col = 'CreateDT' if 'CreateDT' in final_df.columns else 'CreateDate'
-                if date_col in final_df.columns:
-                    if date_op in (None, ''):
-                        date_op = '='
-                    if date_op == 'EXACT':
-                        date_op = '='
-                    if date_op == '=' and date_value is None and date_start and date_end:
-                        date_op = 'BETWEEN'
-                    elif date_op == 'BETWEEN' and (not date_start or not date_end) and date_value:
-                        date_op = '='
-
-                    date_series = pd.to_datetime(final_df[date_col], errors='coerce')
-                    if date_op == '=' and date_value:
-                        final_df = final_df[date_series.dt.date == date_value]
-                    elif date_op == 'BETWEEN' and date_start and date_end:
-                        final_df = final_df[(date_series.dt.date >= date_start) & (date_series.dt.date <= date_end)]
-                    elif date_op == '>' and date_value:
-                        final_df = final_df[date_series.dt.date > date_value]
-                    elif date_op == '<' and date_value:
-                        final_df = final_df[date_series.dt.date < date_value]
-                    elif date_op == '>=' and date_value:
-                        final_df = final_df[date_series.dt.date >= date_value]
-                    elif date_op == '<=' and date_value:
-                        final_df = final_df[date_series.dt.date <= date_value]
-
-            # apply service status filter
-            service_status = effective_filters.get('service_status')
-            if service_status and service_status not in {'NONE', ''}:
-                if 'ServiceStatus' in final_df.columns:
-                    status_norm = str(service_status).strip().lower()
-                    final_df = final_df[
-                        final_df['ServiceStatus']
-                        .astype(str)
-                        .str.strip()
-                        .str.lower()
-                        .eq(status_norm)
-                    ]
-
-                    if status_norm == 'pending' and 'Username' in final_df.columns:
-                        date_col = 'CreateDT' if 'CreateDT' in final_df.columns else 'CreateDate'
-                        if date_col in final_df.columns:
-                            final_df = final_df.copy()
-                            final_df['_tmp_dt'] = pd.to_datetime(final_df[date_col], errors='coerce')
-                            final_df = final_df.sort_values(by=['Username', '_tmp_dt'], ascending=[True, False])
-                            final_df = final_df.drop_duplicates(subset=['Username'], keep='first')
-                            final_df = final_df.drop(columns=['_tmp_dt'])
-
-                        for col in ['password', 'Password', 'passwd', 'Passwd']:
-                            if col in final_df.columns:
-                                final_df = final_df.drop(columns=[col])
-
-            # apply SIB serial filter (UserServiceID only)
-            sib_serial_op = effective_filters.get('sib_serial_op')
-            sib_serial_value = effective_filters.get('sib_serial_value')
-            sib_serial_min = effective_filters.get('sib_serial_min')
-            sib_serial_max = effective_filters.get('sib_serial_max')
-
-            sib_serial_enabled = any(v is not None for v in [sib_serial_value, sib_serial_min, sib_serial_max])
-            if sib_serial_op == 'NONE':
-                sib_serial_enabled = False
-
-            if sib_serial_enabled and 'UserServiceID' in final_df.columns:
-                if sib_serial_op in (None, ''):
-                    sib_serial_op = '='
-                if sib_serial_op == '=' and sib_serial_value is None and sib_serial_min is not None and sib_serial_max is not None:
-                    sib_serial_op = 'BETWEEN'
-                elif sib_serial_op == 'BETWEEN' and (sib_serial_min is None or sib_serial_max is None) and sib_serial_value is not None:
-                    sib_serial_op = '='
-
-                sib_series = pd.to_numeric(final_df['UserServiceID'], errors='coerce')
-                if sib_serial_op == 'BETWEEN' and sib_serial_min is not None and sib_serial_max is not None:
-                    final_df = final_df[sib_series.between(sib_serial_min, sib_serial_max)]
-                elif sib_serial_op == '=' and sib_serial_value is not None:
-                    final_df = final_df[sib_series == sib_serial_value]
-                elif sib_serial_op == '>' and sib_serial_value is not None:
-                    final_df = final_df[sib_series > sib_serial_value]
-                elif sib_serial_op == '<' and sib_serial_value is not None:
-                    final_df = final_df[sib_series < sib_serial_value]
-                elif sib_serial_op == '>=' and sib_serial_value is not None:
-                    final_df = final_df[sib_series >= sib_serial_value]
-                elif sib_serial_op == '<=' and sib_serial_value is not None:
-                    final_df = final_df[sib_series <= sib_serial_value]
-
-            # sort rows grouped by reseller/creator and UserServiceID for easier review
-            if 'Creator' in final_df.columns or 'rs_username' in final_df.columns:
-                sort_cols = ['Creator'] if 'Creator' in final_df.columns else ['rs_username']
-                ascending = [True]
-                if 'UserServiceID' in final_df.columns:
-                    sort_cols.append('UserServiceID')
-                    ascending.append(True)
-                elif 'RowID' in final_df.columns:
-                    sort_cols.append('RowID')
-                    ascending.append(True)
-                else:
-                    date_sort_col = 'CreateDT' if 'CreateDT' in final_df.columns else 'CreateDate'
-                    if date_sort_col in final_df.columns:
-                        sort_cols.append(date_sort_col)
-                        ascending.append(False)
-
-                final_df = final_df.sort_values(by=sort_cols, ascending=ascending)
             if action in {'show_summary', 'download_summary_pdf', 'download_unlimited_pdf'}:
                 show_summary = True
                 show_results = False
-                creator_col = 'Creator' if 'Creator' in final_df.columns else (
-                    'rs_username' if 'rs_username' in final_df.columns else None
-                )
-                unlimited_mask = _unlimited_mask(final_df)
-                unlimited_df = final_df[unlimited_mask]
-                limited_df = final_df[~unlimited_mask]
-
-                summary_rows, summary_grand_total, summary_grand_count = _build_summary_rows(limited_df, creator_col)
-                unlimited_summary_rows, unlimited_grand_total, unlimited_grand_count = _build_summary_rows(
-                    unlimited_df, creator_col
-                )
-
-                if action in {'download_summary_pdf', 'download_unlimited_pdf'}:
-                    if action == 'download_unlimited_pdf':
-                        limited_df = _summary_rows_to_df(summary_rows, summary_grand_total, summary_grand_count)
-                        unlimited_df = _summary_rows_to_df(unlimited_summary_rows, unlimited_grand_total, unlimited_grand_count)
-                        pdf_data = export_summary_tables_to_pdf(limited_df, unlimited_df)
-                        if pdf_data:
-                            resp = HttpResponse(pdf_data, content_type='application/pdf')
-                            filename = _build_report_filename('pdf', creators, effective_filters).replace('report-', 'combined-summary-')
-                            resp['Content-Disposition'] = f'attachment; filename="{filename}"'
-                            return resp
-                    else:
-                        limited_df = _summary_rows_to_df(summary_rows, summary_grand_total, summary_grand_count)
-                        unlimited_df = _summary_rows_to_df(unlimited_summary_rows, unlimited_grand_total, unlimited_grand_count)
-                        pdf_data = export_summary_tables_to_pdf(limited_df, unlimited_df)
-                        if pdf_data:
-                            resp = HttpResponse(pdf_data, content_type='application/pdf')
-                            filename = _build_report_filename('pdf', creators, effective_filters).replace('report-', 'summary-')
-                            resp['Content-Disposition'] = f'attachment; filename="{filename}"'
-                            return resp
+                (
+                    (summary_rows, summary_grand_total, summary_grand_count),
+                    (unlimited_summary_rows, unlimited_grand_total, unlimited_grand_count),
+                ) = detail_summaries(final_df)
 
             if action == 'download_report':
-                pdf_df = final_df.copy()
+                pdf_df = final_df
                 creator_col = 'Creator' if 'Creator' in pdf_df.columns else ('rs_username' if 'rs_username' in pdf_df.columns else None)
 
-                def _add_totals(df):
-                    if df.empty or not creator_col or ('Package' not in df.columns and 'PackageValue' not in df.columns):
-                        return df
-
-                    pkg_col = 'Package' if 'Package' in df.columns else 'PackageValue'
-                    if 'Count' not in df.columns:
-                        df['Count'] = None
-                    pkg_numeric = pd.to_numeric(df[pkg_col], errors='coerce')
-                    totals = (
-                        df.assign(_pkg=pkg_numeric)
-                        .groupby(creator_col)
-                        .agg(SumPkg=('_pkg', 'sum'), Count=('Count', 'size'))
-                        .reset_index()
-                    )
-
-                    def _blank_row():
-                        return {c: '' for c in df.columns}
-
-                    total_rows = []
-                    for _, row in totals.iterrows():
-                        r = _blank_row()
-                        r[creator_col] = f"{row[creator_col]} Total"
-                        r[pkg_col] = round(float(row['SumPkg']) if pd.notna(row['SumPkg']) else 0, 2)
-                        r['Count'] = int(row['Count'])
-                        total_rows.append(r)
-
-                    grand_total = float(pkg_numeric.sum()) if pkg_numeric.notna().any() else 0
-                    grand_count = int(len(df))
-                    r = _blank_row()
-                    r[creator_col] = 'Grand Total'
-                    r[pkg_col] = round(grand_total, 2)
-                    r['Count'] = grand_count
-                    total_rows.append(r)
-
-                    return pd.concat([df, pd.DataFrame(total_rows)], ignore_index=True)
-
-                unlimited_mask = _unlimited_mask(pdf_df)
-                limited_df = _add_totals(pdf_df[~unlimited_mask].copy())
-                unlimited_df = _add_totals(pdf_df[unlimited_mask].copy())
+                unlimited_rows = unlimited_mask(pdf_df)
+                limited_df = append_totals(pdf_df[~unlimited_rows], creator_col)
+                unlimited_df = append_totals(pdf_df[unlimited_rows], creator_col)
 
                 pdf_data = export_detail_tables_to_pdf(limited_df, unlimited_df)
                 if pdf_data:
@@ -1347,70 +1096,32 @@ LIMIT %s
                     resp['Content-Disposition'] = f'attachment; filename="{filename}"'
                     return resp
             elif action == 'download_csv':
-                csv_df = final_df.copy()
+                csv_df = final_df
                 creator_col = 'Creator' if 'Creator' in csv_df.columns else ('rs_username' if 'rs_username' in csv_df.columns else None)
-
-                def _add_totals_csv(df):
-                    if df.empty or not creator_col or ('Package' not in df.columns and 'PackageValue' not in df.columns):
-                        return df
-
-                    pkg_col = 'Package' if 'Package' in df.columns else 'PackageValue'
-                    if 'Count' not in df.columns:
-                        df['Count'] = None
-                    pkg_numeric = pd.to_numeric(df[pkg_col], errors='coerce')
-                    totals = (
-                        df.assign(_pkg=pkg_numeric)
-                        .groupby(creator_col)
-                        .agg(SumPkg=('_pkg', 'sum'), Count=('Count', 'size'))
-                        .reset_index()
-                    )
-
-                    def _blank_row_csv():
-                        return {c: '' for c in df.columns}
-
-                    total_rows = []
-                    for _, row in totals.iterrows():
-                        r = _blank_row_csv()
-                        r[creator_col] = f"{row[creator_col]} Total"
-                        r[pkg_col] = round(float(row['SumPkg']) if pd.notna(row['SumPkg']) else 0, 2)
-                        r['Count'] = int(row['Count'])
-                        total_rows.append(r)
-
-                    grand_total = float(pkg_numeric.sum()) if pkg_numeric.notna().any() else 0
-                    grand_count = int(len(df))
-                    r = _blank_row_csv()
-                    r[creator_col] = 'Grand Total'
-                    r[pkg_col] = round(grand_total, 2)
-                    r['Count'] = grand_count
-                    total_rows.append(r)
-
-                    return pd.concat([df, pd.DataFrame(total_rows)], ignore_index=True)
-
-                unlimited_mask = _unlimited_mask(csv_df)
-                limited_df = _add_totals_csv(csv_df[~unlimited_mask].copy())
-                unlimited_df = _add_totals_csv(csv_df[unlimited_mask].copy())
-
-                output = io.StringIO()
-                output.write('Limited Packages Report\n')
-                limited_df.to_csv(output, index=False)
-                output.write('\n')
-                output.write('Unlimited Packages Report\n')
-                unlimited_df.to_csv(output, index=False)
-
-                csv_data = output.getvalue()
-                resp = HttpResponse(csv_data, content_type='text/csv')
+                unlimited_rows = unlimited_mask(csv_df)
+                resp = StreamingHttpResponse(
+                    iter_report_csv(csv_df, creator_col, unlimited_rows),
+                    content_type='text/csv',
+                )
                 filename = _build_report_filename('csv', creators, effective_filters)
                 resp['Content-Disposition'] = f'attachment; filename="{filename}"'
                 return resp
 
-    columns = list(final_df.columns) if not final_df.empty else None
-    rows = final_df.values.tolist() if not final_df.empty else None
+        if show_summary and action in {'download_summary_pdf', 'download_unlimited_pdf'}:
+            limited_df = _summary_rows_to_df(summary_rows, summary_grand_total, summary_grand_count)
+            unlimited_df = _summary_rows_to_df(unlimited_summary_rows, unlimited_grand_total, unlimited_grand_count)
+            pdf_data = export_summary_tables_to_pdf(limited_df, unlimited_df)
+            if pdf_data:
+                resp = HttpResponse(pdf_data, content_type='application/pdf')
+                prefix = 'combined-summary-' if action == 'download_unlimited_pdf' else 'summary-'
+                filename = _build_report_filename('pdf', creators, effective_filters).replace('report-', prefix)
+                resp['Content-Disposition'] = f'attachment; filename="{filename}"'
+                return resp
 
     return render(request, template_name, {
         'form': form,
-        'columns': columns,
-        'rows': rows,
         'info_tables': info_tables,
+        'unresolved_creators': unresolved_creators,
         'show_results': show_results,
         'show_summary': show_summary,
         'summary_rows': summary_rows,
@@ -1419,10 +1130,130 @@ LIMIT %s
         'unlimited_summary_rows': unlimited_summary_rows,
         'unlimited_grand_total': unlimited_grand_total,
         'unlimited_grand_count': unlimited_grand_count,
+        'show_details': show_details,
+        'detail_columns': detail_columns,
+        'detail_rows': detail_rows,
+        'detail_next': detail_next,
+        'detail_prev': detail_prev,
+        'detail_total_count': detail_total_count,
+        'detail_total_gb': detail_total_gb,
+        'report_estimate': report_estimate,
+        'page_size': page_size,
+        'page_sizes': PAGE_SIZES,
         'error': request.session.pop('error', None)
     })
 
 
+@login_required
+@gzip_page
+def report_rows_api(request):
+    """Detail rows of a report as paginated, columnar JSON.
+
+    Takes the report form fields plus `cursor` and `page_size` as query
+    parameters and runs the same cached query and filter pipeline as the
+    report page, returning one page at a time; see `load_detail_page`.
+    """
+    form = FilterForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({'error': 'Invalid filters.', 'fields': form.errors}, status=400)
+    creators = report_creators(form.cleaned_data.get('creators_raw'), request.user)
+    if not creators:
+        return JsonResponse({'error': NO_CREATORS_ERROR}, status=400)
+
+    use_bq, source_warning = report_source()
+    report_filters = resolve_report_filters(form.cleaned_data)
+    tables_priority = report_tables_priority()
+    report_estimate = None
+    page_size = parse_page_size(request.GET.get('page_size'))
+    cursor = decode_cursor(request.GET.get('cursor'))
+    if pages_in_sql(report_filters):
+        page_df, next_cursor, prev_cursor, total_count, total_gb, fetch_meta, fetch_error = load_detail_page(
+            creators,
+            report_filters,
+            report_user_scope(request.user),
+            page_size,
+            cursor=cursor,
+            use_bq=use_bq,
+            tables_priority=tables_priority,
+        )
+        return _report_rows_response(
+            page_df, next_cursor, prev_cursor, page_size, total_count, total_gb,
+            fetch_meta, report_estimate, fetch_error or source_warning,
+        )
+
+    if preflight_enabled():
+        report_estimate, _estimate_error = load_estimate(
+            creators,
+            report_filters,
+            report_user_scope(request.user),
+            use_bq=use_bq,
+            tables_priority=tables_priority,
+        )
+        decision = preflight_decision(report_estimate)
+        if decision != INLINE:
+            message = NARROW_ERROR if decision == NARROW else PAGE_TOO_LARGE_ERROR
+            return JsonResponse({'error': message, 'estimate': report_estimate}, status=400)
+    fetched_df, fetch_meta, fetch_error = load_report(
+        creators,
+        report_filters,
+        report_user_scope(request.user),
+        use_bq=use_bq,
+        tables_priority=tables_priority,
+    )
+    final_df = prepare_detail_frame(fetched_df, report_filters, use_bq=use_bq) if not fetched_df.empty else fetched_df
+    page_df, next_cursor, prev_cursor, total_count, total_gb = detail_page(final_df, page_size, cursor=cursor)
+    return _report_rows_response(
+        page_df, next_cursor, prev_cursor, page_size, total_count, total_gb,
+        fetch_meta, report_estimate, fetch_error or source_warning,
+    )
+
+
+def _report_rows_response(page_df, next_cursor, prev_cursor, page_size, total_count, total_gb, fetch_meta,
+                          report_estimate, error):
+    return JsonResponse({
+        **columnar(page_df),
+        'next': next_cursor,
+        'prev': prev_cursor,
+        'page_size': page_size,
+        'total_count': total_count,
+        'total_gb': total_gb,
+        'info_tables': fetch_meta['info_tables'],
+        'unresolved_creators': fetch_meta['unresolved_creators'],
+        'estimate': report_estimate,
+        'error': error,
+    }, json_dumps_params={'separators': (',', ':')})
+
+
+def _report_job_for(request, job_id):
+    jobs = ReportJob.objects.all() if request.user.is_superuser else ReportJob.objects.filter(user=request.user)
+    return jobs.filter(id=job_id).first()
+
+
+@login_required
+def report_job_status(request, job_id):
+    job = _report_job_for(request, job_id)
+    if job is None:
+        return JsonResponse({'error': 'Job not found.'}, status=404)
+    return JsonResponse({
+        'id': job.id,
+        'action': job.action,
+        'status': job.status,
+        'progress': job.progress,
+        'message': job.message,
+        'row_count': job.row_count,
+        'download_url': reverse('reports:report_job_download', args=[job.id]) if job.file else None,
+    })
+
+
+@login_required
+def report_job_download(request, job_id):
+    job = _report_job_for(request, job_id)
+    if job is None or job.status != ReportJob.STATUS_DONE or not job.file:
+        return HttpResponse('Report not ready.', content_type='text/plain', status=404)
+    filename = job.filename or os.path.basename(job.file.name)
+    return FileResponse(job.file.open('rb'), as_attachment=True, filename=filename)
+
+
 @login_required
 def sync_logs_view(request):
     if not request.user.is_superuser:
@@ -0,0 +1,126 @@
+"""Micro-benchmark: report summary/totals, legacy per-creator loops vs reports.summary.
+
+Usage: python tools/bench_summary.py [rows] [creators] [repeat]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from reports.summary import append_totals, build_summary
+
+
+def legacy_build_summary_rows(source_df, creator_col):
+    # The previous views._build_summary_rows, kept here as the baseline.
+    if source_df.empty or not creator_col or 'ServiceName' not in source_df.columns:
+        return [], None, None
+    df = source_df.copy()
+    df['Package'] = pd.to_numeric(df['Package'], errors='coerce')
+    summary = (
+        df.groupby([creator_col, 'ServiceName'])
+        .agg(Count=('ServiceName', 'size'), SumGB=('Package', 'sum'))
+        .reset_index()
+    )
+    creator_rows = []
+    for creator in summary[creator_col].unique():
+        df_c = summary[summary[creator_col] == creator]
+        details = [
+            {'ServiceName': row['ServiceName'], 'Count': int(row['Count']), 'SumGB': round(float(row['SumGB']), 2)}
+            for _, row in df_c.iterrows()
+        ]
+        creator_rows.append({
+            'Creator': creator,
+            'TotalGB': round(df_c['SumGB'].astype(float).sum(), 2),
+            'TotalCount': int(df_c['Count'].sum()),
+            'Details': details,
+        })
+    grand_total = round(summary['SumGB'].astype(float).sum(), 2) if not summary.empty else None
+    grand_count = int(summary['Count'].sum()) if not summary.empty else None
+    return creator_rows, grand_total, grand_count
+
+
+def legacy_add_totals(df, creator_col):
+    # The previous views._add_totals / _add_totals_csv, kept here as the baseline.
+    pkg_col = 'Package'
+    df = df.copy()
+    if 'Count' not in df.columns:
+        df['Count'] = None
+    pkg_numeric = pd.to_numeric(df[pkg_col], errors='coerce')
+    totals = (
+        df.assign(_pkg=pkg_numeric)
+        .groupby(creator_col)
+        .agg(SumPkg=('_pkg', 'sum'), Count=('Count', 'size'))
+        .reset_index()
+    )
+    total_rows = []
+    for _, row in totals.iterrows():
+        r = {c: '' for c in df.columns}
+        r[creator_col] = f"{row[creator_col]} Total"
+        r[pkg_col] = round(float(row['SumPkg']) if pd.notna(row['SumPkg']) else 0, 2)
+        r['Count'] = int(row['Count'])
+        total_rows.append(r)
+    r = {c: '' for c in df.columns}
+    r[creator_col] = 'Grand Total'
+    r[pkg_col] = round(float(pkg_numeric.sum()) if pkg_numeric.notna().any() else 0, 2)
+    r['Count'] = int(len(df))
+    total_rows.append(r)
+    return pd.concat([df, pd.DataFrame(total_rows)], ignore_index=True)
+
+
+def synthetic_frame(rows, creators, services=40, seed=7):
+    rng = np.random.default_rng(seed)
+    creator_names = np.array([f'reseller_{i:04d}' for i in range(creators)], dtype=object)
+    service_names = np.array([f'Plan {i} {5 * (i % 8 + 1)}GB' for i in range(services)], dtype=object)
+    package = rng.choice([0.0, 5.0, 10.0, 20.5, 40.0, np.nan], size=rows)
+    return pd.DataFrame({
+        'RowID': np.arange(rows),
+        'Creator': creator_names[rng.integers(0, creators, size=rows)],
+        'ServiceName': service_names[rng.integers(0, services, size=rows)],
+        'Username': rng.integers(10 ** 6, 10 ** 7, size=rows).astype(str),
+        'Package': package,
+    })
+
+
+def _best_of(func, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    creators = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    repeat = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+    df = synthetic_frame(rows, creators)
+    print(f"rows={rows} creators={creators} repeat={repeat} (best of)")
+
+    cases = [
+        ('summary', lambda: legacy_build_summary_rows(df, 'Creator'), lambda: build_summary(df, 'Creator')),
+        ('totals', lambda: legacy_add_totals(df, 'Creator'), lambda: append_totals(df, 'Creator')),
+    ]
+    for name, legacy, vectorized in cases:
+        legacy_time, legacy_result = _best_of(legacy, repeat)
+        new_time, new_result = _best_of(vectorized, repeat)
+        if name == 'summary':
+            same = legacy_result == new_result
+        else:
+            same = legacy_result.tail(creators + 1).astype(str).equals(new_result.tail(creators + 1).astype(str))
+        print(
+            f"{name:<8} legacy {legacy_time * 1000:9.1f} ms   vectorized {new_time * 1000:9.1f} ms   "
+            f"speedup {legacy_time / new_time:6.1f}x   same={same}"
+        )
+
+
+if __name__ == '__main__':
+    main()